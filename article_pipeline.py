@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网页到 OCR 报告的端到端异步流水线
+清洗页面 → 图片URL去重 → 下载图片 → 调用 OCR → 清洗 OCR 结果 → 合并为一条文章记录。
+各阶段之间是有界队列（下游变慢时上游自动等待），每个阶段有独立的并发数；
+图片下载与 OCR 调用共用按主机复用连接的 HTTP 连接池。图片源与 OCR 服务均可替换，
+测试中可以用本地的替身服务或普通的异步函数。
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import ssl
+import sys
+import time
+from concurrent.futures import Executor
+from functools import partial
+from typing import (Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List,
+                    Optional, Set, Tuple, Union)
+from urllib.parse import urlsplit
+
+import clean_ocr
+from clean_data_loader import load_clean_data
+
+# 默认各阶段并发数与队列长度
+DEFAULT_CLEAN_WORKERS = 2
+DEFAULT_FETCH_WORKERS = 8
+DEFAULT_OCR_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 32
+
+# 默认每个主机的连接数上限与请求超时（秒）
+DEFAULT_MAX_PER_HOST = 8
+DEFAULT_TIMEOUT = 30.0
+
+# 图片下载函数：url -> 图片内容
+ImageFetcher = Callable[[str], Awaitable[bytes]]
+
+# OCR 函数：(图片内容, url) -> OCR JSON（extract_and_clean_ocr_data 接受的格式）
+OcrClient = Callable[[bytes, str], Awaitable[Dict[str, Any]]]
+
+# 连接池的键：(协议, 主机, 端口)
+_HostKey = Tuple[str, str, int]
+
+
+class HttpError(IOError):
+    """HTTP 请求返回了非 2xx 状态"""
+
+    def __init__(self, status: int, url: str) -> None:
+        super().__init__(f"HTTP {status}: {url}")
+        self.status = status
+
+
+class HttpPool:
+    """
+    极简的 HTTP/1.1 连接池：按主机复用 keep-alive 连接，并限制每个主机的并发连接数
+    支持 Content-Length 与 chunked 两种响应体
+    """
+
+    def __init__(self, max_per_host: int = DEFAULT_MAX_PER_HOST, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.connections_opened = 0
+        self.requests = 0
+        self._idle: Dict[_HostKey, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._limits: Dict[_HostKey, asyncio.Semaphore] = {}
+
+    async def _connect(self, key: _HostKey) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        scheme, host, port = key
+        context = ssl.create_default_context() if scheme == 'https' else None
+        self.connections_opened += 1
+        return await asyncio.open_connection(host, port, ssl=context)
+
+    async def request(self, method: str, url: str, body: bytes = b'',
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        发送请求
+
+        Args:
+            method: 请求方法
+            url: 完整URL
+            body: 请求体
+            headers: 额外的请求头
+
+        Returns:
+            (状态码, 响应头（小写键）, 响应体)
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        key = (scheme, parts.hostname or '', parts.port or (443 if scheme == 'https' else 80))
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = asyncio.Semaphore(self.max_per_host)
+        async with limit:
+            self.requests += 1
+            idle = self._idle.setdefault(key, [])
+            # 复用的连接可能已被服务端关闭：失败时换新连接重试一次
+            for reused in (True, False):
+                if reused and not idle:
+                    continue
+                reader, writer = idle.pop() if reused else await self._connect(key)
+                try:
+                    writer.write(request)
+                    status, response_headers, content, keep_alive = await asyncio.wait_for(
+                        self._read_response(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    writer.close()
+                    if reused:
+                        continue
+                    raise IOError(f"请求失败: {url}: {e}") from e
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, response_headers, content
+        raise IOError(f"请求失败: {url}")
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes, bool]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("连接已关闭")
+        version, status = status_line.split(None, 2)[:2]
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == b'HTTP/1.1'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await reader.readexactly(int(headers['content-length']))
+        else:
+            content = await reader.read()
+            keep_alive = False
+        return int(status), headers, content, keep_alive
+
+    async def close(self) -> None:
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+def http_image_fetcher(pool: HttpPool) -> ImageFetcher:
+    """经连接池 GET 下载图片"""
+    async def fetch(url: str) -> bytes:
+        status, _, content = await pool.request('GET', url)
+        if not 200 <= status < 300:
+            raise HttpError(status, url)
+        return content
+    return fetch
+
+
+def http_ocr_client(endpoint: str, pool: HttpPool) -> OcrClient:
+    """
+    经连接池调用 OCR 服务：POST {"image": base64, "url": 图片地址}，响应为 OCR JSON
+
+    Args:
+        endpoint: OCR 服务地址
+        pool: 连接池
+    """
+    async def recognize(image: bytes, url: str) -> Dict[str, Any]:
+        body = json.dumps({"image": base64.b64encode(image).decode('ascii'), "url": url}).encode('utf-8')
+        status, _, content = await pool.request(
+            'POST', endpoint, body, {"Content-Type": "application/json"})
+        if not 200 <= status < 300:
+            raise HttpError(status, endpoint)
+        return json.loads(content)
+    return recognize
+
+
+class _Article:
+    """流水线中一篇文章的状态"""
+
+    def __init__(self, index: int, url: Optional[str]) -> None:
+        self.index = index
+        self.url = url
+        self.started = time.perf_counter()
+        self.output: Dict[str, Any] = {}
+        self.images: List[Dict[str, Any]] = []
+        self.pending = 0
+        self.error: Optional[str] = None
+
+    def record(self) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"id": self.index, "url": self.url}
+        record.update(self.output)
+        record["images"] = self.images
+        if self.error is not None:
+            record["error"] = self.error
+        record["elapsed"] = round(time.perf_counter() - self.started, 4)
+        return record
+
+
+class ArticlePipeline:
+    """页面清洗、图片下载、OCR 与报告清洗并发执行的流水线"""
+
+    def __init__(self, fetch_image: ImageFetcher, recognize: OcrClient,
+                 image_index: Optional[Any] = None, clean_workers: int = DEFAULT_CLEAN_WORKERS,
+                 fetch_workers: int = DEFAULT_FETCH_WORKERS, ocr_workers: int = DEFAULT_OCR_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, executor: Optional[Executor] = None,
+                 layout: bool = False) -> None:
+        """
+        Args:
+            fetch_image: 图片下载函数
+            recognize: OCR 函数
+            image_index: 图片已见索引（如 image_index.ImageSeenIndex），已见过的图片不再下载与 OCR；
+                图片在 OCR 报告清洗成功后才登记，失败的图片下次运行时会重试
+            clean_workers: 页面清洗与 OCR 结果清洗的并发数
+            fetch_workers: 图片下载并发数
+            ocr_workers: OCR 调用并发数
+            queue_size: 各阶段之间队列的长度上限
+            executor: 执行清洗计算的执行器，默认为事件循环的线程池
+            layout: OCR 结果是否按版面坐标重建表格行
+        """
+        self.fetch_image = fetch_image
+        self.recognize = recognize
+        self.image_index = image_index
+        self.clean_workers = clean_workers
+        self.fetch_workers = fetch_workers
+        self.ocr_workers = ocr_workers
+        self.queue_size = queue_size
+        self.executor = executor
+        self.layout = layout
+
+    async def run(self, pages: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        处理页面流，按完成顺序产出文章记录
+
+        Args:
+            pages: 页面流，每项为原始内容字符串或 {"input": ..., "url": ..., ...}（同 Args.params）
+
+        Yields:
+            dict: 文章记录，包含页面清洗结果、images（每张图片的状态与 OCR 报告）与耗时
+        """
+        loop = asyncio.get_running_loop()
+        clean_data = load_clean_data()
+        page_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        fetch_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        ocr_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        parse_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        done_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        # 在途文章数与输入是否已读完，两者都满足时放入结束标记
+        state = {"open": 0, "input_done": False}
+        finished = object()
+        # 本次运行中正在下载与 OCR 的图片去重键，其他页面中的同一图片记为 seen
+        in_flight: Set[str] = set()
+
+        async def complete(article: _Article) -> None:
+            await done_queue.put(article.record())
+            state["open"] -= 1
+            if state["input_done"] and state["open"] == 0:
+                await done_queue.put(finished)
+
+        async def image_done(article: _Article, image: Dict[str, Any]) -> None:
+            if self.image_index is not None:
+                in_flight.discard(self.image_index.key(image["url"]))
+                if image["status"] == "ocr":
+                    self.image_index.mark([image["url"]])
+            article.pending -= 1
+            if article.pending == 0:
+                await complete(article)
+
+        async def feed() -> None:
+            index = 0
+            if hasattr(pages, '__aiter__'):
+                async for page in pages:
+                    state["open"] += 1
+                    await page_queue.put((index, page))
+                    index += 1
+            else:
+                for page in pages:
+                    state["open"] += 1
+                    await page_queue.put((index, page))
+                    index += 1
+            state["input_done"] = True
+            if state["open"] == 0:
+                await done_queue.put(finished)
+
+        async def clean_pages() -> None:
+            while True:
+                index, page = await page_queue.get()
+                params = {"input": page} if isinstance(page, str) else dict(page)
+                raw_content, options = clean_data._build_args({"params": params})
+                article = _Article(index, options.get('url'))
+                try:
+                    article.output = await loop.run_in_executor(
+                        self.executor, partial(clean_data.build_output, raw_content, **options))
+                except Exception as e:
+                    article.error = f"{type(e).__name__}: {e}"
+                    await complete(article)
+                    continue
+                article.images = []
+                for url in article.output.get('image_urls', []):
+                    status = "new"
+                    if self.image_index is not None:
+                        # 只查询不登记，OCR 成功后才登记
+                        key = self.image_index.key(url)
+                        if key in in_flight or url in self.image_index:
+                            status = "seen"
+                        else:
+                            in_flight.add(key)
+                    article.images.append({"url": url, "status": status})
+                fresh = [image for image in article.images if image["status"] == "new"]
+                article.pending = len(fresh)
+                if not fresh:
+                    await complete(article)
+                for image in fresh:
+                    await fetch_queue.put((article, image))
+
+        async def fetch_images() -> None:
+            while True:
+                article, image = await fetch_queue.get()
+                try:
+                    content = await self.fetch_image(image["url"])
+                except Exception as e:
+                    image.update(status="error", error=f"fetch: {type(e).__name__}: {e}")
+                    await image_done(article, image)
+                    continue
+                await ocr_queue.put((article, image, content))
+
+        async def call_ocr() -> None:
+            while True:
+                article, image, content = await ocr_queue.get()
+                try:
+                    result = await self.recognize(content, image["url"])
+                except Exception as e:
+                    image.update(status="error", error=f"ocr: {type(e).__name__}: {e}")
+                    await image_done(article, image)
+                    continue
+                await parse_queue.put((article, image, result))
+
+        async def clean_reports() -> None:
+            while True:
+                article, image, result = await parse_queue.get()
+                try:
+                    image["report"] = await loop.run_in_executor(
+                        self.executor, clean_ocr.extract_and_clean_ocr_data, result, self.layout)
+                    image["status"] = "ocr"
+                except Exception as e:
+                    image.update(status="error", error=f"clean: {type(e).__name__}: {e}")
+                await image_done(article, image)
+
+        workers = [feed()]
+        workers += [clean_pages() for _ in range(self.clean_workers)]
+        workers += [fetch_images() for _ in range(self.fetch_workers)]
+        workers += [call_ocr() for _ in range(self.ocr_workers)]
+        workers += [clean_reports() for _ in range(self.clean_workers)]
+        tasks = [asyncio.ensure_future(worker) for worker in workers]
+        # 仍在运行的任务：输入读完后 feed 正常结束，其余阶段一直运行到流水线关闭
+        running = set(tasks)
+        try:
+            while True:
+                getter = asyncio.ensure_future(done_queue.get())
+                # 任一阶段意外退出（如输入迭代出错）时立即抛出，而不是一直等待
+                done, _ = await asyncio.wait(running | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    for task in done:
+                        task.result()
+                        running.discard(task)
+                    continue
+                record = getter.result()
+                if record is finished:
+                    break
+                yield record
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_cli(args: argparse.Namespace) -> int:
+    pool = HttpPool(max_per_host=args.max_per_host)
+    pipeline = ArticlePipeline(
+        http_image_fetcher(pool), http_ocr_client(args.ocr_endpoint, pool),
+        fetch_workers=args.fetch_workers, ocr_workers=args.ocr_workers, layout=args.layout,
+    )
+    input_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    count = 0
+    try:
+        pages = (json.loads(line)['params'] for line in input_stream if line.strip())
+        async for record in pipeline.run(pages):
+            print(json.dumps(record, ensure_ascii=False))
+            count += 1
+    finally:
+        await pool.close()
+        if input_stream is not sys.stdin:
+            input_stream.close()
+    print(f"✅ 完成 {count} 篇文章，建立连接 {pool.connections_opened} 个，请求 {pool.requests} 次", file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口：输入为 {"params": {"input": ...}} 形式的 JSONL，逐行输出文章记录
+    """
+    parser = argparse.ArgumentParser(description="网页清洗 + 图片 OCR 的端到端流水线")
+    parser.add_argument("input", help="输入 JSONL 文件，- 表示标准输入")
+    parser.add_argument("--ocr-endpoint", required=True, help="OCR 服务地址")
+    parser.add_argument("--fetch-workers", type=int, default=DEFAULT_FETCH_WORKERS, help="图片下载并发数")
+    parser.add_argument("--ocr-workers", type=int, default=DEFAULT_OCR_WORKERS, help="OCR 调用并发数")
+    parser.add_argument("--max-per-host", type=int, default=DEFAULT_MAX_PER_HOST, help="每个主机的连接数上限")
+    parser.add_argument("--layout", action="store_true", help="按版面坐标重建 OCR 表格行")
+    args = parser.parse_args(argv)
+    return asyncio.run(_run_cli(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
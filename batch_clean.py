@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网页内容批量清洗工具
+流式读取 JSONL（每行一个 {"params": {"input": ...}} 记录），用进程池并行清洗，
+并将 Output 结果逐行写入输出 JSONL
+
+--dedup 与 --image-index 在每个工作进程中各建一个近重复索引与图片已见索引，
+进程之间互不可见：需要全局判重或标记时使用 -w 0。图片已见索引在进程退出时
+与快照合并，下一次运行从快照继续。
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+import multiprocessing
+from multiprocessing import util
+from typing import BinaryIO, Deque, Iterator, List, Optional, Set, TextIO, Tuple
+
+from clean_data_loader import load_clean_data
+from image_index import ImageSeenIndex
+from near_dup import NearDupIndex
+from result_cache import ResultCache, cached_build_output
+
+# 一条待处理记录：(行号, 原始行)
+Record = Tuple[int, bytes]
+
+# 一条处理结果：(行号, 输出JSON行, 是否成功)
+Result = Tuple[int, str, bool]
+
+# 当前进程的结果缓存，由 init_worker 配置
+_cache: Optional[ResultCache] = None
+
+
+class BatchStats:
+    """批处理吞吐统计"""
+
+    def __init__(self) -> None:
+        self.records = 0
+        self.errors = 0
+        self.input_bytes = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self) -> None:
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.input_bytes / 1e6 / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"📊 记录 {self.records} 条（失败 {self.errors} 条），"
+            f"输入 {self.input_bytes / 1e6:.2f} MB，耗时 {self.elapsed:.2f}s，"
+            f"{self.docs_per_second:.1f} docs/s，{self.mb_per_second:.2f} MB/s"
+        )
+
+
+def init_indexes(dedup_threshold: Optional[float] = None, image_snapshot: Optional[str] = None) -> None:
+    """
+    为当前进程配置 build_output 使用的进程级索引
+
+    Args:
+        dedup_threshold: 近重复相似度阈值；为 None 时不判重
+        image_snapshot: 图片已见索引的快照路径；为 None 时不标记图片，否则从快照载入。
+            在工作进程中，进程正常退出时把本进程的已见集合合并回快照；
+            在主进程中由调用方以 sync_indexes 合并
+    """
+    dedup_index = NearDupIndex(threshold=dedup_threshold) if dedup_threshold is not None else None
+    image_index = None
+    if image_snapshot is not None:
+        image_index = ImageSeenIndex(snapshot_path=image_snapshot)
+        if multiprocessing.parent_process() is not None:
+            util.Finalize(image_index, image_index.sync, exitpriority=10)
+    load_clean_data().configure_indexes(dedup_index, image_index)
+
+
+def sync_indexes() -> None:
+    """把当前进程的图片已见索引合并回快照（未配置时不做任何事）"""
+    image_index = load_clean_data()._image_index
+    if image_index is not None and image_index.snapshot_path is not None:
+        image_index.sync()
+
+
+def init_worker(cache_db: Optional[str], cache_bytes: int, dedup_threshold: Optional[float] = None,
+                image_snapshot: Optional[str] = None) -> None:
+    """
+    初始化当前进程的结果缓存与索引（作为进程池的 initializer）
+
+    Args:
+        cache_db: 共享的 SQLite 缓存路径；为 None 时只使用进程内缓存
+        cache_bytes: 进程内缓存容量（字节），为0时不使用缓存
+        dedup_threshold: 近重复相似度阈值，见 init_indexes
+        image_snapshot: 图片已见索引的快照路径，见 init_indexes
+    """
+    global _cache
+    _cache = None
+    if dedup_threshold is not None or image_snapshot is not None:
+        init_indexes(dedup_threshold, image_snapshot)
+    # 缓存命中会跳过判重与图片登记，启用索引时不使用缓存
+    elif cache_bytes > 0 or cache_db:
+        _cache = ResultCache(max_bytes=cache_bytes, db_path=cache_db)
+
+
+def process_record(line_no: int, line: bytes) -> Result:
+    """
+    清洗单条记录（在工作进程中执行）
+
+    Args:
+        line_no: 记录在输入文件中的行号（从1开始）
+        line: 原始 JSONL 行
+
+    Returns:
+        (行号, 输出JSON行, 是否成功)；失败时输出行中记录错误信息而不是抛出异常
+    """
+    try:
+        record = json.loads(line)
+        raw_content = record['params']['input']
+        if _cache is not None:
+            output = cached_build_output(raw_content, _cache)
+        else:
+            output = load_clean_data().build_output(raw_content)
+        return line_no, json.dumps({"line": line_no, "output": output}, ensure_ascii=False), True
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        return line_no, json.dumps({"line": line_no, "error": error}, ensure_ascii=False), False
+
+
+def process_chunk(records: List[Record]) -> List[Result]:
+    """在工作进程中顺序处理一组记录，减少进程间往返次数"""
+    return [process_record(line_no, line) for line_no, line in records]
+
+
+def iter_chunks(input_stream: BinaryIO, chunk_size: int, stats: BatchStats) -> Iterator[List[Record]]:
+    """流式读取输入，跳过空行，按 chunk_size 分组"""
+    chunk: List[Record] = []
+    for line_no, line in enumerate(input_stream, 1):
+        if not line.strip():
+            continue
+        stats.input_bytes += len(line)
+        chunk.append((line_no, line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(input_stream: BinaryIO, output_stream: TextIO, workers: int = 4,
+              ordered: bool = True, max_in_flight: Optional[int] = None,
+              chunk_size: int = 1, executor: Optional[Executor] = None,
+              cache_db: Optional[str] = None, cache_bytes: int = 0,
+              dedup_threshold: Optional[float] = None, image_snapshot: Optional[str] = None) -> BatchStats:
+    """
+    批量清洗 JSONL 记录
+
+    Args:
+        input_stream: 以二进制方式打开的输入 JSONL
+        output_stream: 输出 JSONL 文本流
+        workers: 工作进程数；为0时在当前进程内顺序处理
+        ordered: 是否按输入顺序输出；为 False 时按完成顺序输出
+        max_in_flight: 同时在途的分组数上限，用于限制内存，默认为 workers 的4倍
+        chunk_size: 每个任务包含的记录数
+        executor: 外部提供的执行器，提供时忽略 workers、缓存与索引配置
+        cache_db: 各工作进程共享的 SQLite 缓存路径
+        cache_bytes: 每个工作进程的内存缓存容量（字节）
+        dedup_threshold: 近重复相似度阈值，提供时每个工作进程各自判重
+        image_snapshot: 图片已见索引的快照路径，提供时结果附带 image_status
+
+    Returns:
+        BatchStats: 吞吐统计
+    """
+    stats = BatchStats()
+    chunks = iter_chunks(input_stream, max(1, chunk_size), stats)
+
+    def emit(results: List[Result]) -> None:
+        for _, line, ok in results:
+            output_stream.write(line)
+            output_stream.write('\n')
+            stats.records += 1
+            if not ok:
+                stats.errors += 1
+
+    if executor is None and workers <= 0:
+        init_worker(cache_db, cache_bytes, dedup_threshold, image_snapshot)
+        try:
+            for chunk in chunks:
+                emit(process_chunk(chunk))
+        finally:
+            if dedup_threshold is not None or image_snapshot is not None:
+                sync_indexes()
+                load_clean_data().configure_indexes()
+        stats.finish()
+        return stats
+
+    own_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker,
+            initargs=(cache_db, cache_bytes, dedup_threshold, image_snapshot)
+        )
+    limit = max_in_flight or max(1, workers) * 4
+    try:
+        if ordered:
+            # 有序输出：队首任务完成后才写出，队列长度即在途上限
+            queue: Deque[Future] = deque()
+            for chunk in chunks:
+                if len(queue) >= limit:
+                    emit(queue.popleft().result())
+                queue.append(executor.submit(process_chunk, chunk))
+            while queue:
+                emit(queue.popleft().result())
+        else:
+            # 无序输出：任一任务完成即写出
+            pending: Set[Future] = set()
+            for chunk in chunks:
+                if len(pending) >= limit:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        emit(future.result())
+                pending.add(executor.submit(process_chunk, chunk))
+            for future in wait(pending).done:
+                emit(future.result())
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    stats.finish()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+    """
+    parser = argparse.ArgumentParser(description="批量清洗 JSONL 中的网页内容")
+    parser.add_argument("input", help="输入 JSONL 文件，- 表示标准输入")
+    parser.add_argument("-o", "--output", default="-", help="输出 JSONL 文件，默认标准输出")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="工作进程数，0 表示单进程")
+    parser.add_argument("--unordered", action="store_true", help="按完成顺序输出结果")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="同时在途的任务数上限")
+    parser.add_argument("--chunk-size", type=int, default=1, help="每个任务包含的记录数")
+    parser.add_argument("--cache-db", default=None, help="共享的 SQLite 结果缓存路径")
+    parser.add_argument("--cache-mb", type=int, default=0, help="每个工作进程的内存缓存容量（MB）")
+    parser.add_argument("--dedup", type=float, default=None, metavar="THRESHOLD",
+                        help="近重复相似度阈值（如 0.9），每个工作进程各自判重；启用索引时不使用缓存")
+    parser.add_argument("--image-index", default=None, metavar="SNAPSHOT",
+                        help="图片已见索引的快照路径，结果附带 image_status；启用索引时不使用缓存")
+    args = parser.parse_args(argv)
+
+    input_stream = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(
+            input_stream,
+            output_stream,
+            workers=args.workers,
+            ordered=not args.unordered,
+            max_in_flight=args.max_in_flight,
+            chunk_size=args.chunk_size,
+            cache_db=args.cache_db,
+            cache_bytes=args.cache_mb * 1024 * 1024,
+            dedup_threshold=args.dedup,
+            image_snapshot=args.image_index,
+        )
+    finally:
+        if input_stream is not sys.stdin.buffer:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+清洗流程基准测试
+用可复现的合成网页与OCR数据测量 clean_web_content、extract_and_clean_ocr_data
+与 organize_content_improved 的吞吐、延迟分位数与峰值内存，
+并可保存基线、与基线比较以提前发现性能退化
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import clean_ocr
+from clean_data_loader import load_clean_data
+
+# 合成文本使用的字符
+_FILLER_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研"
+
+# 延迟统计使用的分位
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# 与基线比较时允许的退化比例
+DEFAULT_TOLERANCE = 0.2
+
+
+def _escape_slashes(url: str, depth: int) -> str:
+    """按转义深度把 URL 中的斜杠写成 \\u002F（深度为0时保持原样）"""
+    if depth <= 0:
+        return url
+    return url.replace('/', '\\' * depth + 'u002F')
+
+
+def _escaped_img_tag(url: str, depth: int) -> str:
+    """按转义深度写出 img 标签，形如 NUXT 状态中的 \\u003Cimg src=\\"https:\\u002F\\u002F...\\"\\u003E"""
+    escape = '\\' * depth
+    return f'{escape}u003Cimg src={escape}"{_escape_slashes(url, depth)}{escape}"{escape}u003E'
+
+
+def _filler(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice(_FILLER_CHARS) for _ in range(length))
+
+
+def generate_page(size: int, nuxt_size: int = 0, image_density: float = 1.0,
+                  escape_depth: int = 0, missing_anchor: bool = False, seed: int = 0) -> str:
+    """
+    生成一张合成的爬虫页面
+
+    Args:
+        size: 目标大小（字符数，约等于字节数的三分之一到一倍）
+        nuxt_size: NUXT 载荷中 contentHtml 的长度，为0时不生成载荷
+        image_density: 每 KB 页面中的图片URL数
+        escape_depth: 转义 img 标签的转义深度，为0时改为直接出现的图片URL
+        missing_anchor: 是否省略正文结束锚点（测试锚点缺失的最坏情况）
+        seed: 随机种子，相同参数与种子生成相同的页面
+
+    Returns:
+        合成页面
+    """
+    rng = random.Random(seed)
+    parts: List[str] = ['<html><head><title>基准页面</title></head><body>']
+    parts.append('<h1>如何看待合成页面的清洗性能？</h1>')
+    parts.append('<div class="content"><p>内容仅供娱乐')
+
+    if nuxt_size > 0:
+        html = '<p>内容仅供娱乐 ' + _filler(rng, nuxt_size) + '（文章来源：合成）</p>'
+        html = html.replace('"', '\\"')
+        parts.append(
+            '<script>window.__NUXT__=(function(a,b){a.title=b;a.author="SYSTEM";'
+            f'a.contentHtml="{html}";return {{}}}}({{}},"如何看待合成页面？"));</script>'
+        )
+
+    written = sum(len(part) for part in parts)
+    index = 0
+    while written < size:
+        paragraph = '<p>' + _filler(rng, rng.randint(40, 200)) + '</p>\n'
+        # 按密度插入图片：img 标签与转义的 img 标签（深度为0时为直接出现的 URL）交替出现
+        if rng.random() < image_density * len(paragraph) / 1024:
+            url = f'https://img.example.com/{index // 100}/{index}.jpg'
+            if index % 2:
+                paragraph += f'<img src="{url}" alt="图{index}">\n'
+            elif escape_depth > 0:
+                paragraph += _escaped_img_tag(url, escape_depth) + '\n'
+            else:
+                paragraph += f'"{url}",\n'
+            index += 1
+        parts.append(paragraph)
+        written += len(paragraph)
+
+    if not missing_anchor:
+        parts.append('（文章来源：合成）')
+    parts.append('</p></div></body></html>')
+    return ''.join(parts)
+
+
+def generate_ocr_payload(words: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成合成的OCR识别结果
+
+    Args:
+        words: words 数组的长度
+        seed: 随机种子
+
+    Returns:
+        与百度OCR接口结构相同的 JSON 数据
+    """
+    rng = random.Random(seed)
+    items = [{"text": "东方财富", "lang": "auto"}, {"text": "权威·专业·及时·互动", "lang": "auto"},
+             {"text": "2024年A股年度盘点(6)", "lang": "auto"}, {"text": "年初1万元入市", "lang": "auto"},
+             {"text": "连续买入月度\"涨幅王\"1万变114亿", "lang": "auto"}]
+    for i in range(max(0, words - len(items) - 1)):
+        name = _filler(rng, rng.randint(2, 4))
+        kind = rng.random()
+        if kind < 0.4:
+            text = f"{name}{rng.randint(50, 400)}%{rng.randint(1, 99999)}"
+        elif kind < 0.8:
+            text = f"{name}-{rng.uniform(10, 70):.2f}% {rng.uniform(1, 9999):.2f}"
+        else:
+            text = _filler(rng, rng.randint(5, 30))
+        items.append({"text": text, "lang": "auto"})
+    items.append({"text": "数据来源:东方财富Choice数据", "lang": "auto"})
+    return {"log_id": "benchmark", "msg": "success", "code": 0, "data": {"results": [{"words": items}]}}
+
+
+class BenchResult(NamedTuple):
+    """单项基准测试结果"""
+    name: str
+    docs: int
+    input_bytes: int
+    seconds: float
+    latencies: List[float]
+    peak_memory: int
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.docs / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.input_bytes / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {
+            "docs": self.docs,
+            "input_bytes": self.input_bytes,
+            "docs_per_second": round(self.docs_per_second, 3),
+            "mb_per_second": round(self.mb_per_second, 3),
+            "peak_memory": self.peak_memory,
+        }
+        for q in PERCENTILES:
+            summary[f"p{round(q * 100)}_ms"] = round(self.percentile(q) * 1000, 3)
+        return summary
+
+
+def run_benchmark(name: str, func: Callable[[Any], Any], inputs: List[Any],
+                  input_bytes: int, repeat: int = 3) -> BenchResult:
+    """
+    测量一个函数在一组输入上的吞吐、延迟与峰值内存
+
+    延迟与吞吐在未开启 tracemalloc 时测量；峰值内存单独对每个输入跑一遍。
+
+    Args:
+        name: 测试名
+        func: 被测函数，接受单个输入
+        inputs: 输入列表
+        input_bytes: 一轮输入的总字节数
+        repeat: 重复轮数
+
+    Returns:
+        BenchResult: 测试结果
+    """
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t0)
+    seconds = time.perf_counter() - started
+
+    peak = 0
+    for item in inputs:
+        tracemalloc.start()
+        try:
+            func(item)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    return BenchResult(name, len(inputs) * repeat, input_bytes * repeat, seconds, latencies, peak)
+
+
+def _utf8_size(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+
+def default_suite(scale: float = 1.0) -> Dict[str, Callable[[], BenchResult]]:
+    """
+    默认测试集
+
+    Args:
+        scale: 页面大小与OCR词数的缩放系数（如 0.1 用于快速检查，10 可覆盖 50 MB 级页面）
+
+    Returns:
+        测试名到测试函数的映射
+    """
+    clean_data = load_clean_data()
+
+    def web(name: str, sizes: List[int], **options: Any) -> Callable[[], BenchResult]:
+        def bench() -> BenchResult:
+            pages = [generate_page(max(1024, int(size * scale)), seed=i, **options)
+                     for i, size in enumerate(sizes)]
+            return run_benchmark(name, clean_data.clean_web_content, pages,
+                                 sum(_utf8_size(page) for page in pages))
+        return bench
+
+    def ocr(name: str, func: Callable[[Any], Any], prepare: Callable[[Dict[str, Any]], Any]
+            ) -> Callable[[], BenchResult]:
+        def bench() -> BenchResult:
+            payloads = [generate_ocr_payload(max(10, int(3000 * scale)), seed=i) for i in range(5)]
+            inputs = [prepare(payload) for payload in payloads]
+            size = sum(_utf8_size(json.dumps(payload, ensure_ascii=False)) for payload in payloads)
+            return run_benchmark(name, func, inputs, size)
+        return bench
+
+    def organize_inputs(payload: Dict[str, Any]) -> Any:
+        segments = [word["text"] for word in payload["data"]["results"][0]["words"]]
+        gainers = [clean_ocr.clean_stock_data(s) for s in segments if '%' in s and '-' not in s]
+        losers = [clean_ocr.clean_stock_data(s) for s in segments if '%' in s and '-' in s]
+        other = [clean_ocr.clean_text_segment(s) for s in segments if '%' not in s]
+        return other, gainers, losers
+
+    return {
+        "web_small": web("web_small", [10_000] * 20),
+        "web_large": web("web_large", [1_000_000, 5_000_000]),
+        "web_nuxt": web("web_nuxt", [200_000] * 5, nuxt_size=50_000),
+        "web_escaped": web("web_escaped", [200_000] * 5, image_density=8.0, escape_depth=3),
+        "web_missing_anchor": web("web_missing_anchor", [1_000_000], missing_anchor=True),
+        "ocr_extract": ocr("ocr_extract", clean_ocr.extract_and_clean_ocr_data, lambda payload: payload),
+        "ocr_organize": ocr("ocr_organize", lambda args: clean_ocr.organize_content_improved(*args),
+                            organize_inputs),
+    }
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    与基线比较，列出吞吐下降或 p99 延迟、峰值内存上升超过容差的项
+
+    Args:
+        results: 本次结果（测试名 -> as_dict()）
+        baseline: 基线结果
+        tolerance: 允许的退化比例
+
+    Returns:
+        退化描述列表，为空表示没有退化
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["mb_per_second"] < previous["mb_per_second"] * (1 - tolerance):
+            regressions.append(f"{name}: 吞吐 {previous['mb_per_second']} -> {current['mb_per_second']} MB/s")
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {previous['p99_ms']} -> {current['p99_ms']} ms")
+        if current["peak_memory"] > previous["peak_memory"] * (1 + tolerance):
+            regressions.append(f"{name}: 峰值内存 {previous['peak_memory']} -> {current['peak_memory']} B")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+    """
+    parser = argparse.ArgumentParser(description="清洗流程基准测试")
+    parser.add_argument("-k", "--only", action="append", default=None, help="只运行指定的测试（可重复）")
+    parser.add_argument("--scale", type=float, default=1.0, help="输入大小缩放系数")
+    parser.add_argument("--save", default=None, help="把结果保存为基线 JSON")
+    parser.add_argument("--compare", default=None, help="与基线 JSON 比较，有退化时返回1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的退化比例")
+    args = parser.parse_args(argv)
+
+    suite = default_suite(args.scale)
+    names = args.only or list(suite)
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        result = suite[name]()
+        results[name] = result.as_dict()
+        print(f"⏱️ {name}: {result.docs_per_second:.1f} docs/s，{result.mb_per_second:.2f} MB/s，"
+              f"p50 {results[name]['p50_ms']} ms，p99 {results[name]['p99_ms']} ms，"
+              f"峰值内存 {result.peak_memory / 1e6:.1f} MB")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 基线已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return 1
+        print("✅ 未发现性能退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
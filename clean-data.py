@@ -1,11 +1,28 @@
+import asyncio
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import random
 import re
-from typing import Dict, List, Union, TypedDict
+import sys
+import time
+import types
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import (Any, AsyncIterable, AsyncIterator, Callable, Dict, FrozenSet, Iterable, List,
+                    NamedTuple, Optional, Tuple, Union, TypedDict)
+from urllib.parse import urlsplit
 
 # 定义类型
 class Args(TypedDict):
     params: Dict[str, str]
 
-class Output(TypedDict):
+class _OutputExtras(TypedDict, total=False):
+    image_status: List[str]  # 提供图片已见索引时：与 image_urls 对应的 "new" / "seen"
+
+class Output(_OutputExtras):
     title: str
     content: str
     image_urls: List[str]
@@ -13,136 +30,1203 @@ class Output(TypedDict):
     word_count: int
     extract_status: str
 
-def clean_web_content(raw_content: str) -> Dict[str, Union[str, List[str]]]:
+# main 与 main_batch 使用的执行器；None 表示事件循环默认的线程池
+_executor: Optional[Executor] = None
+
+# 进程级的近重复索引与图片已见索引，由 configure_indexes 配置；
+# build_output 未显式传入索引时使用（main、main_batch 与批处理、常驻服务均经由 build_output）
+_dedup_index: Optional[Any] = None
+_image_index: Optional[Any] = None
+
+# 线性时间模式下单个记号（标签、URL）的最大长度与转义反斜杠的最大层数
+_MAX_TOKEN_LENGTH = 2048
+_MAX_ESCAPE_RUN = 16
+
+# 扫描循环中每隔多少次匹配检查一次时限（须为2的幂减1）
+_CHECK_MASK = 255
+
+# 阶段埋点回调：hook(阶段名, 耗时秒数, 输入大小, 输出大小, 计数)
+StageHook = Callable[[str, float, int, int, Optional[Dict[str, int]]], None]
+
+# 当前的埋点回调与采样率；回调为 None 时各阶段只多一次判断
+_stage_hook: Optional[StageHook] = None
+_stage_sample_rate = 1.0
+
+def set_stage_hook(hook: Optional[StageHook], sample_rate: float = 1.0) -> None:
+    """
+    设置 clean_web_content 的阶段埋点回调
+    
+    Args:
+        hook: 回调函数，None 表示关闭埋点
+        sample_rate: 采样率，按调用采样（0~1）
+    """
+    global _stage_hook, _stage_sample_rate
+    _stage_hook = hook
+    _stage_sample_rate = sample_rate
+
+def _active_hook() -> Optional[StageHook]:
+    """返回本次调用使用的埋点回调，未开启或未被采样时返回 None"""
+    hook = _stage_hook
+    if hook is None or (_stage_sample_rate < 1.0 and random.random() >= _stage_sample_rate):
+        return None
+    return hook
+
+def _report_stage(hook: StageHook, stage: str, started: float, input_size: int, output_size: int,
+                  counts: Optional[Dict[str, int]] = None) -> float:
+    """上报一个阶段并返回当前时间，作为下一阶段的起点"""
+    now = time.perf_counter()
+    hook(stage, now - started, input_size, output_size, counts)
+    return now
+
+class StageTimeout(Exception):
+    """清洗阶段超出时间预算"""
+    
+    def __init__(self, stage: str, partial: Any = None) -> None:
+        super().__init__(f"阶段 {stage} 超出时间预算")
+        self.stage = stage
+        self.partial = partial  # 超时前已得到的部分结果
+
+class TimeBudget:
+    """
+    单次调用的时间预算，支持整体期限与分阶段期限
+    
+    各扫描循环每隔若干次匹配调用 expired() 检查，开销可以忽略。
+    """
+    __slots__ = ('_deadline', '_stage_budgets', 'stage', '_stage_deadline')
+    
+    def __init__(self, total: Optional[float] = None,
+                 stage_budgets: Optional[Dict[str, float]] = None) -> None:
+        """
+        Args:
+            total: 整体预算（秒），None 表示不限
+            stage_budgets: 各阶段预算（秒），阶段名为 nuxt / normalize / extract / images
+        """
+        now = time.perf_counter()
+        self._deadline = now + total if total is not None else float('inf')
+        self._stage_budgets = stage_budgets or {}
+        self.stage = ''
+        self._stage_deadline = self._deadline
+    
+    def enter(self, stage: str) -> None:
+        """进入新阶段，超出预算时抛出 StageTimeout"""
+        self.stage = stage
+        stage_budget = self._stage_budgets.get(stage)
+        self._stage_deadline = self._deadline
+        if stage_budget is not None:
+            self._stage_deadline = min(self._deadline, time.perf_counter() + stage_budget)
+        self.check()
+    
+    def expired(self) -> bool:
+        return time.perf_counter() >= self._stage_deadline
+    
+    def check(self, partial: Any = None) -> None:
+        if self.expired():
+            raise StageTimeout(self.stage, partial)
+
+# 支持的图片扩展名
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+
+def _image_scan_source(linear_time: bool, byte_level: bool = False) -> str:
+    """
+    单遍图片URL扫描器的正则源码
+    
+    三个模式各放在一个前瞻分组里，在每个可能的起点一次性求出各模式是否匹配及匹配范围；
+    调用方按各模式自己的 findall 语义（从上次匹配的终点继续）取用：
+    
+    1. <img ... src="..."> 标签与 2. 直接出现的URL：作用于把 \\u002F、\\u0022 解码后的内容
+       （这里在原始内容上以等价的写法匹配）；
+    3. 转义的 <img ... src="..."> 标签：< 写作任意层反斜杠的 \\u003C，引号与地址中的字符
+       同样可以任意层转义（NUXT 载荷中的 contentHtml 即为这种写法）。
+    
+    Args:
+        linear_time: 是否限制各不定长部分的长度（保证线性时间）
+        byte_level: 是否用于扫描 UTF-8 字节（此时 \\s 补上其余 Unicode 空白的编码）
+    """
+    repeat = '{0,%d}' % _MAX_TOKEN_LENGTH if linear_time else '*'
+    # 任意层反斜杠（线性时间版本限制层数）
+    escape = r'\\{1,%d}' % _MAX_ESCAPE_RUN if linear_time else r'\\+'
+    not_space = _UTF8_EXTRA_SPACE if byte_level else ''
+    quote = r'(?:["\']|\\u0022)'  # 解码后的 ["']
+    not_quote = r'(?:[^"\'\\]|\\(?!u0022))'  # 解码后的 [^"']
+    url_char = rf'(?:{not_space}[^"\'\s\\]|\\(?!u0022))'  # 解码后的 [^"'\s]
+    slash = r'(?:/|\\u002F)'  # 解码后的 /
+    extension = r'\.(?:jpg|jpeg|png|gif|webp|bmp)'
+    # 转义标签：标签内除 > 与转义的 > 之外的字符、转义的引号、地址中的字符
+    escaped_tag_char = rf'(?:[^>\\]|{escape}(?![\\]|u003[eE]))'
+    escaped_quote = rf'(?:{escape}(?:u0022|["\'])|["\'])'
+    escaped_url_char = rf'(?:{not_space}[^"\'\s\\]|{escape}u(?!0022)[0-9a-fA-F]{{4}})'
+    escaped_start = rf'(?<!\\){escape}(?i:u003cimg)'
+    branches = (
+        # 1. <img ... src="..."> 标签（分组1为整个标签，分组2为地址）
+        rf'((?i:<img)[^>]{repeat}(?i:src=){quote}({not_quote}{repeat}){quote}[^>]{repeat}>)',
+        # 2. 直接出现的URL
+        rf'((?i:https?):{slash}{slash}{url_char}{repeat}(?i:{extension}))',
+        # 3. 转义的 <img ... src="..."> 标签（分组4为标签开头到地址的结束引号，分组5为地址）
+        rf'({escaped_start}{escaped_tag_char}{repeat}(?i:src=){escaped_quote}'
+        rf'((?i:https?):{escaped_url_char}{repeat}){escaped_quote})',
+    )
+    # 先以首字符集合快速跳过，再确认各模式可能的起点
+    prefilter = rf'(?=[<hH\\])(?:(?={escaped_start})|(?=(?i:<img|http)))'
+    return prefilter + ''.join(f'(?={branch})?' for branch in branches)
+
+# str 的 \s 额外包含的空白（\x1c~\x1f 与 Unicode 空白）在 UTF-8 中的编码
+_UTF8_EXTRA_SPACE = (r'(?![\x1c-\x1f]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]'
+                     r'|\xe2\x81\x9f|\xe3\x80\x80)')
+
+# 单遍图片URL扫描器（预编译）
+_IMAGE_SCAN_RE = re.compile(_image_scan_source(False))
+
+# 线性时间版本：各不定长部分限制长度，单个起点的工作量有上界，
+# 未闭合的 <img 或超长的无扩展名URL不会导致回溯扫描到文末
+_IMAGE_SCAN_LINEAR_RE = re.compile(_image_scan_source(True))
+
+# 各模式：(计数名, 地址的解码方式, 匹配范围分组, 地址分组)，按合并顺序排列
+_IMAGE_PATTERNS: Tuple[Tuple[str, Callable[[str], str], int, int], ...] = (
+    ('img_tag', lambda url: url.replace('\\u002F', '/'), 1, 2),
+    ('url', lambda url: url.replace('\\u002F', '/'), 3, 3),
+    ('img_tag_escaped', lambda url: _UNICODE_ESCAPE_RE.sub(lambda m: _decode_escape(m.group(1)), url), 4, 5),
+)
+
+# 单遍扫描的结果：各模式按首次出现顺序去重后的地址（未过滤）
+ImageScan = List[List[str]]
+
+def _is_image_url(url: str) -> bool:
+    """判断URL是否为有效的图片地址"""
+    if not url.startswith('http'):
+        return False
+    lower_url = url.lower()
+    return any(ext in lower_url for ext in IMAGE_EXTENSIONS)
+
+def merge_image_urls(scans: Iterable[ImageScan]) -> List[str]:
+    """
+    合并若干段的扫描结果：依次取各模式在各段的地址，按首次出现顺序去重并过滤
+    
+    Args:
+        scans: 按顺序排列的各段扫描结果
+        
+    Returns:
+        list: 与整体扫描一次相同的图片URL列表
+    """
+    scans = list(scans)
+    unique_image_urls: Dict[str, None] = {}
+    for index in range(len(_IMAGE_PATTERNS)):
+        for scan in scans:
+            for url in scan[index]:
+                if url and url not in unique_image_urls and _is_image_url(url):
+                    unique_image_urls[url] = None
+    return list(unique_image_urls)
+
+def _collect_image_matches(matches: Iterable[Any], budget: Optional[TimeBudget] = None,
+                           counts: Optional[Dict[str, int]] = None,
+                           decode: Optional[Callable[[Any], str]] = None) -> ImageScan:
+    """
+    按各模式的 findall 语义收集扫描器的匹配
+    
+    Args:
+        matches: 扫描器（或其字节版本）的 finditer 结果
+        budget: 时间预算，超时抛出 StageTimeout（partial 为已提取的URL）
+        counts: 若提供，则按模式累计匹配数
+        decode: 把匹配到的字节解码为 str（扫描 str 时为 None）
+    """
+    buckets: List[Dict[str, None]] = [{} for _ in _IMAGE_PATTERNS]
+    resume = [0] * len(_IMAGE_PATTERNS)
+    for count, match in enumerate(matches):
+        if budget is not None and not count & _CHECK_MASK and budget.expired():
+            raise StageTimeout(budget.stage, merge_image_urls([[list(bucket) for bucket in buckets]]))
+        pos = match.start()
+        for index, (name, decode_url, span_group, url_group) in enumerate(_IMAGE_PATTERNS):
+            end = match.end(span_group)
+            # 与该模式上一次匹配重叠的起点，findall 不会尝试
+            if end < 0 or pos < resume[index]:
+                continue
+            resume[index] = end
+            if counts is not None:
+                counts[name] = counts.get(name, 0) + 1
+            url = match.group(url_group)
+            if decode is not None:
+                url = decode(url)
+            buckets[index][decode_url(url)] = None
+    return [list(bucket) for bucket in buckets]
+
+def scan_image_patterns(raw_content: str, linear_time: bool = False,
+                        budget: Optional[TimeBudget] = None,
+                        counts: Optional[Dict[str, int]] = None) -> ImageScan:
+    """
+    单遍扫描原始内容，按模式分别收集图片URL（供分段处理后用 merge_image_urls 合并）
+    
+    Args:
+        raw_content: 原始爬虫内容
+        linear_time: 是否使用保证线性时间的有界模式
+        budget: 时间预算，超时抛出 StageTimeout（partial 为已提取的URL）
+        counts: 若提供，则按模式累计匹配数（img_tag、url、img_tag_escaped）
+        
+    Returns:
+        list: 各模式按首次出现顺序去重后的地址
+    """
+    pattern = _IMAGE_SCAN_LINEAR_RE if linear_time else _IMAGE_SCAN_RE
+    return _collect_image_matches(pattern.finditer(raw_content), budget, counts)
+
+def extract_image_urls(raw_content: str, linear_time: bool = False,
+                       budget: Optional[TimeBudget] = None,
+                       counts: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    单遍扫描原始内容，提取图片URL
+    
+    img 标签、直接出现的URL与任意转义层数的 img 标签中的地址依次合并，按首次出现顺序去重。
+    
+    Args:
+        raw_content: 原始爬虫内容
+        linear_time: 是否使用保证线性时间的有界模式
+        budget: 时间预算，超时抛出 StageTimeout（partial 为已提取的URL）
+        counts: 若提供，则按模式累计匹配数（img_tag、url、img_tag_escaped）
+        
+    Returns:
+        list: 去重后的图片URL列表
+    """
+    return merge_image_urls([scan_image_patterns(raw_content, linear_time, budget, counts)])
+
+# NUXT 状态脚本的起始标记
+_NUXT_MARKER = 'window.__NUXT__='
+
+# NUXT 载荷开头：(function(a,b,...){
+_NUXT_HEAD_RE = re.compile(r'\(?\s*function\s*\(([^)]*)\)\s*\{')
+
+# 函数体结束后进入实参列表：})(... 或 }(...
+_NUXT_CALL_RE = re.compile(r'\s*\)?\s*\(')
+
+# JS 扫描关心的记号：引号与括号、逗号、分号；字符串内部只关心引号
+_JS_TOKEN_RE = re.compile(r'["\'()\[\]{},;]')
+_JS_QUOTE_RE = re.compile(r'["\']')
+
+# 字符串字面量紧前的属性赋值：i.contentHtml=
+_ASSIGN_STRING_RE = re.compile(r'([A-Za-z_$][\w$]*)\.([A-Za-z_$][\w$]*)=$')
+
+# 以形参引用赋值的属性：i.title=c
+_ASSIGN_IDENT_RE = re.compile(r'([A-Za-z_$][\w$]*)\.([A-Za-z_$][\w$]*)=([A-Za-z_$][\w$]*)(?![\w$.(\[])')
+
+# JS 字符串转义
+_JS_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|[\s\S])')
+_JS_SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+
+class NuxtPayload(NamedTuple):
+    """window.__NUXT__ 载荷的结构化解析结果"""
+    start: int                # 载荷在原文中的起始位置
+    end: int                  # 载荷结束位置（含结尾分号）
+    title: str
+    author: str
+    url: str
+    content_html: str
+    image_urls: List[str]
+
+def _js_unescape(text: str) -> str:
+    """解码一层JS字符串转义"""
+    if '\\' not in text:
+        return text
+    
+    def replace(match: 're.Match[str]') -> str:
+        escape = match.group(1)
+        if len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        return _JS_SIMPLE_ESCAPES.get(escape, escape)
+    
+    return _JS_ESCAPE_RE.sub(replace, text)
+
+def _skip_js(raw: str, pos: int, quote_width: int, stops: str,
+             strings: Optional[List[Tuple[int, int]]] = None,
+             budget: Optional[TimeBudget] = None) -> int:
+    """
+    线性扫描JS代码，跳过字符串字面量，返回顶层第一个 stops 字符的位置
+    
+    quote_width 为当前转义深度下一个双引号定界符的长度：未转义页面为1（"），
+    整页被转义一次时为2（\\"），以此类推。字符串内的引号只有在其前面的
+    反斜杠在原始深度下为偶数个时才视为结束。
+    
+    Args:
+        raw: 原始内容
+        pos: 起始位置
+        quote_width: 双引号定界符长度
+        stops: 需要停下的字符集合
+        strings: 若提供，则记录扫描过的字符串字面量区间
+        budget: 时间预算，超时抛出 StageTimeout
+        
+    Returns:
+        int: 停止位置，未找到时返回 -1
+    """
+    depth = 0
+    in_string = None
+    string_start = 0
+    pattern = _JS_TOKEN_RE
+    count = 0
+    while True:
+        count += 1
+        if budget is not None and not count & _CHECK_MASK:
+            budget.check()
+        match = pattern.search(raw, pos)
+        if match is None:
+            return -1
+        pos = match.end()
+        char = match.group()
+        if char in '"\'':
+            # 统计引号前的反斜杠数
+            run = 0
+            while pos - run - 2 >= 0 and raw[pos - run - 2] == '\\':
+                run += 1
+            pad = quote_width - 1 if char == '"' else 0
+            if run % quote_width != pad:
+                continue
+            if in_string is None:
+                in_string = char
+                string_start = pos - pad - 1
+                pattern = _JS_QUOTE_RE
+            elif char == in_string and (run // quote_width) % 2 == 0:
+                in_string = None
+                pattern = _JS_TOKEN_RE
+                if strings is not None:
+                    strings.append((string_start, pos))
+            continue
+        # 载荷外层的括号会使深度变为负数，同样视为到达顶层
+        if depth <= 0 and char in stops:
+            return match.start()
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+
+def _decode_js_literal(raw: str, start: int, end: int, quote_width: int) -> str:
+    """解码 raw[start:end] 处的字符串字面量（含定界符）"""
+    delimiter = quote_width if raw[end - 1] == '"' else 1
+    text = raw[start + delimiter:end - delimiter]
+    # 先逐层去除整页转义，再解码字面量自身的转义
+    level = quote_width.bit_length() - 1
+    for _ in range(level + 1):
+        text = _js_unescape(text)
+    return text
+
+def _decode_js_value(raw: str, start: int, end: int, quote_width: int) -> Optional[str]:
+    """解码一个实参表达式，只保留字符串与数字"""
+    while start < end and raw[start].isspace():
+        start += 1
+    while end > start and raw[end - 1].isspace():
+        end -= 1
+    if start >= end:
+        return None
+    if raw[end - 1] in '"\'':
+        return _decode_js_literal(raw, start, end, quote_width)
+    value = raw[start:end]
+    if value[0].isdigit() or (value[0] == '-' and value[1:2].isdigit()):
+        return value
+    return None
+
+def parse_nuxt_payload(raw_content: str, linear_time: bool = False,
+                       budget: Optional[TimeBudget] = None) -> Optional[NuxtPayload]:
+    """
+    解析 window.__NUXT__=(function(a,b,...){...}(...)); 载荷
+    
+    用理解字符串字面量与转义的状态机线性扫描载荷，定位其结束位置，
+    并从函数体的属性赋值和调用实参中直接取出标题、作者、地址、正文HTML与图片列表。
+    
+    Args:
+        raw_content: 原始爬虫内容
+        linear_time: 提取正文图片时是否使用线性时间模式
+        budget: 时间预算，超时抛出 StageTimeout
+        
+    Returns:
+        NuxtPayload: 解析结果；页面不含 NUXT 载荷时返回 None
+    """
+    marker = raw_content.find(_NUXT_MARKER)
+    if marker < 0:
+        return None
+    start = marker
+    pos = marker + len(_NUXT_MARKER)
+    
+    # 以第一个双引号前的反斜杠数确定整页的转义深度
+    quote = raw_content.find('"', pos)
+    run = 0
+    while quote - run - 1 >= pos and raw_content[quote - run - 1] == '\\':
+        run += 1
+    quote_width = run + 1 if quote >= 0 else 1
+    
+    fields: Dict[Tuple[str, str], Tuple[str, int, int]] = {}
+    arguments: Dict[str, Tuple[int, int]] = {}
+    head = _NUXT_HEAD_RE.match(raw_content, pos)
+    if head is not None:
+        # 函数体：记录其中的字符串字面量，以便取出属性赋值
+        strings: List[Tuple[int, int]] = []
+        body_start = head.end()
+        body_end = _skip_js(raw_content, body_start, quote_width, '}', strings, budget)
+        if body_end >= 0:
+            code_start = body_start
+            for string_start, string_end in strings + [(body_end, body_end)]:
+                for match in _ASSIGN_IDENT_RE.finditer(raw_content, code_start, string_start):
+                    fields[(match.group(1), match.group(2))] = ('name', match.start(3), match.end(3))
+                match = _ASSIGN_STRING_RE.search(raw_content, code_start, string_start)
+                if match is not None and string_start < body_end:
+                    fields[(match.group(1), match.group(2))] = ('literal', string_start, string_end)
+                code_start = string_end
+            pos = body_end + 1
+            
+            # 调用实参：按深度为0的逗号切分，与形参一一对应
+            call = _NUXT_CALL_RE.match(raw_content, pos)
+            if call is not None:
+                names = [name.strip() for name in head.group(1).split(',')]
+                pos = call.end()
+                for name in names:
+                    stop = _skip_js(raw_content, pos, quote_width, ',)', budget=budget)
+                    if stop < 0:
+                        break
+                    arguments[name] = (pos, stop)
+                    pos = stop + 1
+                    if raw_content[stop] == ')':
+                        break
+    
+    # 载荷在深度为0的分号处结束；缺少分号时视为延伸到文末
+    stop = _skip_js(raw_content, pos, quote_width, ';', budget=budget)
+    end = stop + 1 if stop >= 0 else len(raw_content)
+    
+    def resolve(obj: str, prop: str) -> str:
+        field = fields.get((obj, prop))
+        if field is None:
+            return ""
+        kind, value_start, value_end = field
+        if kind == 'literal':
+            return _decode_js_literal(raw_content, value_start, value_end, quote_width)
+        span = arguments.get(raw_content[value_start:value_end])
+        if span is None:
+            return ""
+        return _decode_js_value(raw_content, span[0], span[1], quote_width) or ""
+    
+    # 文章对象为带有 contentHtml 的那个对象
+    article = next((obj for obj, prop in fields if prop == 'contentHtml'), None)
+    if article is None:
+        return NuxtPayload(start, end, "", "", "", "", [])
+    content_html = resolve(article, 'contentHtml')
+    return NuxtPayload(
+        start=start,
+        end=end,
+        title=resolve(article, 'title'),
+        author=resolve(article, 'author'),
+        url=resolve(article, 'url') or resolve(article, 'pcUrl'),
+        content_html=content_html,
+        image_urls=extract_image_urls(content_html, linear_time, budget),
+    )
+
+# 单遍规范化记号：HTML标签 | 任意深度的 \uXXXX 转义 | 空白
+# 开头的前瞻字符集让正则引擎可以快速跳过普通文本
+_NORMALIZE_RE = re.compile(r'(?=[<\\\s])(?:(<[^>]+>)|\\+u([0-9a-fA-F]{4})|(\s+))')
+
+# 线性时间版本：标签内不允许再出现 <，长度与转义层数有上界，
+# 大量未闭合的 < 或长串反斜杠不会造成反复扫描到文末
+_NORMALIZE_LINEAR_RE = re.compile(
+    r'(?=[<\\\s])(?:(<[^<>]{1,%d}>)|\\{1,%d}u([0-9a-fA-F]{4})|(\s+))'
+    % (_MAX_TOKEN_LENGTH, _MAX_ESCAPE_RUN)
+)
+
+# 任意深度的 \uXXXX 转义（用于标签内部）
+_UNICODE_ESCAPE_RE = re.compile(r'\\+u([0-9a-fA-F]{4})')
+
+# 转义解码表，首次遇到时填充
+_ESCAPE_TABLE: Dict[str, str] = {
+    '003C': '<', '003E': '>', '002F': '/', '0022': '"', '003D': '=', '0026': '&',
+}
+
+class NormalizedPage(NamedTuple):
+    """单遍规范化的两种视图"""
+    text: str                 # 去标签、解码、合并空白后的文本
+    decoded: Optional[str]    # 仅解码转义、保留标签与空白的原文
+
+def _decode_escape(code: str) -> str:
+    """查表解码 \\uXXXX 中的十六进制码"""
+    char = _ESCAPE_TABLE.get(code)
+    if char is None:
+        char = _ESCAPE_TABLE[code] = chr(int(code, 16))
+    return char
+
+def normalize_page(raw_content: str, spans: Optional[List[Tuple[int, int]]] = None,
+                   keep_decoded: bool = False, linear_time: bool = False,
+                   budget: Optional[TimeBudget] = None) -> NormalizedPage:
+    """
+    一次线性扫描完成去标签、转义解码与空白合并
+    
+    Args:
+        raw_content: 原始内容
+        spans: 需要处理的区间列表，默认处理全文（用于跳过 NUXT 载荷而不拼接副本）
+        keep_decoded: 是否同时生成保留标签与空白的解码视图
+        linear_time: 是否使用保证线性时间的有界模式
+        budget: 时间预算，超时抛出 StageTimeout（partial 为已生成的文本）
+        
+    Returns:
+        NormalizedPage: 文本视图与（可选的）解码视图
+    """
+    # 直接写入 StringIO，避免保留大量中间切片，也不会为每一步生成整页副本
+    text_out = io.StringIO()
+    write_text = text_out.write
+    decoded_out = io.StringIO() if keep_decoded else None
+    write_decoded = decoded_out.write if decoded_out is not None else None
+    # 是否有待输出的空格；开头的空白直接丢弃，结尾的空白在结束时丢弃
+    pending_space = False
+    has_text = False
+    pattern = _NORMALIZE_LINEAR_RE if linear_time else _NORMALIZE_RE
+    count = 0
+    
+    for span_start, span_end in spans or [(0, len(raw_content))]:
+        pos = span_start
+        for match in pattern.finditer(raw_content, span_start, span_end):
+            count += 1
+            if budget is not None and not count & _CHECK_MASK and budget.expired():
+                raise StageTimeout(budget.stage, text_out.getvalue())
+            start = match.start()
+            if start > pos:
+                piece = raw_content[pos:start]
+                if pending_space:
+                    write_text(' ')
+                    pending_space = False
+                write_text(piece)
+                if write_decoded is not None:
+                    write_decoded(piece)
+                has_text = True
+            pos = match.end()
+            
+            tag, code, whitespace = match.groups()
+            if tag is not None:
+                # 标签：文本视图中删除
+                if write_decoded is not None:
+                    write_decoded(
+                        _UNICODE_ESCAPE_RE.sub(lambda m: _decode_escape(m.group(1)), tag)
+                        if '\\' in tag else tag
+                    )
+            elif code is not None:
+                char = _decode_escape(code)
+                if write_decoded is not None:
+                    write_decoded(char)
+                if char.isspace():
+                    pending_space = has_text
+                else:
+                    if pending_space:
+                        write_text(' ')
+                        pending_space = False
+                    write_text(char)
+                    has_text = True
+            else:
+                if write_decoded is not None:
+                    write_decoded(whitespace)
+                pending_space = has_text
+        
+        if span_end > pos:
+            piece = raw_content[pos:span_end]
+            if pending_space:
+                write_text(' ')
+                pending_space = False
+            write_text(piece)
+            if write_decoded is not None:
+                write_decoded(piece)
+            has_text = True
+    
+    return NormalizedPage(
+        text=text_out.getvalue(),
+        decoded=decoded_out.getvalue() if decoded_out is not None else None,
+    )
+
+# 抽取规则配置文件（与本文件同目录，不存在时使用内置默认规则）
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extraction_rules.json')
+
+# 内置默认规则：东方财富"内容仅供娱乐"类文章
+_DEFAULT_RULES: Dict[str, Any] = {
+    "default": "eastmoney",
+    "rule_sets": [
+        {
+            "name": "eastmoney",
+            "domains": [],
+            "title": {"start": ["如何"], "end": ["？"]},
+            "body": {"start": ["内容仅供娱乐"], "end": ["（文章来源", "）"]},
+            "noise": [],
+        }
+    ],
+}
+
+class _AnchorField:
+    """一个抽取字段的锚点：任一起始锚点之后，依次出现全部结束锚点"""
+    __slots__ = ('starts', 'ends')
+    
+    def __init__(self, spec: Dict[str, List[str]]) -> None:
+        self.starts = frozenset(spec.get('start', []))
+        self.ends = list(spec.get('end', []))
+
+class RuleSet:
+    """
+    一组站点/模板抽取规则
+    
+    全部锚点编译为一个交替正则，一次扫描即可同时定位标题和正文。
+    """
+    
+    def __init__(self, spec: Dict[str, Any]) -> None:
+        self.name: str = spec['name']
+        self.domains: List[str] = list(spec.get('domains', []))
+        self.title = _AnchorField(spec.get('title', {}))
+        self.body = _AnchorField(spec.get('body', {}))
+        self.noise: List[str] = list(spec.get('noise', []))
+        
+        anchors = set(self.title.starts) | set(self.title.ends) | set(self.body.starts) | set(self.body.ends)
+        # 长锚点优先，避免被其前缀抢先匹配
+        pattern = '|'.join(re.escape(anchor) for anchor in sorted(anchors, key=len, reverse=True))
+        self._anchor_re = re.compile(pattern) if pattern else None
+        # 字节版本（用于直接扫描未解码的 UTF-8 内容），匹配结果映射回原锚点
+        self._anchor_names = {anchor.encode('utf-8'): anchor for anchor in anchors}
+        self._anchor_bytes_re = re.compile(pattern.encode('utf-8')) if pattern else None
+        self._noise_re = re.compile('|'.join(re.escape(noise) for noise in self.noise)) if self.noise else None
+    
+    def locate(self, text: Union[str, bytes, bytearray, mmap.mmap], pos: int = 0,
+               endpos: Optional[int] = None) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        一次扫描定位标题与正文
+        
+        与惰性正则 "起始.*?结束" 的语义一致：取第一个起始锚点，
+        再依次取其后第一个各结束锚点。
+        
+        Args:
+            text: 规范化后的页面文本；也可以是 UTF-8 字节缓冲区（此时返回字节区间）
+            pos: 扫描起点
+            endpos: 扫描终点，默认到末尾
+            
+        Returns:
+            (标题区间, 正文区间)，未找到的字段为 None
+        """
+        if self._anchor_re is None:
+            return None, None
+        endpos = len(text) if endpos is None else endpos
+        if isinstance(text, str):
+            matches = ((match.start(), match.end(), match.group())
+                       for match in self._anchor_re.finditer(text, pos, endpos))
+        else:
+            names = self._anchor_names
+            matches = ((match.start(), match.end(), names[match.group()])
+                       for match in self._anchor_bytes_re.finditer(text, pos, endpos))
+        return self.fold_anchors(matches)
+    
+    def fold_anchors(self, matches: Iterable[Tuple[int, int, str]]
+                     ) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        按出现顺序处理锚点匹配，得到标题与正文区间（两个字段都找到后不再消费匹配）
+        
+        Args:
+            matches: 按位置排列、互不重叠的 (起点, 终点, 锚点) 序列
+            
+        Returns:
+            (标题区间, 正文区间)，未找到的字段为 None
+        """
+        fields = [self.title, self.body]
+        spans: List[Optional[Tuple[int, int]]] = [None, None]
+        # 每个字段的进度：0 表示等待起始锚点，k 表示等待第 k 个结束锚点，-1 表示已完成或无需抽取
+        progress = [0 if field.starts else -1 for field in fields]
+        remaining = sum(1 for step in progress if step == 0)
+        if remaining == 0:
+            return None, None
+        starts = [0, 0]
+        for match_start, match_end, anchor in matches:
+            for i, field in enumerate(fields):
+                step = progress[i]
+                if step < 0:
+                    continue
+                if step == 0:
+                    if anchor not in field.starts:
+                        continue
+                    starts[i] = match_start
+                elif anchor != field.ends[step - 1]:
+                    continue
+                step += 1
+                if step > len(field.ends):
+                    spans[i] = (starts[i], match_end)
+                    progress[i] = -1
+                    remaining -= 1
+                else:
+                    progress[i] = step
+            if remaining == 0:
+                break
+        return spans[0], spans[1]
+    
+    def clean_body(self, body: str) -> str:
+        """去除正文中的噪声片段并整理空白"""
+        return self.collapse_body(body).strip()
+    
+    def collapse_body(self, body: str) -> str:
+        """去除噪声片段并合并空白，不去掉首尾空白（正文的各段可分别处理后拼接）"""
+        if self._noise_re is not None:
+            body = self._noise_re.sub('', body)
+        body = re.sub(r'　　', '\n\n', body)  # 替换全角空格为换行
+        body = re.sub(r'\s+', ' ', body)  # 合并多余空格
+        return body
+
+class RuleRegistry:
+    """按站点域名或模板名选择抽取规则，均为字典查找"""
+    
+    def __init__(self, config: Dict[str, Any], source: Optional[str] = None,
+                 signature: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Args:
+            config: 规则配置
+            source: 配置文件路径，get_rule_registry 在该文件改动后重新加载
+            signature: 读取配置时文件的 (修改时间, 大小)
+        """
+        self.config = config
+        self.source = source
+        self.signature = signature
+        self.rule_sets: Dict[str, RuleSet] = {}
+        self._by_domain: Dict[str, RuleSet] = {}
+        for spec in config.get('rule_sets', []):
+            rule_set = RuleSet(spec)
+            self.rule_sets[rule_set.name] = rule_set
+            for domain in rule_set.domains:
+                self._by_domain[domain.lower()] = rule_set
+        self.default = self.rule_sets[config['default']]
+    
+    def select(self, url: Optional[str] = None, name: Optional[str] = None) -> RuleSet:
+        """
+        选择页面的抽取规则
+        
+        Args:
+            url: 页面地址，按域名（及其上级域名）查找
+            name: 显式指定的规则名，优先于域名
+            
+        Returns:
+            RuleSet: 匹配的规则，找不到时返回默认规则
+        """
+        if name:
+            rule_set = self.rule_sets.get(name)
+            if rule_set is not None:
+                return rule_set
+        if url and self._by_domain:
+            host = urlsplit(url).hostname or ''
+            while host:
+                rule_set = self._by_domain.get(host)
+                if rule_set is not None:
+                    return rule_set
+                _, _, host = host.partition('.')
+        return self.default
+
+# 当前生效的规则注册表，首次使用时加载，规则文件改动后重新加载
+_registry: Optional[RuleRegistry] = None
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """文件的 (修改时间, 大小)，文件不存在时为 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def load_rule_registry(path: Optional[str] = None) -> RuleRegistry:
+    """
+    从配置文件加载抽取规则并设为当前注册表
+    
+    Args:
+        path: 规则配置文件路径，默认为 RULES_PATH；文件不存在时使用内置默认规则
+        
+    Returns:
+        RuleRegistry: 加载的注册表
+    """
+    global _registry
+    path = path or RULES_PATH
+    # 先记下文件签名再读取：读取期间文件被改动时，下次获取会再加载一次
+    signature = _file_signature(path)
+    if signature is not None:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    else:
+        config = _DEFAULT_RULES
+    _registry = RuleRegistry(config, path, signature)
+    return _registry
+
+def get_rule_registry() -> RuleRegistry:
+    """获取当前规则注册表；规则文件的修改时间或大小变化时重新加载"""
+    registry = _registry
+    if registry is None:
+        return load_rule_registry()
+    if registry.source is not None and _file_signature(registry.source) != registry.signature:
+        return load_rule_registry(registry.source)
+    return registry
+
+def _extract_fields(text: str, rule_set: RuleSet) -> Tuple[Optional[str], Optional[str]]:
+    """按规则一次扫描提取标题和正文"""
+    title_span, body_span = rule_set.locate(text)
+    title = text[title_span[0]:title_span[1]] if title_span else None
+    body = rule_set.clean_body(text[body_span[0]:body_span[1]]) if body_span else None
+    return title, body
+
+# 各输出字段依赖的清洗阶段
+_FIELD_STAGES = {
+    "title": "title",
+    "content": "content",
+    "word_count": "content",
+    "extract_status": "content",
+    "image_urls": "images",
+    "image_count": "images",
+    "image_status": "images",
+}
+
+_ALL_STAGES = frozenset(_FIELD_STAGES.values())
+
+def _parse_fields(fields: Optional[Union[str, Iterable[str]]]) -> Optional[Tuple[str, ...]]:
+    """规范化字段列表，支持逗号分隔的字符串"""
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    return tuple(fields)
+
+def _needed_stages(fields: Optional[Tuple[str, ...]]) -> FrozenSet[str]:
+    """由请求的字段得到需要执行的阶段（title / content / images），None 表示全部"""
+    if fields is None:
+        return _ALL_STAGES
+    unknown = [field for field in fields if field not in _FIELD_STAGES]
+    if unknown:
+        raise ValueError(f"未知的输出字段: {', '.join(unknown)}")
+    return frozenset(_FIELD_STAGES[field] for field in fields)
+
+def clean_web_content(raw_content: str, url: Optional[str] = None,
+                      rule_set: Optional[str] = None, time_budget: Optional[float] = None,
+                      stage_budgets: Optional[Dict[str, float]] = None,
+                      linear_time: bool = False,
+                      dedup_index: Optional[Any] = None,
+                      fields: Optional[Union[str, Iterable[str]]] = None) -> Dict[str, Union[str, List[str]]]:
     """
     简单清洗网页内容，提取标题、正文和图片URL
     
+    页面带有 window.__NUXT__ 载荷时，优先从载荷中的 contentHtml 直接取正文，
+    只有取不到时才对整页做去标签清洗。标题与正文锚点按页面所属站点的规则抽取。
+    
+    设置时间预算后，任一阶段（nuxt / normalize / extract / images）超时即停止，
+    返回已得到的部分结果，并附带 status 为 "timeout" 与超时的阶段名。
+    
+    提供近重复索引时，抽取正文后先计算指纹查询索引：命中则直接返回已处理文章的
+    规范结果（附带 status 为 "duplicate"），不再提取图片；未命中则清洗完成后登记。
+    
+    指定 fields 时只执行所需的阶段：只要图片时跳过载荷解析、去标签与正文抽取，
+    只要标题或正文时跳过图片扫描，结果中也只包含对应的键。
+    
     Args:
         raw_content: 原始爬虫内容
+        url: 页面地址，用于选择站点规则（缺省时使用 NUXT 载荷中的地址）
+        rule_set: 显式指定的规则名
+        time_budget: 整体时间预算（秒）
+        stage_budgets: 各阶段时间预算（秒）
+        linear_time: 是否使用保证线性时间的有界正则（防止恶意输入导致回溯）
+        dedup_index: 近重复索引（如 near_dup.NearDupIndex），需提供 fingerprint、lookup 与 add
+        fields: 需要的输出字段（Output 的键，可为逗号分隔的字符串），默认全部
         
     Returns:
         dict: 包含title、content和image_urls的字典
     """
-    # 1. 移除JavaScript代码
-    content = re.sub(r'window\.__NUXT__=.*?\);', '', raw_content, flags=re.DOTALL)
-    
-    # 2. 移除HTML标签
-    content = re.sub(r'<[^>]+>', '', content)
-    
-    # 3. 解码HTML实体
-    content = content.replace('\\u003C', '<').replace('\\u003E', '>')
-    content = content.replace('\\u002F', '/').replace('\\u0022', '"')
-    content = content.replace('\\u003D', '=').replace('\\u0026', '&')
-    
-    # 4. 移除多余的空白字符
-    content = re.sub(r'\s+', ' ', content)
-    content = content.strip()
-    
-    # 5. 提取标题 - 查找"如何1年内把1万变成114亿？"这样的模式
-    title_match = re.search(r'如何.*?？', content)
-    title = title_match.group(0) if title_match else "无标题"
-    
-    # 6. 提取文章内容 - 从"内容仅供娱乐"开始到"（文章来源"结束
-    article_match = re.search(r'内容仅供娱乐.*?（文章来源.*?）', content, re.DOTALL)
-    if article_match:
-        article_content = article_match.group(0)
-        # 清理内容中的多余字符
-        article_content = re.sub(r'　　', '\n\n', article_content)  # 替换全角空格为换行
-        article_content = re.sub(r'\s+', ' ', article_content)  # 合并多余空格
-        article_content = article_content.strip()
-    else:
+    stages = _needed_stages(_parse_fields(fields))
+    need_title = "title" in stages
+    need_content = "content" in stages
+    need_images = "images" in stages
+    budget = TimeBudget(time_budget, stage_budgets) if time_budget is not None or stage_budgets else None
+    hook = _active_hook()
+    mark = time.perf_counter() if hook is not None else 0.0
+    title = ""
+    article_content = None
+    image_urls: List[str] = []
+    
+    fingerprint = None
+    
+    try:
+        # 1. 结构化解析 NUXT 载荷（只要图片时跳过 1~5）
+        payload = None
+        if need_title or need_content:
+            if budget is not None:
+                budget.enter('nuxt')
+            payload = parse_nuxt_payload(raw_content, linear_time, budget)
+            title = payload.title if payload is not None else ""
+            if hook is not None:
+                mark = _report_stage(hook, 'nuxt', mark, len(raw_content),
+                                     len(payload.content_html) if payload is not None else 0)
+            
+            # 2. 选择站点规则
+            rules = get_rule_registry().select(url or (payload.url if payload is not None else None), rule_set)
+        
+        # 3. 快速路径：正文直接取自载荷中的 contentHtml
+        if need_content and payload is not None and payload.content_html:
+            if budget is not None:
+                budget.enter('normalize')
+            text = normalize_page(payload.content_html, linear_time=linear_time, budget=budget).text
+            if hook is not None:
+                mark = _report_stage(hook, 'normalize', mark, len(payload.content_html), len(text))
+            if budget is not None:
+                budget.enter('extract')
+            _, article_content = _extract_fields(text, rules)
+            if hook is not None:
+                mark = _report_stage(hook, 'extract', mark, len(text), len(article_content or ""))
+        
+        # 4. 完整路径：跳过 NUXT 载荷后清洗整页
+        if (need_content and article_content is None) or (need_title and not title):
+            spans = None
+            if payload is not None:
+                spans = [(0, payload.start), (payload.end, len(raw_content))]
+            if budget is not None:
+                budget.enter('normalize')
+            content = normalize_page(raw_content, spans, linear_time=linear_time, budget=budget).text
+            if hook is not None:
+                mark = _report_stage(hook, 'normalize', mark, len(raw_content), len(content))
+            if budget is not None:
+                budget.enter('extract')
+            page_title, page_article = _extract_fields(content, rules)
+            if hook is not None:
+                mark = _report_stage(hook, 'extract', mark, len(content), len(page_article or ""))
+            if not title:
+                title = page_title or "无标题"
+            if article_content is None:
+                article_content = page_article
+        
+        # 5. 近重复检测：与已处理文章近似时直接复用其结果
+        if dedup_index is not None and article_content is not None:
+            fingerprint = dedup_index.fingerprint(article_content)
+            canonical = dedup_index.lookup(fingerprint)
+            if hook is not None:
+                mark = _report_stage(hook, 'dedup', mark, len(article_content), 0,
+                                     {"hit" if canonical is not None else "miss": 1})
+            if canonical is not None:
+                # 复制 image_urls，调用方修改返回值不会改动索引中的规范结果
+                return _select_fields(dict(canonical, status="duplicate", image_urls=list(canonical["image_urls"])),
+                                      stages)
+        
+        # 6. 提取图片URL - 单遍扫描原始内容（支持任意转义深度）
+        if need_images:
+            if budget is not None:
+                budget.enter('images')
+            counts: Optional[Dict[str, int]] = {} if hook is not None else None
+            image_urls = extract_image_urls(raw_content, linear_time, budget, counts)
+            if hook is not None:
+                _report_stage(hook, 'images', mark, len(raw_content), len(image_urls), counts)
+    except StageTimeout as e:
+        if e.stage == 'images' and e.partial:
+            image_urls = e.partial
+        return _select_fields({
+            "title": title or "无标题",
+            "content": article_content if article_content is not None else "无法提取文章内容",
+            "image_urls": image_urls,
+            "status": "timeout",
+            "timeout_stage": e.stage,
+        }, stages)
+    
+    if article_content is None:
         article_content = "无法提取文章内容"
     
-    # 7. 提取图片URL - 从原始内容中提取
-    image_urls = []
-    
-    # 先解码转义字符，便于后续提取
-    decoded_content = raw_content.replace('\\u002F', '/').replace('\\u0022', '"')
-    
-    # 从HTML img标签中提取图片URL
-    img_pattern = r'<img[^>]*src=["\']([^"\']*)["\'][^>]*>'
-    img_matches = re.findall(img_pattern, decoded_content, re.IGNORECASE)
-    image_urls.extend(img_matches)
-    
-    # 直接匹配完整的图片URL（在解码后的内容中）
-    direct_img_pattern = r'https?://[^"\'\s]*\.(?:jpg|jpeg|png|gif|webp|bmp)'
-    direct_img_matches = re.findall(direct_img_pattern, decoded_content, re.IGNORECASE)
-    image_urls.extend(direct_img_matches)
-    
-    # 处理转义的图片URL - 匹配包含\\\\u002F的URL
-    escaped_img_pattern = r'https?:\\\\u002F\\\\u002F[^\\\\\s]*\.(?:jpg|jpeg|png|gif|webp|bmp)'
-    escaped_img_matches = re.findall(escaped_img_pattern, raw_content, re.IGNORECASE)
-    
-    # 解码转义的URL
-    for escaped_url in escaped_img_matches:
-        decoded_url = escaped_url.replace('\\\\u002F', '/')
-        image_urls.append(decoded_url)
-    
-    # 处理双重转义的图片URL - 匹配包含\\\\\\u002F的URL
-    double_escaped_img_pattern = r'https?:\\\\\\u002F\\\\\\u002F[^\\\\\s]*\.(?:jpg|jpeg|png|gif|webp|bmp)'
-    double_escaped_img_matches = re.findall(double_escaped_img_pattern, raw_content, re.IGNORECASE)
-    
-    # 解码双重转义的URL
-    for escaped_url in double_escaped_img_matches:
-        decoded_url = escaped_url.replace('\\\\\\u002F', '/')
-        image_urls.append(decoded_url)
-    
-    # 处理JavaScript字符串中的转义URL - 匹配包含\\u002F的URL
-    js_escaped_img_pattern = r'https?:\\u002F\\u002F[^\\\s]*\.(?:jpg|jpeg|png|gif|webp|bmp)'
-    js_escaped_img_matches = re.findall(js_escaped_img_pattern, raw_content, re.IGNORECASE)
-    
-    # 解码JavaScript转义的URL
-    for escaped_url in js_escaped_img_matches:
-        decoded_url = escaped_url.replace('\\u002F', '/')
-        image_urls.append(decoded_url)
-    
-    # 处理目标图片URL的特定模式
-    target_img_pattern = r'https:\\\\u002F\\\\u002Fnp-newspic\.dfcfw\.com\\\\u002Fdownload\\\\u002FD25730774900815789399_w1563h5643_o\.jpg'
-    target_img_matches = re.findall(target_img_pattern, raw_content, re.IGNORECASE)
-    
-    # 解码目标图片URL
-    for escaped_url in target_img_matches:
-        decoded_url = escaped_url.replace('\\\\u002F', '/')
-        image_urls.append(decoded_url)
-    
-    # 去重并过滤有效的图片URL
-    unique_image_urls = []
-    for url in image_urls:
-        if url and url not in unique_image_urls:
-            # 确保URL格式正确
-            if url.startswith('http') and any(ext in url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp']):
-                unique_image_urls.append(url)
-    
-    return {
+    result = {
         "title": title,
         "content": article_content,
-        "image_urls": unique_image_urls
+        "image_urls": image_urls
     }
+    # 只登记完整的结果，命中时才能满足任意字段组合
+    if fingerprint is not None and stages == _ALL_STAGES:
+        dedup_index.add(fingerprint, dict(result, image_urls=list(image_urls)))
+    return _select_fields(result, stages)
 
-async def main(args: Args) -> Output:
+# clean_web_content 结果中各阶段对应的键
+_STAGE_KEYS = (("title", "title"), ("content", "content"), ("images", "image_urls"))
+
+def _select_fields(result: Dict[str, Any], stages: FrozenSet[str]) -> Dict[str, Any]:
+    """去掉未请求阶段的键"""
+    if stages == _ALL_STAGES:
+        return result
+    for stage, key in _STAGE_KEYS:
+        if stage not in stages:
+            result.pop(key, None)
+    return result
+
+def build_output(raw_content: str, url: Optional[str] = None,
+                 rule_set: Optional[str] = None, time_budget: Optional[float] = None,
+                 stage_budgets: Optional[Dict[str, float]] = None,
+                 linear_time: bool = False, dedup_index: Optional[Any] = None,
+                 image_index: Optional[Any] = None,
+                 fields: Optional[Union[str, Iterable[str]]] = None) -> Output:
     """
-    主函数，处理网页内容清洗
+    清洗原始内容并构建输出对象（同步版本，供批处理等场景直接调用）
     
     Args:
-        args: 包含原始内容的参数对象
+        raw_content: 原始爬虫内容
+        url: 页面地址，用于选择站点规则
+        rule_set: 显式指定的规则名
+        time_budget: 整体时间预算（秒），超时时 extract_status 为 "timeout"
+        stage_budgets: 各阶段时间预算（秒）
+        linear_time: 是否使用保证线性时间的有界正则
+        dedup_index: 近重复索引，命中时 extract_status 为 "duplicate"；默认使用进程级索引
+        image_index: 图片已见索引（如 image_index.ImageSeenIndex），提供时附带 image_status；默认使用进程级索引
+        fields: 需要的输出字段，默认全部；未请求字段依赖的阶段不会执行
         
     Returns:
-        Output: 包含清洗结果的输出对象
+        Output: 包含清洗结果的输出对象（指定 fields 时只包含这些字段）
     """
-    params = args.params
-    raw_content = params['input']  # 获取输入的原始内容
-    
+    fields = _parse_fields(fields)
+    if dedup_index is None:
+        dedup_index = _dedup_index
+    if image_index is None:
+        image_index = _image_index
     # 调用清洗函数
-    cleaned_result = clean_web_content(raw_content)
+    cleaned_result = clean_web_content(raw_content, url, rule_set, time_budget, stage_budgets, linear_time,
+                                       dedup_index, fields)
+    if fields is None:
+        ret = _make_output(cleaned_result)
+        if image_index is not None:
+            ret["image_status"] = image_index.mark(ret["image_urls"])
+        return ret
     
-    # 构建输出对象
+    # 只计算请求的字段，计数类字段由对应结果按需推导
+    ret = {}
+    for field in fields:
+        if field == "image_status":
+            if image_index is not None:
+                ret[field] = image_index.mark(cleaned_result['image_urls'])
+        else:
+            ret[field] = _FIELD_DERIVATIONS[field](cleaned_result)
+    return ret
+
+def _extract_status(cleaned_result: Dict[str, Any]) -> str:
+    if cleaned_result.get('status') in ("timeout", "duplicate"):
+        return cleaned_result['status']
+    return "success" if cleaned_result['content'] != "无法提取文章内容" else "failed"
+
+# 各输出字段由清洗结果推导的方式
+_FIELD_DERIVATIONS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "title": lambda result: result['title'],
+    "content": lambda result: result['content'],
+    "image_urls": lambda result: result['image_urls'],
+    "image_count": lambda result: len(result['image_urls']),
+    "word_count": lambda result: len(result['content']),
+    "extract_status": _extract_status,
+}
+
+def _make_output(cleaned_result: Dict[str, Any]) -> Output:
+    """由清洗结果构建输出对象"""
     ret: Output = {
         "title": cleaned_result['title'],  # 提取的标题
         "content": cleaned_result['content'],  # 清洗后的内容
         "image_urls": cleaned_result['image_urls'],  # 提取的图片URL列表
         "image_count": len(cleaned_result['image_urls']),  # 图片数量
         "word_count": len(cleaned_result['content']),  # 字数统计
-        "extract_status": "success" if cleaned_result['content'] != "无法提取文章内容" else "failed"
+        "extract_status": _extract_status(cleaned_result)
     }
     
-    return ret
\ No newline at end of file
+    return ret
+
+# 参数对象中可透传给 build_output 的可选参数
+_OPTION_KEYS = ('url', 'rule_set', 'time_budget', 'stage_budgets', 'linear_time', 'fields')
+
+def _build_args(args: Args) -> Tuple[str, Dict[str, Any]]:
+    """取出参数对象中 build_output 所需的参数，兼容属性访问与字典两种形式"""
+    params = args.params if hasattr(args, 'params') else args['params']
+    options = {key: params[key] for key in _OPTION_KEYS if params.get(key) is not None}
+    return params['input'], options
+
+def configure_executor(kind: str = "thread", max_workers: Optional[int] = None) -> Executor:
+    """
+    配置 main 与 main_batch 卸载清洗计算所用的执行器
+    
+    线程执行器可以避免阻塞事件循环，但正则计算仍受 GIL 限制；
+    进程执行器可以真正并行，子进程通过 fork 继承本模块。
+    
+    Args:
+        kind: 执行器类型，"thread" 或 "process"
+        max_workers: 最大工作线程/进程数
+        
+    Returns:
+        Executor: 新的执行器（原有执行器会被关闭）
+    """
+    global _executor
+    if kind == "thread":
+        executor: Executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clean-data")
+    elif kind == "process":
+        # 连字符文件名无法在子进程中按名导入：确保模块已登记，由 fork 出的子进程继承
+        if __name__ not in sys.modules:
+            module = types.ModuleType(__name__)
+            module.__dict__.update(globals())
+            sys.modules[__name__] = module
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+    else:
+        raise ValueError(f"未知的执行器类型: {kind}")
+    
+    previous, _executor = _executor, executor
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return executor
+
+def configure_indexes(dedup_index: Optional[Any] = None, image_index: Optional[Any] = None) -> None:
+    """
+    配置进程级的近重复索引与图片已见索引（传入 None 即关闭）
+    
+    配置后 main、main_batch 以及未显式传入索引的 build_output 调用都使用这两个索引。
+    索引只在本进程内有效：进程执行器的子进程在 fork 时各自继承一份副本，
+    批处理与常驻服务的工作进程在初始化时各自创建索引。
+    
+    Args:
+        dedup_index: 近重复索引（如 near_dup.NearDupIndex）
+        image_index: 图片已见索引（如 image_index.ImageSeenIndex）
+    """
+    global _dedup_index, _image_index
+    _dedup_index = dedup_index
+    _image_index = image_index
+
+async def main(args: Args) -> Output:
+    """
+    主函数，处理网页内容清洗
+    
+    清洗计算在执行器中进行（默认使用事件循环的线程池），不会阻塞事件循环。
+    
+    Args:
+        args: 包含原始内容的参数对象
+        
+    Returns:
+        Output: 包含清洗结果的输出对象
+    """
+    # 获取输入的原始内容，以及可选的页面地址、规则名与时间预算
+    raw_content, options = _build_args(args)
+    
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(build_output, raw_content, **options))
+
+async def main_batch(args_iter: Union[Iterable[Args], AsyncIterable[Args]],
+                     concurrency: int = 4) -> AsyncIterator[Tuple[int, Output]]:
+    """
+    批量处理网页内容清洗，按完成顺序产出结果
+    
+    同时在途的任务数不超过 concurrency；达到上限时暂停读取输入（背压），
+    直到有任务完成。
+    
+    Args:
+        args_iter: 参数对象的可迭代对象或异步迭代器
+        concurrency: 并发上限
+        
+    Yields:
+        (序号, Output): 序号为参数在输入中的位置（从0开始）
+    """
+    loop = asyncio.get_running_loop()
+    pending: Dict['asyncio.Future[Output]', int] = {}
+    
+    async def iterate() -> AsyncIterator[Args]:
+        if hasattr(args_iter, '__aiter__'):
+            async for args in args_iter:
+                yield args
+        else:
+            for args in args_iter:
+                yield args
+    
+    async def drain(return_when: str) -> List[Tuple[int, Output]]:
+        done, _ = await asyncio.wait(pending, return_when=return_when)
+        return [(pending.pop(future), future.result()) for future in done]
+    
+    try:
+        index = 0
+        async for args in iterate():
+            if len(pending) >= concurrency:
+                for result in await drain(asyncio.FIRST_COMPLETED):
+                    yield result
+            raw_content, options = _build_args(args)
+            future = loop.run_in_executor(_executor, partial(build_output, raw_content, **options))
+            pending[future] = index
+            index += 1
+        while pending:
+            for result in await drain(asyncio.FIRST_COMPLETED):
+                yield result
+    finally:
+        # 调用方提前退出或出错时取消尚未开始的任务
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+clean-data.py 加载器
+文件名带连字符无法直接 import，这里按路径加载一次并登记到 sys.modules，
+其他模块（包括进程池中的工作进程）都通过它获取同一个模块对象
+"""
+
+import importlib.util
+import os
+import sys
+from types import ModuleType
+
+# 登记到 sys.modules 中的模块名
+MODULE_NAME = "clean_data"
+
+# clean-data.py 的绝对路径
+MODULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clean-data.py")
+
+
+def load_clean_data() -> ModuleType:
+    """
+    加载 clean-data.py 模块，重复调用时直接返回已加载的模块
+
+    Returns:
+        clean-data.py 对应的模块对象
+    """
+    module = sys.modules.get(MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(MODULE_NAME, MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[MODULE_NAME] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[MODULE_NAME]
+            raise
+    return module
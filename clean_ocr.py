@@ -5,9 +5,114 @@ OCR文本清洗工具
 将OCR识别的JSON格式文本清洗成大模型容易理解的格式
 """
 
+import argparse
+import codecs
+import io
 import json
+import math
+import os
+import random
 import re
-from typing import List, Dict, Any
+import time
+from array import array
+from bisect import bisect_right
+from itertools import chain, groupby
+from operator import itemgetter, mul
+from typing import (Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence,
+                    TextIO, Tuple, Union)
+
+# 阶段埋点回调：hook(阶段名, 耗时秒数, 输入大小, 输出大小, 计数)
+StageHook = Callable[[str, float, int, int, Optional[Dict[str, int]]], None]
+
+# 当前的埋点回调与采样率；回调为 None 时各阶段只多一次判断
+_stage_hook: Optional[StageHook] = None
+_stage_sample_rate = 1.0
+
+
+def set_stage_hook(hook: Optional[StageHook], sample_rate: float = 1.0) -> None:
+    """
+    设置 extract_and_clean_ocr_data 的阶段埋点回调
+    
+    Args:
+        hook: 回调函数，None 表示关闭埋点
+        sample_rate: 采样率，按调用采样（0~1）
+    """
+    global _stage_hook, _stage_sample_rate
+    _stage_hook = hook
+    _stage_sample_rate = sample_rate
+
+
+def _active_hook() -> Optional[StageHook]:
+    """返回本次调用使用的埋点回调，未开启或未被采样时返回 None"""
+    hook = _stage_hook
+    if hook is None or (_stage_sample_rate < 1.0 and random.random() >= _stage_sample_rate):
+        return None
+    return hook
+
+
+# 股票行：名称 + 带符号的涨跌幅% + 可选的月末资产，一次匹配同时完成分类与解析
+_STOCK_ROW_RE = re.compile(r'([A-Za-z\u4e00-\u9fff\*]+)\s*([+-]?\d+\.?\d*%)(?:\s*(\d+\.?\d*))?')
+
+# 资产必填的股票行，仅在首个匹配缺少资产时用于继续向后查找
+_STOCK_ROW_WITH_ASSET_RE = re.compile(r'([A-Za-z\u4e00-\u9fff\*]+)\s*([+-]?\d+\.?\d*%)\s*(\d+\.?\d*)')
+
+# 跌幅：负号紧跟数字与百分号
+_LOSER_RE = re.compile(r'-\d+\.?\d*%')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_PERCENT_JOIN_RE = re.compile(r'(\d+)%(\d+)')
+
+
+class StockRow(NamedTuple):
+    """解析后的股票行"""
+    name: str                 # 股票名称
+    change: str               # 带符号的涨跌幅，如 "200%"、"-49.91%"
+    asset: Optional[float]    # 月末资产，行中没有资产时为 None
+    unit: str                 # 资产单位：涨幅王为万元，跌幅王为元
+
+
+def parse_stock_row(text: str) -> Optional[StockRow]:
+    """
+    解析股票行，如 "金盾股份 200%25"、"ST天喻-49.91% 5009.21"
+    
+    Args:
+        text: 原始文本
+    
+    Returns:
+        StockRow；文本中没有 "名称 + 涨跌幅%" 时返回 None
+    """
+    match = _STOCK_ROW_RE.search(text)
+    if match is None:
+        return None
+    if match.group(3) is None:
+        # 首个匹配缺少资产：与逐个模式查找的结果保持一致，继续向后找带资产的行
+        with_asset = _STOCK_ROW_WITH_ASSET_RE.search(text, match.start() + 1)
+        if with_asset is not None:
+            match = with_asset
+    name, change, asset = match.groups()
+    return StockRow(
+        name=name.strip(),
+        change=change,
+        asset=float(asset) if asset is not None else None,
+        unit="元" if change.startswith('-') else "万元",
+    )
+
+
+def format_stock_row(row: StockRow) -> str:
+    """
+    格式化股票行，如 "金盾股份: 涨幅200%, 月末资产25万元"
+    
+    Args:
+        row: 带资产的股票行
+    
+    Returns:
+        格式化后的文本
+    """
+    if row.unit == "元":
+        # 跌幅王：保持元为单位
+        return f"{row.name}: 跌幅{row.change[1:]}, 月末资产{row.asset}元"
+    # 涨幅王：原始数据已经是万元单位，直接使用
+    return f"{row.name}: 涨幅{row.change}, 月末资产{row.asset:.0f}万元"
 
 
 def clean_stock_data(text: str) -> str:
@@ -20,48 +125,10 @@ def clean_stock_data(text: str) -> str:
     Returns:
         清洗后的文本，如 "金盾股份: 涨幅200%, 月末资产25万元"
     """
-    # 匹配股票名称 + 涨跌幅 + 资产
-    pattern = r'([A-Za-z\u4e00-\u9fff\*]+)\s*([+-]?\d+\.?\d*%)\s*(\d+\.?\d*)'
-    match = re.search(pattern, text)
-    
-    if match:
-        stock_name = match.group(1).strip()
-        change_rate = match.group(2)
-        asset = match.group(3)
-        
-        # 判断是涨幅还是跌幅
-        if change_rate.startswith('-'):
-            change_type = "跌幅"
-            change_rate = change_rate[1:]  # 去掉负号
-        else:
-            change_type = "涨幅"
-        
-        # 根据涨跌幅类型决定单位：涨幅王用万元，跌幅王用元
-        asset_value = float(asset)
-        if change_type == "涨幅":
-            # 涨幅王：原始数据已经是万元单位，直接使用
-            return f"{stock_name}: {change_type}{change_rate}, 月末资产{asset_value:.0f}万元"
-        else:
-            # 跌幅王：保持元为单位
-            return f"{stock_name}: {change_type}{change_rate}, 月末资产{asset_value}元"
-    
-    # 如果没有匹配到，尝试其他模式
-    # 处理类似 "深中华A169%2.7" 这样的格式
-    pattern2 = r'([A-Za-z\u4e00-\u9fff\*]+)\s*(\d+\.?\d*)%\s*(\d+\.?\d*)'
-    match2 = re.search(pattern2, text)
-    
-    if match2:
-        stock_name = match2.group(1).strip()
-        change_rate = match2.group(2)
-        asset = match2.group(3)
-        
-        change_type = "涨幅"
-        
-        # 第二个模式匹配的都是涨幅王，原始数据已经是万元单位
-        asset_value = float(asset)
-        return f"{stock_name}: {change_type}{change_rate}%, 月末资产{asset_value}万元"
-    
-    return text
+    row = parse_stock_row(text)
+    if row is None or row.asset is None:
+        return text
+    return format_stock_row(row)
 
 
 def clean_text_segment(text: str) -> str:
@@ -75,14 +142,16 @@ def clean_text_segment(text: str) -> str:
         清洗后的文本
     """
     # 去除多余的空格
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = _WHITESPACE_RE.sub(' ', text.strip())
     
     # 处理股票数据
-    if re.search(r'[A-Za-z\u4e00-\u9fff\*]+\s*[+-]?\d+\.?\d*%\s*\d+', text):
-        return clean_stock_data(text)
+    if '%' in text:
+        row = parse_stock_row(text)
+        if row is not None and row.asset is not None:
+            return format_stock_row(row)
     
     # 处理百分比数据
-    text = re.sub(r'(\d+)%(\d+)', r'\1% \2', text)
+    text = _PERCENT_JOIN_RE.sub(r'\1% \2', text)
     
     # 处理特殊字符
     text = text.replace('"', '"').replace('"', '"')
@@ -90,210 +159,992 @@ def clean_text_segment(text: str) -> str:
     return text
 
 
-def extract_and_clean_ocr_data(json_data: Dict[str, Any]) -> str:
+# 股票表的起始本金（元）：年初1万元入市
+START_ASSET = 10000.0
+
+# 校验复利时允许的相对误差（OCR中的资产通常只保留2~3位有效数字）
+COMPOUND_TOLERANCE = 0.05
+
+# 资产单位对应的元数
+_UNIT_SCALES = {"万元": 10000.0, "元": 1.0}
+
+# 宽松的股票行：名称 + 符号 + 一串可能粘连的数字（% 可能缺失），用于重新切分数字
+_STOCK_DIGITS_RE = re.compile(r'([A-Za-z\u4e00-\u9fff\*]+)\s*([+-]?)(\d[\d.%\s]*)')
+
+# 格式化后行末的月末资产，如 "月末资产25万元"
+_ASSET_TEXT_RE = re.compile(r'月末资产(\d+\.?\d*)(万元|元)$')
+
+
+class StockTable:
+    """
+    列式存储的股票表，多个文档的多张表连续存放
+    
+    每张表为一串按月连续买入的记录，第 i 行的资产应约等于
+    第 i-1 行的资产 × (1 + 第 i 行涨跌幅)，首行以 START_ASSET 为上一期资产。
+    """
+    
+    def __init__(self) -> None:
+        self.segments: List[str] = []      # 原始文本
+        self.names: List[str] = []
+        self.change_texts: List[str] = []  # 带符号的涨跌幅文本，如 "-49.91%"
+        self.units: List[str] = []
+        self.changes = array('d')          # 涨跌幅（小数），无法解析时为 nan
+        self.assets = array('d')           # 月末资产（按 units 计），无法解析时为 nan
+        self.scales = array('d')           # 资产单位对应的元数
+        self.offsets = array('l', [0])     # 各表的起始行号，末尾为总行数
+    
+    def __len__(self) -> int:
+        return len(self.segments)
+    
+    @property
+    def table_count(self) -> int:
+        return len(self.offsets) - 1
+    
+    def table(self, index: int) -> range:
+        """第 index 张表的行号范围"""
+        return range(self.offsets[index], self.offsets[index + 1])
+    
+    def _append(self, segment: str, row: Optional[StockRow]) -> None:
+        self.segments.append(segment)
+        if row is None:
+            loose = _STOCK_DIGITS_RE.search(segment)
+            negative = loose is not None and loose.group(2) == '-'
+            row = StockRow(loose.group(1) if loose else "", "", None, "元" if negative else "万元")
+        self.names.append(row.name)
+        self.change_texts.append(row.change)
+        self.units.append(row.unit)
+        self.changes.append(float(row.change[:-1]) / 100 if row.change else math.nan)
+        self.assets.append(row.asset if row.asset is not None else math.nan)
+        self.scales.append(_UNIT_SCALES[row.unit])
+    
+    def add_table(self, segments: Iterable[str], rows: Optional[Sequence[Optional[StockRow]]] = None) -> None:
+        """
+        追加一张表
+        
+        Args:
+            segments: 表中各行的原始文本
+            rows: 已解析的记录（可省略，省略时逐行解析）
+        """
+        segments = list(segments)
+        if rows is None:
+            rows = [parse_stock_row(segment) for segment in segments]
+        for segment, row in zip(segments, rows):
+            self._append(segment, row)
+        self.offsets.append(len(self.segments))
+    
+    def _previous_assets(self, start_asset: float) -> array:
+        """每行上一期的资产（元），各表首行为 start_asset"""
+        previous = array('d', [start_asset])
+        previous.extend(map(mul, self.assets[:-1], self.scales[:-1]))
+        for start in self.offsets[:-1]:
+            if start < len(previous):
+                previous[start] = start_asset
+        return previous[:len(self.segments)]
+    
+    def errors(self, start_asset: float = START_ASSET) -> array:
+        """
+        按复利关系计算每行资产的相对误差
+        
+        Args:
+            start_asset: 各表首行的上一期资产（元）
+        
+        Returns:
+            各行的相对误差，无法解析的行为 nan
+        """
+        expected = map(mul, self._previous_assets(start_asset), map((1.0).__add__, self.changes))
+        actual = map(mul, self.assets, self.scales)
+        return array('d', (abs(a / e - 1.0) if e else math.inf for a, e in zip(actual, expected)))
+    
+    def validate(self, tolerance: float = COMPOUND_TOLERANCE,
+                 start_asset: float = START_ASSET) -> List[bool]:
+        """各行是否满足复利关系（nan 视为不满足）"""
+        return [error <= tolerance for error in self.errors(start_asset)]
+    
+    def _resplit(self, index: int, previous: float, tolerance: float) -> bool:
+        """在涨跌幅与资产之间重新切分粘连的数字，选取误差最小且在容差内的切分"""
+        loose = _STOCK_DIGITS_RE.search(self.segments[index])
+        if loose is None:
+            return False
+        name, sign, blob = loose.groups()
+        digits = blob.replace('%', '').replace(' ', '').rstrip('.')
+        scale = self.scales[index]
+        best: Optional[Tuple[float, str, str]] = None
+        for split in range(1, len(digits)):
+            change_text, asset_text = digits[:split], digits[split:]
+            if change_text.endswith('.') or asset_text.startswith('.') or change_text.count('.') > 1 \
+                    or asset_text.count('.') > 1:
+                continue
+            change = float(sign + change_text) / 100
+            if change <= -1.0:
+                continue
+            error = abs(float(asset_text) * scale / (previous * (1.0 + change)) - 1.0)
+            if best is None or error < best[0]:
+                best = (error, change_text, asset_text)
+        if best is None or best[0] > tolerance:
+            return False
+        _, change_text, asset_text = best
+        self.names[index] = name.strip()
+        self.change_texts[index] = sign + change_text + '%'
+        self.changes[index] = float(sign + change_text) / 100
+        self.assets[index] = float(asset_text)
+        return True
+    
+    def resolve(self, tolerance: float = COMPOUND_TOLERANCE, start_asset: float = START_ASSET,
+                min_consistent: float = 0.5) -> int:
+        """
+        修正数字切分有歧义的行（如 OCR 把 "169%2.7" 识别成 "1692.7"）
+        
+        只处理大部分行满足复利关系的表，避免把本来就不是连续买入记录的表改乱。
+        
+        Args:
+            tolerance: 允许的相对误差
+            start_asset: 各表首行的上一期资产（元）
+            min_consistent: 表中满足复利关系的行所占比例下限
+        
+        Returns:
+            修正的行数
+        """
+        errors = self.errors(start_asset)
+        fixed = 0
+        for index in range(self.table_count):
+            rows = self.table(index)
+            # 只统计能够计算误差的行（本行与上一行都已解析）
+            checked = [errors[i] for i in rows if errors[i] == errors[i]]
+            if not checked or sum(error <= tolerance for error in checked) < len(checked) * min_consistent:
+                continue
+            for i in rows:
+                if errors[i] <= tolerance:
+                    continue
+                previous = start_asset if i == rows.start else self.assets[i - 1] * self.scales[i - 1]
+                if previous != previous or previous <= 0:
+                    continue
+                # 上一行被修正后，本行的原有切分可能已经满足复利关系
+                expected = previous * (1.0 + self.changes[i])
+                if expected and abs(self.assets[i] * self.scales[i] / expected - 1.0) <= tolerance:
+                    continue
+                if self._resplit(i, previous, tolerance):
+                    fixed += 1
+        return fixed
+    
+    def final_assets(self) -> List[Optional[float]]:
+        """各表最后一行的资产（元），空表或无法解析时为 None"""
+        finals: List[Optional[float]] = []
+        for index in range(self.table_count):
+            end = self.offsets[index + 1]
+            value = self.assets[end - 1] * self.scales[end - 1] if end > self.offsets[index] else math.nan
+            finals.append(value if value == value else None)
+        return finals
+    
+    def format_rows(self, index: int) -> List[str]:
+        """格式化第 index 张表，无法解析资产的行保留原文"""
+        lines = []
+        for i in self.table(index):
+            asset = self.assets[i]
+            if asset != asset:
+                lines.append(self.segments[i])
+            else:
+                lines.append(format_stock_row(StockRow(self.names[i], self.change_texts[i], asset, self.units[i])))
+        return lines
+
+
+def parse_stock_tables(tables: Iterable[Iterable[str]], resolve: bool = True) -> StockTable:
     """
-    从OCR JSON数据中提取并清洗文本
+    批量解析多张股票表（可来自多个OCR文档）
     
     Args:
-        json_data: OCR识别的JSON数据
+        tables: 每张表的股票行文本
+        resolve: 是否按复利关系修正数字切分有歧义的行
     
     Returns:
-        清洗后的文本内容
+        StockTable: 列式存储的解析结果
     """
-    try:
-        # 提取所有文本片段
-        words = json_data.get('data', {}).get('results', [{}])[0].get('words', [])
-        text_segments = [word.get('text', '') for word in words]
-        
-        # 先分类股票数据，再清洗
-        gainers_raw = []
-        losers_raw = []
-        other_segments = []
+    table = StockTable()
+    for segments in tables:
+        table.add_table(segments)
+    if resolve:
+        table.resolve()
+    return table
+
+
+def format_amount(yuan: float) -> str:
+    """
+    把金额格式化为亿元/万元/元，如 "114亿元"、"3.61元"
+    
+    Args:
+        yuan: 金额（元）
+    
+    Returns:
+        格式化后的金额
+    """
+    for scale, unit in ((1e8, "亿元"), (1e4, "万元"), (1.0, "元")):
+        if abs(yuan) >= scale or scale == 1.0:
+            value = yuan / scale
+            text = f"{value:.0f}" if abs(value) >= 100 else f"{value:.2f}".rstrip('0').rstrip('.')
+            return text + unit
+    return f"{yuan}元"
+
+
+def _final_asset_from_text(rows: List[str]) -> Optional[float]:
+    """从格式化后的最后一行取出月末资产（元）"""
+    if not rows:
+        return None
+    match = _ASSET_TEXT_RE.search(rows[-1])
+    if match is None:
+        return None
+    return float(match.group(1)) * _UNIT_SCALES[match.group(2)]
+
+
+def _summary(gainer_final: Optional[float], loser_final: Optional[float]) -> str:
+    """根据两张表的最终资产生成总结"""
+    gainer_text = f"1万元本金最终可达到{format_amount(gainer_final)}" if gainer_final is not None else "缺少数据"
+    loser_text = f"1万元本金最终仅剩{format_amount(loser_final)}" if loser_final is not None else "缺少数据"
+    return f"""## 总结
+本报告展示了2024年A股市场的极端投资情况：
+1. 如果每月都买入当月涨幅最大的股票，{gainer_text}
+2. 如果每月都买入当月跌幅最大的股票，{loser_text}
+3. 这充分说明了股票投资的风险与收益并存，以及选股的重要性
+"""
+
+
+# 版面模式：同一行的判定阈值（与行高之比），以及同一单元格内相邻文字框的最大间距（与行高之比）
+ROW_CENTER_TOLERANCE = 0.5
+CELL_GAP_RATIO = 0.5
+
+# 版面模式下的单元格
+_CHANGE_CELL_RE = re.compile(r'[+-]?\d+\.?\d*%')
+_ASSET_CELL_RE = re.compile(r'\d+\.?\d*')
+_NAME_CELL_RE = re.compile(r'[A-Za-z\u4e00-\u9fff\*][A-Za-z\u4e00-\u9fff\* ]*')
+
+# 文字框：(左, 上, 右, 下)
+Box = Tuple[float, float, float, float]
+
+
+def word_box(word: Dict[str, Any]) -> Optional[Box]:
+    """
+    取出 word 的文字框，支持以下格式：
+    location: {"left", "top", "width", "height"}；
+    bbox: [左, 上, 右, 下] 或顶点列表 [[x, y], ...]
+    
+    Args:
+        word: OCR 结果中的 word 对象
+    
+    Returns:
+        (左, 上, 右, 下)；没有文字框时返回 None
+    """
+    location = word.get('location')
+    if location is not None:
+        left, top = location['left'], location['top']
+        return left, top, left + location['width'], top + location['height']
+    bbox = word.get('bbox')
+    if bbox:
+        if isinstance(bbox[0], (list, tuple)):
+            xs = [point[0] for point in bbox]
+            ys = [point[1] for point in bbox]
+            return min(xs), min(ys), max(xs), max(ys)
+        return bbox[0], bbox[1], bbox[2], bbox[3]
+    return None
+
+
+def reconstruct_rows(words: Iterable[Dict[str, Any]],
+                     center_tolerance: float = ROW_CENTER_TOLERANCE,
+                     gap_ratio: float = CELL_GAP_RATIO) -> Optional[List[List[str]]]:
+    """
+    按文字框重建表格的行与单元格
+    
+    文字框按纵向中心排序后一次扫描分行（中心与当前行平均中心的距离不超过
+    行高 × center_tolerance 即属于同一行），行内再按左边界排序，
+    间距小于行高 × gap_ratio 的相邻文字框合并为一个单元格。总体为 O(n log n)。
+    
+    Args:
+        words: 一页OCR结果中的 words
+        center_tolerance: 同一行的判定阈值
+        gap_ratio: 同一单元格的最大间距
+    
+    Returns:
+        各行的单元格文本；任一 word 缺少文字框时返回 None（应退回按阅读顺序处理）
+    """
+    items: List[Tuple[float, float, Box, str]] = []
+    for word in words:
+        box = word_box(word)
+        if box is None:
+            return None
+        text = word.get('text', '').strip()
+        if text:
+            items.append(((box[1] + box[3]) / 2, box[3] - box[1], box, text))
+    items.sort(key=itemgetter(0))
+    
+    # 纵向扫描分行，维护当前行的平均中心与平均行高
+    rows: List[List[Tuple[Box, str]]] = []
+    row_center = row_height = 0.0
+    for center, height, box, text in items:
+        if rows and abs(center - row_center) <= max(row_height, height) * center_tolerance:
+            row = rows[-1]
+            row.append((box, text))
+            row_center += (center - row_center) / len(row)
+            row_height += (height - row_height) / len(row)
+        else:
+            rows.append([(box, text)])
+            row_center, row_height = center, height
+    
+    # 行内按左边界排序并合并相邻文字框
+    result: List[List[str]] = []
+    for row in rows:
+        row.sort(key=lambda item: item[0][0])
+        height = sum(box[3] - box[1] for box, _ in row) / len(row)
+        cells = [row[0][1]]
+        right = row[0][0][2]
+        for box, text in row[1:]:
+            if box[0] - right < height * gap_ratio:
+                cells[-1] += ' ' + text
+            else:
+                cells.append(text)
+            right = max(right, box[2])
+        result.append(cells)
+    return result
+
+
+def parse_stock_cells(cells: List[str]) -> Optional[StockRow]:
+    """
+    从表格行的单元格直接取出股票记录：名称单元格 + 涨跌幅单元格 + 资产单元格
+    
+    Args:
+        cells: 一行的单元格文本
+    
+    Returns:
+        StockRow；单元格不符合该结构时返回 None
+    """
+    for i, cell in enumerate(cells):
+        if _CHANGE_CELL_RE.fullmatch(cell):
+            break
+    else:
+        return None
+    if i == 0 or i + 1 >= len(cells) or not _ASSET_CELL_RE.fullmatch(cells[i + 1]):
+        return None
+    name = ' '.join(cells[:i])
+    if not _NAME_CELL_RE.fullmatch(name):
+        return None
+    change = cells[i]
+    return StockRow(name, change, float(cells[i + 1]), "元" if change.startswith('-') else "万元")
+
+
+class SegmentClassifier:
+    """
+    逐页累积OCR文本片段，分类为涨幅王、跌幅王与其他片段，最后统一清洗并组织成文
+    
+    分类与解析共用一次匹配；分页输入时只保留分类后的片段，不需要整份OCR结果。
+    """
+    
+    def __init__(self) -> None:
+        self.gainers_raw: List[str] = []
+        self.losers_raw: List[str] = []
+        self.gainer_rows: List[Optional[StockRow]] = []
+        self.loser_rows: List[Optional[StockRow]] = []
+        self.other_segments: List[str] = []
+        self.segment_count = 0
+        self._hook = _active_hook()
+        self._classify_seconds = 0.0
+    
+    def feed(self, segments: Iterable[str]) -> None:
+        """
+        分类一批文本片段
         
-        for segment in text_segments:
+        Args:
+            segments: 文本片段
+        """
+        mark = time.perf_counter() if self._hook is not None else 0.0
+        for segment in segments:
+            self.segment_count += 1
             if segment.strip():
-                if "%" in segment and re.search(r'[A-Za-z\u4e00-\u9fff\*]+\s*[+-]?\d+\.?\d*%', segment):
-                    # 根据涨跌幅判断是涨幅王还是跌幅王
-                    if re.search(r'-\d+\.?\d*%', segment):  # 包含负号的为跌幅王
-                        losers_raw.append(segment)
-                    else:  # 不包含负号的为涨幅王
-                        gainers_raw.append(segment)
-                else:
-                    other_segments.append(segment)
+                self._add(segment, parse_stock_row(segment) if "%" in segment else None)
+        if self._hook is not None:
+            self._classify_seconds += time.perf_counter() - mark
+    
+    def _add(self, segment: str, row: Optional[StockRow]) -> None:
+        if row is not None:
+            # 根据涨跌幅判断是涨幅王还是跌幅王：包含负号的为跌幅王
+            if row.change.startswith('-') or ('-' in segment and _LOSER_RE.search(segment)):
+                self.losers_raw.append(segment)
+                self.loser_rows.append(row)
+            else:
+                self.gainers_raw.append(segment)
+                self.gainer_rows.append(row)
+        else:
+            self.other_segments.append(segment)
+    
+    def feed_words(self, words: Iterable[Dict[str, Any]], layout: bool = False) -> None:
+        """
+        分类一页OCR结果中的 words
+        
+        Args:
+            words: 一页的 words
+            layout: 是否按文字框重建表格行（缺少文字框时退回按阅读顺序处理）
+        """
+        if layout:
+            words = list(words)
+            rows = reconstruct_rows(words)
+            if rows is not None:
+                self.feed_rows(rows)
+                return
+        self.feed(word.get('text', '') for word in words)
+    
+    def feed_rows(self, rows: Iterable[List[str]]) -> None:
+        """
+        分类按版面重建的表格行：结构完整的股票行直接按单元格取值，其余行按文本处理
+        
+        Args:
+            rows: 各行的单元格文本
+        """
+        mark = time.perf_counter() if self._hook is not None else 0.0
+        for cells in rows:
+            self.segment_count += 1
+            segment = ' '.join(cells)
+            row = parse_stock_cells(cells)
+            if row is None and "%" in segment:
+                row = parse_stock_row(segment)
+            self._add(segment, row)
+        if self._hook is not None:
+            self._classify_seconds += time.perf_counter() - mark
+    
+    def finish(self, out: Optional[TextIO] = None) -> str:
+        """
+        清洗已分类的片段并组织成结构化的内容
+        
+        Args:
+            out: 若提供，则直接写入该文本流而不在内存中拼接结果
         
-        # 清洗股票数据
-        gainers_cleaned = [clean_stock_data(segment) for segment in gainers_raw]
-        losers_cleaned = [clean_stock_data(segment) for segment in losers_raw]
+        Returns:
+            清洗后的文本内容；写入 out 时返回空字符串
+        """
+        hook = self._hook
+        stock_count = len(self.gainers_raw) + len(self.losers_raw)
+        if hook is not None:
+            hook('classify', self._classify_seconds, self.segment_count, stock_count, {
+                "gainers": len(self.gainers_raw),
+                "losers": len(self.losers_raw),
+                "other": len(self.other_segments),
+            })
+            mark = time.perf_counter()
+        
+        # 清洗股票数据：两张表按列存放，按复利关系修正有歧义的行
+        table = StockTable()
+        table.add_table(self.gainers_raw, self.gainer_rows)
+        table.add_table(self.losers_raw, self.loser_rows)
+        table.resolve()
+        gainers_cleaned = table.format_rows(0)
+        losers_cleaned = table.format_rows(1)
+        gainer_final, loser_final = table.final_assets()
         
         # 清洗其他文本片段
         cleaned_other = []
-        for segment in other_segments:
+        for segment in self.other_segments:
             cleaned = clean_text_segment(segment)
             if cleaned:
                 cleaned_other.append(cleaned)
         
+        if hook is not None:
+            now = time.perf_counter()
+            cleaned_count = len(gainers_cleaned) + len(losers_cleaned) + len(cleaned_other)
+            hook('clean', now - mark, stock_count + len(self.other_segments), cleaned_count, None)
+            mark = now
+        
         # 组织成结构化的内容
-        return organize_content_improved(cleaned_other, gainers_cleaned, losers_cleaned)
+        target = out if out is not None else io.StringIO()
+        written = write_content_improved(target, cleaned_other, gainers_cleaned, losers_cleaned,
+                                         gainer_final, loser_final)
+        if hook is not None:
+            hook('organize', time.perf_counter() - mark, cleaned_count, written, None)
+        return target.getvalue() if out is None else ""
+
+
+def extract_and_clean_ocr_data(json_data: Dict[str, Any], layout: bool = False) -> str:
+    """
+    从OCR JSON数据中提取并清洗文本（多页结果按顺序合并）
+    
+    Args:
+        json_data: OCR识别的JSON数据
+        layout: 是否按文字框重建表格行
+    
+    Returns:
+        清洗后的文本内容
+    """
+    try:
+        # 提取所有页的文本片段
+        results = json_data.get('data', {}).get('results', [{}])
+        if not results:
+            raise IndexError("data.results 为空")
+        classifier = SegmentClassifier()
+        for result in results:
+            classifier.feed_words(result.get('words', []), layout)
+        return classifier.finish()
         
     except (KeyError, IndexError) as e:
         print(f"❌ **严重错误** (Critical Error): JSON数据结构解析失败 - {e}")
         return ""
 
 
-def organize_content_improved(other_segments: List[str], gainers: List[str], losers: List[str]) -> str:
+# 流式读取时的 "words": [ 数组起点（排除字符串中被转义的引号）
+_WORDS_KEY_RE = re.compile(r'(?<!\\)"words"\s*:\s*\[')
+
+# words 数组中元素之间的空白与逗号
+_ARRAY_SEPARATOR_RE = re.compile(r'[\s,]*')
+
+_json_decoder = json.JSONDecoder()
+
+
+def iter_ocr_words(stream: Union[BinaryIO, TextIO],
+                   chunk_size: int = 64 * 1024) -> Iterator[Tuple[int, Dict[str, Any]]]:
     """
-    将清洗后的文本片段组织成结构化的内容（改进版）
+    增量读取OCR JSON，逐个产出 word 对象
+    
+    只在缓冲区中保留当前正在解析的 word 对象与一个读取块，
+    内存占用与整份响应（包括单页）的大小无关。
+    
+    Args:
+        stream: 以二进制或文本方式打开的 OCR JSON
+        chunk_size: 每次读取的大小
+    
+    Yields:
+        (页序号, word 对象)；页序号为 words 数组在响应中出现的顺序（从0开始）
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+    page = -1
+    in_words = False
+    
+    while True:
+        need_more = False
+        if not in_words:
+            match = _WORDS_KEY_RE.search(buffer, pos)
+            if match is None:
+                # 保留末尾可能被截断的键名
+                pos = max(pos, len(buffer) - 32)
+                need_more = True
+            else:
+                pos = match.end()
+                page += 1
+                in_words = True
+        else:
+            pos = _ARRAY_SEPARATOR_RE.match(buffer, pos).end()
+            if pos >= len(buffer):
+                need_more = True
+            elif buffer[pos] == ']':
+                pos += 1
+                in_words = False
+            else:
+                try:
+                    word, pos = _json_decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    need_more = True
+                else:
+                    yield page, word
+        
+        if need_more:
+            if eof:
+                return
+            chunk = stream.read(chunk_size)
+            if isinstance(chunk, bytes):
+                chunk = decoder.decode(chunk, final=not chunk)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def iter_ocr_pages(stream: Union[BinaryIO, TextIO], chunk_size: int = 64 * 1024) -> Iterator[List[Dict[str, Any]]]:
+    """
+    增量读取OCR JSON，逐页产出 words（空页不产出）
+    
+    Args:
+        stream: 以二进制或文本方式打开的 OCR JSON
+        chunk_size: 每次读取的大小
+    
+    Yields:
+        每页（每个 results 元素）的 words 列表
+    """
+    for _, words in groupby(iter_ocr_words(stream, chunk_size), key=itemgetter(0)):
+        yield [word for _, word in words]
+
+
+def extract_and_clean_ocr_stream(stream: Union[BinaryIO, TextIO], layout: bool = False,
+                                 out: Optional[TextIO] = None) -> str:
+    """
+    流式读取OCR JSON并清洗（处理全部 results）
+    
+    版面模式需要整页的文字框，按页读取；否则逐个 word 读取。
+    
+    Args:
+        stream: 以二进制或文本方式打开的 OCR JSON
+        layout: 是否按文字框重建表格行
+        out: 若提供，则直接写入该文本流
+    
+    Returns:
+        清洗后的文本内容；写入 out 时返回空字符串
+    """
+    classifier = SegmentClassifier()
+    if layout:
+        for words in iter_ocr_pages(stream):
+            classifier.feed_words(words, layout=True)
+    else:
+        classifier.feed_words(word for _, word in iter_ocr_words(stream))
+    return classifier.finish(out)
+
+
+def iter_ocr_inputs(paths: Iterable[str], layout: bool = False) -> Iterator[Tuple[str, str]]:
+    """
+    清洗一组OCR输入：JSON 文件、JSONL 文件（每行一份响应）或包含它们的目录
+    
+    Args:
+        paths: 文件或目录路径
+        layout: 是否按文字框重建表格行
+    
+    Yields:
+        (来源, 清洗后的文本)；JSONL 的来源为 "文件名:行号"
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.endswith(('.json', '.jsonl')))
+            yield from iter_ocr_inputs((os.path.join(path, name) for name in names), layout)
+        elif path.endswith('.jsonl'):
+            with open(path, 'rb') as f:
+                for line_no, line in enumerate(f, 1):
+                    if line.strip():
+                        yield f"{path}:{line_no}", extract_and_clean_ocr_stream(io.BytesIO(line), layout)
+        else:
+            with open(path, 'rb') as f:
+                yield path, extract_and_clean_ocr_stream(f, layout)
+
+
+# 章节关键词表：每个片段按表中顺序归入同组内第一个匹配的章节
+#   keywords —— 关键词；match 为 "all" 时需全部出现，默认出现任一即可
+#   role     —— title / theme 取最后一个匹配的片段，section 输出为 "标题\n片段"
+#   group    —— header 位于股票表之前，footer 位于股票表之后，各组独立匹配
+#   table    —— 股票表的引导段落（organize_content 据此切换当前的表）
+SECTION_RULES: List[Dict[str, Any]] = [
+    {"name": "title", "keywords": ["东方财富", "权威"], "match": "all", "role": "title"},
+    {"name": "theme", "keywords": ["2024年A股年度盘点"], "role": "theme"},
+    {"name": "assumption", "keywords": ["年初1万元入市"], "heading": "## 投资假设"},
+    {"name": "goal", "keywords": ["如何赚到"], "heading": "## 投资目标"},
+    {"name": "gainer_strategy", "keywords": ["连续买入月度涨幅王"], "heading": "## 涨幅王投资策略",
+     "table": "gainers"},
+    {"name": "loser_strategy", "keywords": ["连续买入月度跌幅王"], "heading": "## 跌幅王投资策略",
+     "table": "losers"},
+    {"name": "notes", "keywords": ["数据来源", "截至"], "heading": "## 数据说明", "group": "footer"},
+]
+
+
+class SectionRule:
+    """章节规则"""
+    __slots__ = ('order', 'name', 'keywords', 'require_all', 'role', 'heading', 'group', 'table')
+    
+    def __init__(self, order: int, spec: Dict[str, Any]) -> None:
+        self.order = order
+        self.name: str = spec['name']
+        self.keywords = frozenset(spec['keywords'])
+        self.require_all = spec.get('match', 'any') == 'all'
+        self.role: str = spec.get('role', 'section')
+        self.heading: str = spec.get('heading', '')
+        self.group: str = spec.get('group', 'header')
+        self.table: Optional[str] = spec.get('table')
+    
+    def accepts(self, found: frozenset) -> bool:
+        return self.keywords <= found if self.require_all else not self.keywords.isdisjoint(found)
+
+
+class SectionTable:
+    """
+    编译后的章节关键词表
+    
+    所有关键词编译为一个分支正则，每个片段只扫描一次即可得到其中出现的全部关键词，
+    再只检查涉及这些关键词的规则，开销与规则总数无关。
+    """
+    
+    def __init__(self, rules: List[Dict[str, Any]]) -> None:
+        self.rules = [SectionRule(order, spec) for order, spec in enumerate(rules)]
+        self._by_keyword: Dict[str, List[SectionRule]] = {}
+        for rule in self.rules:
+            for keyword in rule.keywords:
+                self._by_keyword.setdefault(keyword, []).append(rule)
+        keywords = sorted(self._by_keyword, key=len, reverse=True)
+        # 同一位置只能命中最长的关键词，其前缀关键词由 _implied 补上
+        self._implied = {
+            keyword: frozenset(other for other in keywords if keyword.startswith(other))
+            for keyword in keywords
+        }
+        # 纯字面量分支：正则引擎可按首字符集合快速跳过无关文本
+        self._pattern = re.compile('|'.join(map(re.escape, keywords))) if keywords else None
+    
+    def matches(self, segment: str) -> List[SectionRule]:
+        """
+        片段匹配的全部规则（按表中顺序）
+        
+        Args:
+            segment: 文本片段
+        
+        Returns:
+            匹配的规则列表
+        """
+        if self._pattern is None:
+            return []
+        found: frozenset = frozenset()
+        search = self._pattern.search
+        match = search(segment)
+        while match is not None:
+            found |= self._implied[match.group()]
+            # 从下一个字符继续查找，重叠的关键词也不会漏掉
+            match = search(segment, match.start() + 1)
+        return self._rules_for(found)
+    
+    def _rules_for(self, found: frozenset) -> List[SectionRule]:
+        if not found:
+            return []
+        candidates = {rule for keyword in found for rule in self._by_keyword[keyword]}
+        return sorted((rule for rule in candidates if rule.accepts(found)), key=lambda rule: rule.order)
+    
+    def match_segments(self, segments: List[str]) -> Dict[int, List[SectionRule]]:
+        """
+        对一组片段整体扫描一次，得到每个片段匹配的规则
+        
+        片段以换行拼接后只做一次正则扫描，命中位置按偏移量映射回片段；
+        没有任何关键词的片段不产生 Python 层面的开销。
+        
+        Args:
+            segments: 文本片段列表（片段中的换行不影响结果，关键词不含换行）
+        
+        Returns:
+            片段下标到匹配规则的映射，只包含有匹配的片段
+        """
+        if self._pattern is None or not segments:
+            return {}
+        text = '\n'.join(segments)
+        starts: List[int] = []
+        offset = 0
+        for segment in segments:
+            starts.append(offset)
+            offset += len(segment) + 1
+        found: Dict[int, frozenset] = {}
+        search = self._pattern.search
+        match = search(text)
+        while match is not None:
+            index = bisect_right(starts, match.start()) - 1
+            found[index] = found.get(index, frozenset()) | self._implied[match.group()]
+            # 从下一个字符继续查找，重叠的关键词也不会漏掉
+            match = search(text, match.start() + 1)
+        result = {}
+        for index in sorted(found):
+            rules = self._rules_for(found[index])
+            if rules:
+                result[index] = rules
+        return result
+
+
+_default_sections = SectionTable(SECTION_RULES)
+
+
+def _write_report(out: TextIO, title: str, theme: str, parts: Iterable[str], summary: str) -> int:
+    """
+    按固定版式写出报告，各部分之间以换行分隔
+    
+    Returns:
+        写出的字符数
+    """
+    written = out.write(f"# {title}\n\n## 主题\n{theme}\n\n")
+    first = True
+    for part in parts:
+        if not first:
+            written += out.write('\n')
+        written += out.write(part)
+        first = False
+    written += out.write('\n\n')
+    written += out.write(summary)
+    return written
+
+
+def _stock_block(heading: str, rows: List[str], trailing_blank: bool) -> Iterator[str]:
+    """股票表作为一个整块写出，避免逐行调用 write"""
+    if rows:
+        block = heading + '\n- ' + '\n- '.join(rows)
+        yield block + '\n' if trailing_blank else block  # 末尾空行分隔
+
+
+def write_content_improved(out: TextIO, other_segments: List[str], gainers: List[str], losers: List[str],
+                           gainer_final: Optional[float] = None, loser_final: Optional[float] = None,
+                           sections: Optional[SectionTable] = None) -> int:
+    """
+    将清洗后的文本片段组织成结构化的内容，直接写入文件对象
     
     Args:
+        out: 输出的文本流
         other_segments: 其他文本片段列表
         gainers: 涨幅王股票列表
         losers: 跌幅王股票列表
+        gainer_final: 涨幅王表的最终资产（元），缺省时取自 gainers 的最后一行
+        loser_final: 跌幅王表的最终资产（元），缺省时取自 losers 的最后一行
+        sections: 章节关键词表，默认为 SECTION_RULES
     
     Returns:
-        结构化的文本内容
+        写出的字符数
     """
-    content_parts = []
-    
-    # 提取标题和主题
+    sections = sections or _default_sections
     title = ""
     theme = ""
+    header_parts: List[str] = []
+    footer_parts: List[str] = []
     
-    for segment in other_segments:
-        if "东方财富" in segment and "权威" in segment:
-            title = segment
-        elif "2024年A股年度盘点" in segment:
-            theme = segment
-        elif "年初1万元入市" in segment:
-            content_parts.append(f"## 投资假设\n{segment}")
-        elif "如何赚到" in segment:
-            content_parts.append(f"## 投资目标\n{segment}")
-        elif "连续买入月度涨幅王" in segment:
-            content_parts.append(f"## 涨幅王投资策略\n{segment}")
-        elif "连续买入月度跌幅王" in segment:
-            content_parts.append(f"## 跌幅王投资策略\n{segment}")
-    
-    # 添加涨幅王数据
-    if gainers:
-        content_parts.append("### 月度涨幅王股票表现:")
-        for gainer in gainers:
-            content_parts.append(f"- {gainer}")
-        content_parts.append("")  # 添加空行分隔
-    
-    # 添加跌幅王数据
-    if losers:
-        content_parts.append("### 月度跌幅王股票表现:")
-        for loser in losers:
-            content_parts.append(f"- {loser}")
-        content_parts.append("")  # 添加空行分隔
-    
-    # 添加数据来源
-    for segment in other_segments:
-        if "数据来源" in segment or "截至" in segment:
-            content_parts.append(f"## 数据说明\n{segment}")
-    
-    # 组合最终内容
-    final_content = f"""# {title}
-
-## 主题
-{theme}
-
-{chr(10).join(content_parts)}
-
-## 总结
-本报告展示了2024年A股市场的极端投资情况：
-1. 如果每月都买入当月涨幅最大的股票，1万元本金最终可达到114亿元
-2. 如果每月都买入当月跌幅最大的股票，1万元本金最终仅剩3.61元
-3. 这充分说明了股票投资的风险与收益并存，以及选股的重要性
-"""
+    # 一次扫描完成章节归类
+    for index, rules in sections.match_segments(other_segments).items():
+        segment = other_segments[index]
+        seen_groups = set()
+        for rule in rules:
+            if rule.group in seen_groups:
+                continue
+            seen_groups.add(rule.group)
+            if rule.role == 'title':
+                title = segment
+            elif rule.role == 'theme':
+                theme = segment
+            else:
+                (footer_parts if rule.group == 'footer' else header_parts).append(f"{rule.heading}\n{segment}")
+    
+    # 根据数据计算总结
+    if gainer_final is None:
+        gainer_final = _final_asset_from_text(gainers)
+    if loser_final is None:
+        loser_final = _final_asset_from_text(losers)
+    summary = _summary(gainer_final, loser_final)
+    
+    parts = chain(
+        header_parts,
+        _stock_block("### 月度涨幅王股票表现:", gainers, True),
+        _stock_block("### 月度跌幅王股票表现:", losers, True),
+        footer_parts,
+    )
+    return _write_report(out, title, theme, parts, summary)
+
+
+def organize_content_improved(other_segments: List[str], gainers: List[str], losers: List[str],
+                              gainer_final: Optional[float] = None,
+                              loser_final: Optional[float] = None,
+                              sections: Optional[SectionTable] = None) -> str:
+    """
+    将清洗后的文本片段组织成结构化的内容（改进版）
+    
+    Args:
+        other_segments: 其他文本片段列表
+        gainers: 涨幅王股票列表
+        losers: 跌幅王股票列表
+        gainer_final: 涨幅王表的最终资产（元），缺省时取自 gainers 的最后一行
+        loser_final: 跌幅王表的最终资产（元），缺省时取自 losers 的最后一行
+        sections: 章节关键词表，默认为 SECTION_RULES
     
-    return final_content
+    Returns:
+        结构化的文本内容
+    """
+    out = io.StringIO()
+    write_content_improved(out, other_segments, gainers, losers, gainer_final, loser_final, sections)
+    return out.getvalue()
 
 
-def organize_content(segments: List[str]) -> str:
+def organize_content(segments: List[str], sections: Optional[SectionTable] = None) -> str:
     """
     将清洗后的文本片段组织成结构化的内容
     
+    股票行按其前面最近的股票表引导段落（涨幅王/跌幅王投资策略）归类。
+    
     Args:
         segments: 清洗后的文本片段列表
+        sections: 章节关键词表，默认为 SECTION_RULES
     
     Returns:
         结构化的文本内容
     """
-    content_parts = []
-    
-    # 提取标题和主题
+    sections = sections or _default_sections
     title = ""
     theme = ""
+    header_parts: List[str] = []
+    strategy_parts: List[str] = []
+    footer_parts: List[str] = []
+    tables: Dict[str, List[str]] = {"gainers": [], "losers": []}
+    current_table: Optional[str] = None
     
-    for segment in segments:
-        if "东方财富" in segment and "权威" in segment:
-            title = segment
-        elif "2024年A股年度盘点" in segment:
-            theme = segment
-        elif "年初1万元入市" in segment:
-            content_parts.append(f"## 投资假设\n{segment}")
-        elif "如何赚到" in segment:
-            content_parts.append(f"## 投资目标\n{segment}")
-    
-    # 提取涨幅王数据
-    gainers = []
-    losers = []
-    in_gainers_section = False
-    in_losers_section = False
-    
-    for segment in segments:
-        if "连续买入月度涨幅王" in segment:
-            in_gainers_section = True
-            in_losers_section = False
-            content_parts.append(f"## 涨幅王投资策略\n{segment}")
-        elif "连续买入月度跌幅王" in segment:
-            in_gainers_section = False
-            in_losers_section = True
-            content_parts.append(f"## 跌幅王投资策略\n{segment}")
-        elif in_gainers_section and "%" in segment and any(char.isdigit() for char in segment):
-            gainers.append(segment)
-        elif in_losers_section and "%" in segment and any(char.isdigit() for char in segment):
-            losers.append(segment)
-    
-    # 添加涨幅王数据
-    if gainers:
-        content_parts.append("### 月度涨幅王股票表现:")
-        for gainer in gainers:
-            content_parts.append(f"- {gainer}")
-    
-    # 添加跌幅王数据
-    if losers:
-        content_parts.append("### 月度跌幅王股票表现:")
-        for loser in losers:
-            content_parts.append(f"- {loser}")
-    
-    # 添加数据来源
-    for segment in segments:
-        if "数据来源" in segment or "截至" in segment:
-            content_parts.append(f"## 数据说明\n{segment}")
-    
-    # 组合最终内容
-    final_content = f"""# {title}
-
-## 主题
-{theme}
-
-{chr(10).join(content_parts)}
-
-## 总结
-本报告展示了2024年A股市场的极端投资情况：
-1. 如果每月都买入当月涨幅最大的股票，1万元本金最终可达到114亿元
-2. 如果每月都买入当月跌幅最大的股票，1万元本金最终仅剩3.61元
-3. 这充分说明了股票投资的风险与收益并存，以及选股的重要性
-"""
+    # 一次扫描完成章节归类，再一次遍历收集股票行
+    matched = sections.match_segments(segments)
+    for index, segment in enumerate(segments):
+        header_rule = table_rule = footer_rule = None
+        for rule in matched.get(index, ()):
+            if rule.group == 'footer':
+                footer_rule = footer_rule or rule
+            elif rule.table is not None:
+                table_rule = table_rule or rule
+            else:
+                header_rule = header_rule or rule
+        
+        if header_rule is not None:
+            if header_rule.role == 'title':
+                title = segment
+            elif header_rule.role == 'theme':
+                theme = segment
+            else:
+                header_parts.append(f"{header_rule.heading}\n{segment}")
+        
+        if table_rule is not None:
+            current_table = table_rule.table
+            strategy_parts.append(f"{table_rule.heading}\n{segment}")
+        elif current_table is not None and "%" in segment and any(char.isdigit() for char in segment):
+            tables.setdefault(current_table, []).append(segment)
+        
+        if footer_rule is not None:
+            footer_parts.append(f"{footer_rule.heading}\n{segment}")
     
-    return final_content
+    # 原始股票行按列解析，取两张表的最终资产
+    gainers, losers = tables["gainers"], tables["losers"]
+    gainer_final, loser_final = parse_stock_tables([gainers, losers]).final_assets()
+    
+    out = io.StringIO()
+    parts = chain(
+        header_parts,
+        strategy_parts,
+        _stock_block("### 月度涨幅王股票表现:", gainers, False),
+        _stock_block("### 月度跌幅王股票表现:", losers, False),
+        footer_parts,
+    )
+    _write_report(out, title, theme, parts, _summary(gainer_final, loser_final))
+    return out.getvalue()
 
 
-def main():
+def main(argv: Optional[List[str]] = None) -> None:
     """
     主函数：读取JSON数据并生成清洗后的内容
+    
+    指定输入路径（JSON、JSONL 或目录）时流式清洗这些输入，否则清洗内置的示例数据。
     """
+    parser = argparse.ArgumentParser(description="清洗OCR识别结果")
+    parser.add_argument("inputs", nargs="*", help="OCR JSON / JSONL 文件或目录")
+    parser.add_argument("-o", "--output", default=None, help="输出 JSONL 文件，默认打印到标准输出")
+    parser.add_argument("--layout", action="store_true", help="按文字框重建表格行（需要OCR结果带位置信息）")
+    args = parser.parse_args(argv)
+    if args.inputs:
+        output = open(args.output, 'w', encoding='utf-8') if args.output else None
+        try:
+            count = 0
+            for source, cleaned_content in iter_ocr_inputs(args.inputs, args.layout):
+                count += 1
+                if output is not None:
+                    output.write(json.dumps({"source": source, "content": cleaned_content}, ensure_ascii=False))
+                    output.write('\n')
+                else:
+                    print(f"🔧 **清洗后的内容** (Cleaned Content): {source}")
+                    print("=" * 50)
+                    print(cleaned_content)
+                    print("=" * 50)
+        finally:
+            if output is not None:
+                output.close()
+        print(f"✅ 清洗完成！共处理 {count} 份OCR结果")
+        return
+    
     # 示例JSON数据（实际使用时可以从文件读取）
     sample_data = {
         "log_id": "202507231641305B1578C3694087D00400",
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量清洗结果的列式存储
+数百万条 Output 字典常驻内存做聚合、或写成 JSON 时，内存与序列化开销都很大，
+而图片URL的主机、股票名称、小节标题等取值大量重复。这里按列存放批量结果：
+数值列为 array，重复取值（标题、状态、图片URL的主机与路径、OCR 报告的各行）
+登记在字符串字典中、以编号引用，每条记录只是带 __slots__ 的轻量视图。
+每列另有一个存在位图，按 fields 只输出部分字段的 Output 还原后仍只有原有的键。
+
+磁盘格式：文件头 + 列目录 + 字符串字典块 + 各列数据块，每块记录长度、按8字节对齐。
+读取时以 mmap 映射文件，只解析被访问的列（数值列直接以 memoryview 视图读取），
+只扫描 image_urls 或 word_count 时无需解析整条记录。
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+# 文件头：魔数、格式版本、列数、记录数
+_MAGIC = b'COL1'
+_VERSION = 2
+_HEADER = struct.Struct('<4sHHQ')
+
+# 列目录项：类型、保留字节、列名长度、数据块偏移、数据块长度（其后紧跟列名）
+_ENTRY = struct.Struct('<BxHQQ')
+
+# 字典块的偏移与长度（紧跟在列目录之后）
+_DICTIONARY = struct.Struct('<QQ')
+
+# 列类型
+INT = 1         # 整数
+STR = 2         # 登记在字典中的字符串
+TEXT = 3        # 不登记的长文本（如网页正文）
+STR_LIST = 4    # 字符串列表，各项登记在字典中
+LINES = 5       # 按行登记的文本（OCR 报告的标题、股票名称行大量重复）
+URL_LIST = 6    # URL 列表，主机前缀与路径分别登记
+
+# 网页清洗结果（Output）的列
+WEB_SCHEMA: Tuple[Tuple[str, int], ...] = (
+    ("title", STR),
+    ("content", TEXT),
+    ("image_urls", URL_LIST),
+    ("image_count", INT),
+    ("word_count", INT),
+    ("extract_status", STR),
+    ("image_status", STR_LIST),
+)
+
+# OCR 清洗结果的列
+OCR_SCHEMA: Tuple[Tuple[str, int], ...] = (
+    ("source", STR),
+    ("content", LINES),
+)
+
+_SCHEMAS = {"web": WEB_SCHEMA, "ocr": OCR_SCHEMA}
+
+
+def split_url(url: str) -> Tuple[str, str]:
+    """把URL拆为 (协议与主机, 路径及其后部分)"""
+    scheme_end = url.find('://')
+    if scheme_end < 0:
+        return '', url
+    path_start = url.find('/', scheme_end + 3)
+    if path_start < 0:
+        return url, ''
+    return url[:path_start], url[path_start:]
+
+
+def _pad(size: int) -> int:
+    return -size % 8
+
+
+def _has_bit(bitmap: Any, row: int) -> bool:
+    return bool(bitmap[row >> 3] >> (row & 7) & 1)
+
+
+class StringPool:
+    """字符串字典：相同的字符串只存一份，以整数编号引用"""
+    __slots__ = ('strings', '_ids')
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, index: int) -> str:
+        return self.strings[index]
+
+    def intern(self, value: str) -> int:
+        """登记字符串，返回其编号"""
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+class _Column:
+    """内存中的一列"""
+    __slots__ = ('name', 'kind', 'rows', 'present', 'values', 'offsets', 'ids', 'paths')
+
+    def __init__(self, name: str, kind: int) -> None:
+        self.name = name
+        self.kind = kind
+        self.rows = 0
+        # 存在位图：第 i 位表示第 i 条记录是否有该键（缺失的记录在各数据段中存为空值）
+        self.present = bytearray()
+        self.values: Any = array('q') if kind == INT else (array('I') if kind == STR else [])
+        # 列表与按行文本：各记录在 ids 中的起点（末尾为总项数）
+        self.offsets = array('q', [0])
+        self.ids = array('I')
+        # URL 列表：路径的编号（ids 为主机前缀的编号）
+        self.paths = array('I')
+
+    def append(self, value: Any, pool: StringPool) -> None:
+        row = self.rows
+        if not row & 7:
+            self.present.append(0)
+        if value is not None:
+            self.present[row >> 3] |= 1 << (row & 7)
+        self.rows += 1
+        kind = self.kind
+        if kind == INT:
+            self.values.append(value or 0)
+        elif kind == STR:
+            self.values.append(pool.intern(value or ''))
+        elif kind == TEXT:
+            self.values.append(value or '')
+        else:
+            if kind == LINES:
+                items: Iterable[str] = (value or '').split('\n')
+            else:
+                items = value or ()
+            intern = pool.intern
+            if kind == URL_LIST:
+                for url in items:
+                    host, path = split_url(url)
+                    self.ids.append(intern(host))
+                    self.paths.append(intern(path))
+            else:
+                self.ids.extend(intern(item) for item in items)
+            self.offsets.append(len(self.ids))
+
+    def get(self, row: int, pool: Sequence[str]) -> Any:
+        if not _has_bit(self.present, row):
+            return None
+        kind = self.kind
+        if kind == INT:
+            return self.values[row]
+        if kind == STR:
+            return pool[self.values[row]]
+        if kind == TEXT:
+            return self.values[row]
+        start, end = self.offsets[row], self.offsets[row + 1]
+        if kind == URL_LIST:
+            return [pool[host] + pool[path] for host, path in zip(self.ids[start:end], self.paths[start:end])]
+        items = [pool[index] for index in self.ids[start:end]]
+        return '\n'.join(items) if kind == LINES else items
+
+    def encode(self) -> bytes:
+        """编码为数据块（各段按8字节对齐）"""
+        parts: List[bytes] = []
+
+        def section(data: bytes) -> None:
+            parts.append(data)
+            parts.append(b'\0' * _pad(len(data)))
+
+        section(bytes(self.present))
+        if self.kind in (INT, STR):
+            section(self.values.tobytes())
+        elif self.kind == TEXT:
+            blob = bytearray()
+            offsets = array('q', [0])
+            for value in self.values:
+                blob += value.encode('utf-8', 'surrogatepass')
+                offsets.append(len(blob))
+            section(offsets.tobytes())
+            section(bytes(blob))
+        else:
+            section(self.offsets.tobytes())
+            section(self.ids.tobytes())
+            if self.kind == URL_LIST:
+                section(self.paths.tobytes())
+        return b''.join(parts)
+
+
+class OutputRecord:
+    """批量结果中一条记录的视图（按需从各列取值）"""
+    __slots__ = ('_batch', '_row')
+
+    def __init__(self, batch: Any, row: int) -> None:
+        self._batch = batch
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._batch.value(key, self._row)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._batch.value(key, self._row)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """还原为字典（缺失的键不出现）"""
+        return self._batch.record_dict(self._row)
+
+
+class OutputBatch:
+    """
+    列式存放的批量结果
+
+    append 逐条追加 Output（或 OCR 结果）字典，索引得到 OutputRecord 视图，
+    column 取整列，write 写成列式文件。
+    """
+
+    def __init__(self, kind: str = "web") -> None:
+        """
+        Args:
+            kind: "web"（Output）或 "ocr"（{"source", "content"}）
+        """
+        if kind not in _SCHEMAS:
+            raise ValueError(f"未知的结果类型: {kind}")
+        self.kind = kind
+        self.pool = StringPool()
+        self._columns = {name: _Column(name, column_kind) for name, column_kind in _SCHEMAS[kind]}
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, row: int) -> OutputRecord:
+        if not -self._rows <= row < self._rows:
+            raise IndexError(row)
+        return OutputRecord(self, row % self._rows)
+
+    def __iter__(self) -> Iterator[OutputRecord]:
+        return (OutputRecord(self, row) for row in range(self._rows))
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def append(self, output: Dict[str, Any]) -> None:
+        """追加一条结果"""
+        pool = self.pool
+        for name, column in self._columns.items():
+            column.append(output.get(name), pool)
+        self._rows += 1
+
+    def extend(self, outputs: Iterable[Dict[str, Any]]) -> None:
+        for output in outputs:
+            self.append(output)
+
+    def value(self, name: str, row: int) -> Any:
+        """第 row 条记录的 name 字段；缺失时返回 None"""
+        return self._columns[name].get(row, self.pool.strings)
+
+    def column(self, name: str) -> List[Any]:
+        """整列的值"""
+        column = self._columns[name]
+        strings = self.pool.strings
+        return [column.get(row, strings) for row in range(self._rows)]
+
+    def record_dict(self, row: int) -> Dict[str, Any]:
+        strings = self.pool.strings
+        record = {}
+        for name, column in self._columns.items():
+            value = column.get(row, strings)
+            if value is not None:
+                record[name] = value
+        return record
+
+    def write(self, path: str) -> int:
+        """
+        写出列式文件
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            int: 写入的字节数
+        """
+        with open(path, 'wb') as f:
+            return self.dump(f)
+
+    def dump(self, stream: Any) -> int:
+        """把列式文件写入二进制流，返回写入的字节数"""
+        blocks = [column.encode() for column in self._columns.values()]
+        blob = bytearray()
+        offsets = array('q', [0])
+        for value in self.pool.strings:
+            blob += value.encode('utf-8', 'surrogatepass')
+            offsets.append(len(blob))
+        dictionary = struct.pack('<q', len(self.pool)) + offsets.tobytes() + bytes(blob)
+
+        names = [name.encode('utf-8') for name in self._columns]
+        head_size = _HEADER.size + sum(_ENTRY.size + len(name) for name in names) + _DICTIONARY.size
+        position = head_size + _pad(head_size)
+        dictionary_offset = position
+        position += len(dictionary) + _pad(len(dictionary))
+        entries = []
+        for name, column, block in zip(names, self._columns.values(), blocks):
+            entries.append(_ENTRY.pack(column.kind, len(name), position, len(block)) + name)
+            position += len(block) + _pad(len(block))
+
+        written = 0
+        for data in ([_HEADER.pack(_MAGIC, _VERSION, len(names), self._rows)] + entries
+                     + [_DICTIONARY.pack(dictionary_offset, len(dictionary)), b'\0' * _pad(head_size),
+                        dictionary, b'\0' * _pad(len(dictionary))]):
+            written += stream.write(data)
+        for block in blocks:
+            written += stream.write(block)
+            written += stream.write(b'\0' * _pad(len(block)))
+        return written
+
+
+class MappedColumn:
+    """
+    映射文件中的一列（只读）
+
+    INT 列的 values 与 STR 列的 values（字典编号）、列表列的 offsets / ids 均为
+    直接引用映射内存的 memoryview，可不经解码整列扫描。
+    """
+
+    def __init__(self, source: 'ColumnarFile', kind: int, offset: int, rows: int) -> None:
+        self.kind = kind
+        self._source = source
+        self._rows = rows
+        position = offset
+
+        def take(size: int, fmt: Optional[str] = None) -> memoryview:
+            nonlocal position
+            view = source._view(position, size, fmt)
+            position += size + _pad(size)
+            return view
+
+        self.present = take((rows + 7) // 8)
+        self.values: Optional[memoryview] = None
+        self.offsets: Optional[memoryview] = None
+        self.ids: Optional[memoryview] = None
+        self.paths: Optional[memoryview] = None
+        self._text_base = 0
+        if kind == INT:
+            self.values = take(8 * rows, 'q')
+        elif kind == STR:
+            self.values = take(4 * rows, 'I')
+        else:
+            self.offsets = take(8 * (rows + 1), 'q')
+            if kind == TEXT:
+                self._text_base = position
+            else:
+                items = self.offsets[rows]
+                self.ids = take(4 * items, 'I')
+                if kind == URL_LIST:
+                    self.paths = take(4 * items, 'I')
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self[row] for row in range(self._rows))
+
+    def __getitem__(self, row: int) -> Any:
+        """第 row 条记录的值；缺失时为 None"""
+        if not 0 <= row < self._rows:
+            raise IndexError(row)
+        if not _has_bit(self.present, row):
+            return None
+        kind = self.kind
+        string = self._source.string
+        if kind == INT:
+            return self.values[row]
+        if kind == STR:
+            return string(self.values[row])
+        start, end = self.offsets[row], self.offsets[row + 1]
+        if kind == TEXT:
+            return self._source._map[self._text_base + start:self._text_base + end].decode('utf-8', 'surrogatepass')
+        if kind == URL_LIST:
+            return [string(self.ids[i]) + string(self.paths[i]) for i in range(start, end)]
+        items = [string(self.ids[i]) for i in range(start, end)]
+        return '\n'.join(items) if kind == LINES else items
+
+
+class ColumnarFile:
+    """
+    以 mmap 读取列式文件
+
+    打开时只解析文件头与列目录；column 按列名返回该列的视图，不解析其他列。
+    字典中的字符串在首次访问时解码并缓存，同一编号始终返回同一个 str 对象。
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: 列式文件路径
+        """
+        self._file = open(path, 'rb')
+        self._views: List[memoryview] = []
+        self._columns: Dict[str, MappedColumn] = {}
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"不是列式结果文件: {path}")
+        if len(self._map) < _HEADER.size or _HEADER.unpack_from(self._map)[:2] != (_MAGIC, _VERSION):
+            self.close()
+            raise ValueError(f"不是列式结果文件或版本不受支持: {path}")
+        _, _, column_count, self._rows = _HEADER.unpack_from(self._map)
+
+        self._entries: Dict[str, Tuple[int, int]] = {}
+        position = _HEADER.size
+        for _ in range(column_count):
+            kind, name_length, offset, _ = _ENTRY.unpack_from(self._map, position)
+            position += _ENTRY.size
+            name = self._map[position:position + name_length].decode('utf-8')
+            position += name_length
+            self._entries[name] = (kind, offset)
+
+        dictionary_offset, _ = _DICTIONARY.unpack_from(self._map, position)
+        count = struct.unpack_from('<q', self._map, dictionary_offset)[0]
+        self._string_offsets = self._view(dictionary_offset + 8, 8 * (count + 1), 'q')
+        self._string_base = dictionary_offset + 8 * (count + 2)
+        self._strings: List[Optional[str]] = [None] * count
+
+    def __enter__(self) -> 'ColumnarFile':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, row: int) -> OutputRecord:
+        if not -self._rows <= row < self._rows:
+            raise IndexError(row)
+        return OutputRecord(self, row % self._rows)
+
+    def __iter__(self) -> Iterator[OutputRecord]:
+        return (OutputRecord(self, row) for row in range(self._rows))
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._entries)
+
+    def close(self) -> None:
+        """释放所有视图并关闭映射"""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._columns.clear()
+        self._map.close()
+        self._file.close()
+
+    def _view(self, offset: int, length: int, fmt: Optional[str] = None) -> memoryview:
+        view = memoryview(self._map)[offset:offset + length]
+        self._views.append(view)
+        if fmt is not None:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def string(self, index: int) -> str:
+        """字典中第 index 个字符串"""
+        value = self._strings[index]
+        if value is None:
+            offsets = self._string_offsets
+            start = self._string_base + offsets[index]
+            end = self._string_base + offsets[index + 1]
+            value = self._strings[index] = self._map[start:end].decode('utf-8', 'surrogatepass')
+        return value
+
+    def column(self, name: str) -> MappedColumn:
+        """按列名取列视图"""
+        column = self._columns.get(name)
+        if column is None:
+            kind, offset = self._entries[name]
+            column = self._columns[name] = MappedColumn(self, kind, offset, self._rows)
+        return column
+
+    def value(self, name: str, row: int) -> Any:
+        return self.column(name)[row]
+
+    def record_dict(self, row: int) -> Dict[str, Any]:
+        record = {}
+        for name in self._entries:
+            value = self.column(name)[row]
+            if value is not None:
+                record[name] = value
+        return record
+
+
+def pack_jsonl(lines: Iterable[str], kind: Optional[str] = None) -> OutputBatch:
+    """
+    把 JSONL 结果装入列式容器
+
+    支持 batch_clean / dump_scanner 的 {"output": Output} 行（失败的行跳过）
+    与 clean_ocr 的 {"source", "content"} 行。
+
+    Args:
+        lines: JSONL 文本行
+        kind: "web" 或 "ocr"，默认按第一条记录判断
+
+    Returns:
+        OutputBatch: 列式容器
+    """
+    batch: Optional[OutputBatch] = OutputBatch(kind) if kind else None
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if batch is None:
+            batch = OutputBatch("web" if "output" in record else "ocr")
+        if batch.kind == "web":
+            if "output" in record:
+                batch.append(record["output"])
+        elif "content" in record:
+            batch.append(record)
+    return batch if batch is not None else OutputBatch(kind or "web")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口：把 JSONL 结果转换为列式文件，或从列式文件中输出一列
+    """
+    parser = argparse.ArgumentParser(description="批量清洗结果的列式存储")
+    parser.add_argument("input", help="JSONL 结果文件（转换）或列式文件（读取）")
+    parser.add_argument("-o", "--output", default=None, help="转换时的列式文件路径")
+    parser.add_argument("--kind", choices=sorted(_SCHEMAS), default=None, help="结果类型，默认自动判断")
+    parser.add_argument("--column", default=None, help="读取时输出的列名，每行一个 JSON 值")
+    args = parser.parse_args(argv)
+
+    with open(args.input, 'rb') as f:
+        is_columnar = f.read(len(_MAGIC)) == _MAGIC
+    if is_columnar:
+        with ColumnarFile(args.input) as columnar:
+            if args.column is None:
+                print(f"📊 记录 {len(columnar)} 条，列：{', '.join(columnar.column_names)}")
+                return 0
+            out: TextIO = sys.stdout
+            for value in columnar.column(args.column):
+                out.write(json.dumps(value, ensure_ascii=False))
+                out.write('\n')
+        return 0
+
+    if args.output is None:
+        parser.error("转换 JSONL 时需要指定 -o/--output")
+    with open(args.input, 'r', encoding='utf-8') as f:
+        batch = pack_jsonl(f, args.kind)
+    size = batch.write(args.output)
+    print(f"✅ 记录 {len(batch)} 条，字典 {len(batch.pool)} 项，写入 {size / 1e6:.2f} MB", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
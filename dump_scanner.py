@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫转储文件的字节级清洗
+转储文件以 mmap 方式映射，页面之间以分隔符（默认换行）隔开。锚点与图片URL
+直接在未解码的 UTF-8 字节上扫描，只有命中的标题、正文区间与URL才解码为 str，
+单页的内存占用取决于输出大小而不是页面大小。
+
+结果与 build_output 一致：锚点以 \\uXXXX 转义书写或被标签隔开时，规范化后同样
+会形成锚点。页面中出现这样书写的锚点，或命中的锚点位于标签内部时，回退为解码整页
+后调用 build_output；只有锚点都原样书写时才在字节层面定位。
+
+带 window.__NUXT__ 载荷的页面需要以 str 解析载荷，同样解码整页处理，
+因此单页内存有界只对不带载荷的页面成立。
+"""
+
+import argparse
+import codecs
+import json
+import mmap
+import re
+import sys
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from clean_data_loader import load_clean_data
+
+# 默认的页面分隔符
+DEFAULT_SEPARATOR = b'\n'
+
+# 每个任务包含的页面数
+DEFAULT_CHUNK_PAGES = 64
+
+# 可扫描的字节缓冲区
+Buffer = Union[bytes, bytearray, mmap.mmap]
+
+# 字节版本的扫描正则，首次使用时由 clean-data.py 的正则源码生成
+_byte_patterns: Dict[bool, 're.Pattern[bytes]'] = {}
+
+# 各规则的隐藏锚点正则，首次使用时生成：规则 -> {是否线性时间: 正则（无法判断时为 None）}；
+# 以弱引用为键，规则文件重新加载后旧规则对象被回收时随之清除
+_anchor_guards: 'weakref.WeakKeyDictionary[Any, Dict[bool, Optional[re.Pattern[bytes]]]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def _image_pattern(linear_time: bool) -> 're.Pattern[bytes]':
+    """字节版本的图片URL扫描正则（两种模式各编译一次）"""
+    pattern = _byte_patterns.get(linear_time)
+    if pattern is None:
+        source = load_clean_data()._image_scan_source(linear_time, byte_level=True)
+        pattern = _byte_patterns[linear_time] = re.compile(source.encode('ascii'))
+    return pattern
+
+
+def iter_pages(buffer: Buffer, separator: bytes = DEFAULT_SEPARATOR) -> Iterator[Tuple[int, int]]:
+    """
+    按分隔符切分页面，只产出区间而不复制内容
+
+    Args:
+        buffer: 转储内容
+        separator: 页面分隔符
+
+    Yields:
+        (起点, 终点)：非空页面的字节区间
+    """
+    pos = 0
+    size = len(buffer)
+    while pos < size:
+        end = buffer.find(separator, pos)
+        if end < 0:
+            end = size
+        # 跳过空白页；长页面不做检查，避免复制内容
+        if end - pos >= 64 or buffer[pos:end].strip():
+            yield pos, end
+        pos = end + len(separator)
+
+
+def scan_image_urls(buffer: Buffer, start: int, end: int, linear_time: bool = False) -> List[str]:
+    """
+    在字节区间内单遍扫描图片URL，只解码命中的URL
+
+    Args:
+        buffer: 转储内容
+        start: 区间起点
+        end: 区间终点
+        linear_time: 是否使用保证线性时间的有界模式
+
+    Returns:
+        list: 去重后的图片URL列表
+    """
+    clean_data = load_clean_data()
+    matches = _image_pattern(linear_time).finditer(buffer, start, end)
+    scan = clean_data._collect_image_matches(matches, decode=lambda raw: raw.decode('utf-8', 'replace'))
+    return clean_data.merge_image_urls([scan])
+
+
+def _decode_span(buffer: Buffer, span: Tuple[int, int], linear_time: bool) -> str:
+    """解码并规范化一个字节区间"""
+    text = bytes(buffer[span[0]:span[1]]).decode('utf-8', 'replace')
+    return load_clean_data().normalize_page(text, linear_time=linear_time).text
+
+
+def _inside_tag(buffer: Buffer, page_start: int, pos: int) -> bool:
+    """位置是否处于 HTML 标签内部（其前最近的 < 之后没有 >）"""
+    return buffer.rfind(b'<', page_start, pos) > buffer.rfind(b'>', page_start, pos)
+
+
+def _anchor_guard(rules: Any, linear_time: bool) -> Optional['re.Pattern[bytes]']:
+    """
+    隐藏锚点的字节正则：锚点的字符之间夹有标签、或有字符以 \\uXXXX 转义书写时，
+    规范化后同样会形成锚点。按第一个变形的位置展开为若干分支：之前的字符原样书写
+    （回顾断言），该处是标签或转义，之后的字符可以任意夹标签或转义。各分支都以
+    "<" 或 "\\" 开头，扫描时可以快速跳过其余字节。
+
+    锚点含 ASCII 字符（可能是转义或标签的一部分）或空白时无法这样判断，返回 None。
+    """
+    guards = _anchor_guards.setdefault(rules, {})
+    if linear_time in guards:
+        return guards[linear_time]
+    guard = None
+    anchors = list(rules._anchor_names.values())
+    if all(not char.isascii() and not char.isspace() for anchor in anchors for char in anchor):
+        # 与 normalize_page 相同的标签写法；转义的反斜杠不限层数，线性模式下更宽松
+        tag = rb'<[^<>]{1,%d}>' % load_clean_data()._MAX_TOKEN_LENGTH if linear_time else rb'<[^>]+>'
+
+        def escaped(char: str) -> bytes:
+            return rb'u(?i:%04x)' % ord(char) if ord(char) <= 0xFFFF else b'(?!)'
+
+        def fuzzy(chars: str) -> bytes:
+            return b''.join(rb'(?:%s)*(?:%s|\\+%s)' % (tag, re.escape(char.encode('utf-8')), escaped(char))
+                            for char in chars)
+
+        branches = []
+        for anchor in anchors:
+            for i, char in enumerate(anchor):
+                prefix = re.escape(anchor[:i].encode('utf-8'))
+                rest = fuzzy(anchor[i + 1:])
+                # 第 i 个字符以转义书写（从反斜杠串的第一个开始匹配）
+                behind = rb'(?<=%s\\)' % prefix if i else b''
+                branches.append(rb'\\%s(?<!\\\\)\\*%s%s' % (behind, escaped(char), rest))
+                # 第 i 个字符之前夹有标签
+                if i:
+                    branches.append(rb'<(?<=%s<)%s%s%s' % (prefix, tag[1:], fuzzy(char), rest))
+        guard = re.compile(b'|'.join(branches))
+    guards[linear_time] = guard
+    return guard
+
+
+def _locate_anchors(buffer: Buffer, start: int, end: int, rules: Any,
+                    linear_time: bool) -> Optional[Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]]:
+    """
+    在字节层面定位标题与正文，规范化后的锚点可能与字节层面不同时返回 None
+
+    Returns:
+        (标题区间, 正文区间)，未找到的字段为 None；需要回退时返回 None
+    """
+    if rules._anchor_bytes_re is None:
+        return None, None
+    guard = _anchor_guard(rules, linear_time)
+    if guard is None or guard.search(buffer, start, end):
+        return None
+    names = rules._anchor_names
+    hidden = False
+
+    def matches() -> Iterator[Tuple[int, int, str]]:
+        nonlocal hidden
+        for match in rules._anchor_bytes_re.finditer(buffer, start, end):
+            # 落在标签内部的锚点规范化后被删除
+            if _inside_tag(buffer, start, match.start()):
+                hidden = True
+                return
+            yield match.start(), match.end(), names[match.group()]
+
+    spans = rules.fold_anchors(matches())
+    return None if hidden else spans
+
+
+def scan_page(buffer: Buffer, start: int, end: int, url: Optional[str] = None,
+              rule_set: Optional[str] = None, linear_time: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """
+    在字节层面清洗一个页面
+
+    Args:
+        buffer: 转储内容
+        start: 页面起点
+        end: 页面终点
+        url: 页面地址，用于选择站点规则
+        rule_set: 显式指定的规则名
+        linear_time: 是否使用保证线性时间的有界模式
+
+    Returns:
+        (Output 输出对象, 是否回退为整页解码)
+    """
+    clean_data = load_clean_data()
+    if buffer.find(clean_data._NUXT_MARKER.encode('ascii'), start, end) < 0:
+        rules = clean_data.get_rule_registry().select(url, rule_set)
+        spans = _locate_anchors(buffer, start, end, rules, linear_time)
+        title_span, body_span = spans if spans is not None else (None, None)
+        title: Optional[str] = None
+        body: Optional[str] = None
+        # 解码区间后再复核一次锚点，复核失败同样回退
+        consistent = spans is not None
+        if consistent and title_span is not None:
+            title = clean_data._extract_fields(_decode_span(buffer, title_span, linear_time), rules)[0]
+            consistent = title is not None
+        if consistent and body_span is not None:
+            body = clean_data._extract_fields(_decode_span(buffer, body_span, linear_time), rules)[1]
+            consistent = body is not None
+        if consistent:
+            cleaned_result = {
+                "title": title or "无标题",
+                "content": body if body is not None else "无法提取文章内容",
+                "image_urls": scan_image_urls(buffer, start, end, linear_time),
+            }
+            return clean_data._make_output(cleaned_result), False
+
+    raw_content = bytes(buffer[start:end]).decode('utf-8', 'replace')
+    return clean_data.build_output(raw_content, url, rule_set, linear_time=linear_time), True
+
+
+class DumpStats:
+    """转储清洗统计"""
+
+    def __init__(self) -> None:
+        self.pages = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.input_bytes = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self) -> None:
+        self.elapsed = time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        rate = self.input_bytes / 1e6 / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"📊 页面 {self.pages} 个（整页回退 {self.fallbacks} 个，失败 {self.errors} 个），"
+            f"输入 {self.input_bytes / 1e6:.2f} MB，耗时 {self.elapsed:.2f}s，{rate:.2f} MB/s"
+        )
+
+
+# 一个页面的处理结果：(输出JSON行, 是否回退, 是否成功)
+PageResult = Tuple[str, bool, bool]
+
+# 当前进程映射的转储文件：路径 -> mmap
+_mapped: Dict[str, mmap.mmap] = {}
+
+
+def _map_file(path: str) -> mmap.mmap:
+    """只读映射转储文件（每个进程映射一次）"""
+    mapped = _mapped.get(path)
+    if mapped is None:
+        with open(path, 'rb') as f:
+            mapped = _mapped[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped
+
+
+def process_pages(path: str, pages: List[Tuple[int, int, int]], rule_set: Optional[str] = None,
+                  linear_time: bool = False) -> List[PageResult]:
+    """
+    清洗一组页面（可在工作进程中执行，各进程自行映射文件，不传输页面内容）
+
+    Args:
+        path: 转储文件路径
+        pages: (页号, 起点, 终点) 列表
+        rule_set: 显式指定的规则名
+        linear_time: 是否使用保证线性时间的有界模式
+
+    Returns:
+        每个页面的 (输出JSON行, 是否回退, 是否成功)
+    """
+    buffer = _map_file(path)
+    results: List[PageResult] = []
+    for index, start, end in pages:
+        try:
+            output, fallback = scan_page(buffer, start, end, rule_set=rule_set, linear_time=linear_time)
+            line = json.dumps({"page": index, "offset": start, "output": output}, ensure_ascii=False)
+            results.append((line, fallback, True))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            results.append((json.dumps({"page": index, "offset": start, "error": error}, ensure_ascii=False),
+                            False, False))
+    return results
+
+
+def scan_dump(path: str, output_stream: TextIO, separator: bytes = DEFAULT_SEPARATOR,
+              workers: int = 0, chunk_pages: int = DEFAULT_CHUNK_PAGES,
+              rule_set: Optional[str] = None, linear_time: bool = False) -> DumpStats:
+    """
+    清洗整个转储文件，按页面顺序写出 JSONL
+
+    Args:
+        path: 转储文件路径
+        output_stream: 输出 JSONL 文本流
+        separator: 页面分隔符
+        workers: 工作进程数；为0时在当前进程内处理
+        chunk_pages: 每个任务包含的页面数
+        rule_set: 显式指定的规则名
+        linear_time: 是否使用保证线性时间的有界模式
+
+    Returns:
+        DumpStats: 统计信息
+    """
+    stats = DumpStats()
+    buffer = _map_file(path)
+
+    def chunks() -> Iterator[List[Tuple[int, int, int]]]:
+        chunk: List[Tuple[int, int, int]] = []
+        for index, (start, end) in enumerate(iter_pages(buffer, separator)):
+            stats.input_bytes += end - start
+            chunk.append((index, start, end))
+            if len(chunk) >= chunk_pages:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def emit(results: List[PageResult]) -> None:
+        for line, fallback, ok in results:
+            output_stream.write(line)
+            output_stream.write('\n')
+            stats.pages += 1
+            stats.fallbacks += fallback
+            stats.errors += not ok
+
+    try:
+        if workers <= 0:
+            for chunk in chunks():
+                emit(process_pages(path, chunk, rule_set, linear_time))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # 有序输出，在途任务数有上限
+                queue: Deque[Future] = deque()
+                for chunk in chunks():
+                    if len(queue) >= workers * 4:
+                        emit(queue.popleft().result())
+                    queue.append(executor.submit(process_pages, path, chunk, rule_set, linear_time))
+                while queue:
+                    emit(queue.popleft().result())
+    finally:
+        _mapped.pop(path).close()
+
+    stats.finish()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+    """
+    parser = argparse.ArgumentParser(description="以字节级扫描清洗爬虫转储文件")
+    parser.add_argument("dump", help="转储文件路径")
+    parser.add_argument("-o", "--output", default="-", help="输出 JSONL 文件，默认标准输出")
+    parser.add_argument("--separator", default="\\n", help="页面分隔符，支持转义写法，默认换行")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="工作进程数，0 表示单进程")
+    parser.add_argument("--chunk-pages", type=int, default=DEFAULT_CHUNK_PAGES, help="每个任务包含的页面数")
+    parser.add_argument("--rule-set", default=None, help="显式指定的规则名")
+    parser.add_argument("--linear-time", action="store_true", help="使用保证线性时间的有界正则")
+    args = parser.parse_args(argv)
+
+    separator = codecs.escape_decode(args.separator.encode('utf-8'))[0]
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = scan_dump(args.dump, output_stream, separator, args.workers, args.chunk_pages,
+                          args.rule_set, args.linear_time)
+    finally:
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全语料的图片URL去重
+同一张图片会以不同的转义、查询串与尺寸变体（如 _w1563h5643_o.jpg）出现在
+许多页面中。这里先把图片URL规范化为去重键，再用布隆过滤器记录已见过的图片：
+每个URL被标记为 "new" 或 "seen"，下游只需下载并 OCR 新图片。
+过滤器可保存为磁盘快照，多个工作进程通过加锁合并快照共享已见集合。
+"""
+
+import fcntl
+import hashlib
+import math
+import os
+import re
+import struct
+import threading
+from typing import Iterable, List, Optional
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
+
+# 默认容量（条）与误判率
+DEFAULT_CAPACITY = 1000000
+DEFAULT_ERROR_RATE = 1e-6
+
+# 快照文件头：魔数 + (位数, 哈希函数个数, 已登记条数)
+_SNAPSHOT_MAGIC = b'BLM1'
+_SNAPSHOT_HEADER = struct.Struct('<4sQQQ')
+
+# 任意深度的转义斜杠
+_ESCAPED_SLASH_RE = re.compile(r'\\+u002[fF]')
+
+# 文件名中的尺寸变体后缀：东方财富 _w1563h5643_o、常见的 _800x600、@2x 等
+_SIZE_VARIANT_RE = re.compile(r'(?:_w\d+h\d+(?:_[a-z])?|_\d+x\d+|@\d+x)(?=\.[a-z0-9]+$)', re.IGNORECASE)
+
+# 扩展名别名
+_EXTENSION_ALIASES = {'.jpeg': '.jpg'}
+
+# 各协议的默认端口
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_image_url(url: str, keep_query: bool = False) -> str:
+    """
+    把图片URL规范化为去重键
+
+    统一转义斜杠、协议（http 与 https 视为同一图片）、主机名大小写、默认端口、
+    百分号编码与重复斜杠，去掉片段与（默认）查询串，并去掉文件名中的尺寸变体后缀。
+    规范化结果只用于判重，下载时仍应使用原始URL。
+
+    Args:
+        url: 原始图片URL
+        keep_query: 是否保留查询串（图片身份由查询参数决定的站点需要保留）
+
+    Returns:
+        str: 去重键
+    """
+    if '\\' in url:
+        url = _ESCAPED_SLASH_RE.sub('/', url)
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').rstrip('.')
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port is not None and port != _DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+
+    path = quote(unquote(parts.path), safe="/%:@!$&'()*+,;=~")
+    path = re.sub(r'/{2,}', '/', path) or '/'
+    head, dot, extension = path.rpartition('.')
+    if dot and '/' not in extension:
+        extension = _EXTENSION_ALIASES.get(f".{extension.lower()}", f".{extension.lower()}")
+        path = _SIZE_VARIANT_RE.sub('', head + extension)
+
+    query = parts.query if keep_query else ''
+    return urlunsplit(('https', host, path, query, ''))
+
+
+class BloomFilter:
+    """定长位数组上的布隆过滤器（双重哈希生成各哈希位置）"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE,
+                 bits: Optional[int] = None, hashes: Optional[int] = None) -> None:
+        """
+        Args:
+            capacity: 预计登记的条数
+            error_rate: 达到容量时的目标误判率
+            bits: 直接指定位数（载入快照时使用）
+            hashes: 直接指定哈希函数个数（载入快照时使用）
+        """
+        if bits is None:
+            bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        if hashes is None:
+            hashes = max(1, int(round(bits / max(capacity, 1) * math.log(2))))
+        self.size = bits
+        self.hashes = hashes
+        self.count = 0
+        self._bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """
+        登记一个键
+
+        Returns:
+            bool: 登记前是否（可能）已存在
+        """
+        bits = self._bits
+        present = True
+        for p in self._positions(key):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                present = False
+        if not present:
+            self.count += 1
+        return present
+
+    def merge(self, other: 'BloomFilter') -> None:
+        """合并另一个同规格过滤器（按位或）"""
+        if (other.size, other.hashes) != (self.size, self.hashes):
+            raise ValueError("布隆过滤器规格不一致，无法合并")
+        merged = int.from_bytes(self._bits, 'little') | int.from_bytes(other._bits, 'little')
+        self._bits[:] = merged.to_bytes(len(self._bits), 'little')
+        self.count = max(self.count, other.count)
+
+    def to_bytes(self) -> bytes:
+        return _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, self.size, self.hashes, self.count) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BloomFilter':
+        magic, size, hashes, count = _SNAPSHOT_HEADER.unpack_from(data)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError("不是布隆过滤器快照")
+        bloom = cls(bits=size, hashes=hashes)
+        bloom._bits[:] = data[_SNAPSHOT_HEADER.size:]
+        bloom.count = count
+        return bloom
+
+
+class ImageSeenIndex:
+    """规范化图片URL的已见集合"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE,
+                 snapshot_path: Optional[str] = None, keep_query: bool = False) -> None:
+        """
+        Args:
+            capacity: 预计的图片总数
+            error_rate: 误判率（误判会把新图片标记为 seen）
+            snapshot_path: 快照路径；存在时载入，sync 时与其合并
+            keep_query: 规范化时是否保留查询串
+        """
+        self.keep_query = keep_query
+        self.snapshot_path = snapshot_path
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            with open(snapshot_path, 'rb') as f:
+                self._bloom = BloomFilter.from_bytes(f.read())
+
+    def __len__(self) -> int:
+        return self._bloom.count
+
+    def __contains__(self, url: str) -> bool:
+        return self.key(url) in self._bloom
+
+    def key(self, url: str) -> str:
+        """图片URL的去重键（按本索引的 keep_query 规范化）"""
+        return canonicalize_image_url(url, self.keep_query)
+
+    def mark(self, urls: Iterable[str]) -> List[str]:
+        """
+        标记并登记一组图片URL
+
+        Args:
+            urls: 页面中的图片URL
+
+        Returns:
+            与 urls 一一对应的 "new" / "seen"；同一页面内规范化后重复的URL，第二次起为 "seen"
+        """
+        with self._lock:
+            return ["seen" if self._bloom.add(self.key(url)) else "new" for url in urls]
+
+    def sync(self, path: Optional[str] = None) -> None:
+        """
+        与磁盘快照双向合并：加锁读取快照、并入内存中的集合后原子写回，
+        多个工作进程定期调用即可共享已见集合
+
+        Args:
+            path: 快照路径，默认为构造时的 snapshot_path
+        """
+        path = path or self.snapshot_path
+        if path is None:
+            raise ValueError("未指定快照路径")
+        with open(f"{path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with self._lock:
+                    if os.path.exists(path):
+                        with open(path, 'rb') as f:
+                            self._bloom.merge(BloomFilter.from_bytes(f.read()))
+                    temp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(temp_path, 'wb') as f:
+                        f.write(self._bloom.to_bytes())
+                    os.replace(temp_path, path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
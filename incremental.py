@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按URL增量重爬清洗
+同一批文章每天会被重爬多次，页面通常只有阅读数（"阅读 7555"）或 NUXT 状态
+发生变化，整页缓存无法命中。这里用内容定义分块把页面切成若干块：切分点由切分点前
+一小段窗口的滚动哈希决定，插入或修改内容只影响所在的块。每个URL保存上一次各块的
+规范化文本与图片URL，重爬时只重新计算内容变化的块，再拼接出整页文本抽取标题与正文、
+按模式依次合并各块的图片URL，结果与 clean_web_content 一致。
+
+切分点只取 ">" 之后、且紧跟 ASCII 空白的位置：标签记号在 ">" 处结束，转义与空白
+记号、直接出现的图片URL以及转义 img 标签中的地址都不含 ">" 之后的空白，img 标签
+的 src 引号值是唯一可以同时包含 ">" 与空白的记号，开引号前为 src= 的候选点不切分。
+这样各块可以独立处理；几乎没有空白的压缩页面切分点较少，块会相应变大。
+"""
+
+import hashlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from clean_data_loader import load_clean_data
+
+# 块的最小与最大长度（字符）
+DEFAULT_MIN_CHUNK = 2048
+DEFAULT_MAX_CHUNK = 32768
+
+# 候选切分点前参与哈希的窗口长度（字符）
+WINDOW = 32
+
+# 窗口哈希的低若干位全为0时切分，平均每32个候选点切一次
+_CUT_MASK = 0x1f
+
+# 默认保存状态的URL数
+DEFAULT_MAX_URLS = 10000
+
+# 候选切分点：">" 之后且紧跟 ASCII 空白的位置（切分点为匹配的终点）
+_CUT_RE = re.compile(r'>(?=[ \t\n\r\f\v])')
+
+# img 标签 src 属性值的开引号（与图片扫描的 quote 一致）及其前缀
+_QUOTES = ('"', "'", '\\u0022')
+_SRC = 'src='
+
+# 块的缓存键：(长度, BLAKE2b 摘要)
+ChunkKey = Tuple[int, bytes]
+
+# 一块的规范化结果：(文本, 开头是否有空白, 结尾是否有空白)
+NormalizedChunk = Tuple[str, bool, bool]
+
+
+def _is_safe_cut(raw: Any, start: int, cut: int) -> bool:
+    """
+    候选切分点是否不在 img 标签的 src 引号值内（str 与 UTF-8 字节均可）
+
+    引号值内不含引号，因此只需检查 [start, cut) 中最后一个引号前是否为 src=；
+    start 为上一个切分点，更早的引号值已在选择该切分点时排除。
+    """
+    encode = (lambda token: token.encode('ascii')) if isinstance(raw, bytes) else (lambda token: token)
+    quote = max(raw.rfind(encode(token), start, cut) for token in _QUOTES)
+    return quote < 0 or raw[max(quote - len(_SRC), 0):quote].lower() != encode(_SRC)
+
+
+def chunk_boundaries(raw_content: str, min_size: int = DEFAULT_MIN_CHUNK,
+                     max_size: int = DEFAULT_MAX_CHUNK) -> List[int]:
+    """
+    内容定义分块，返回各块的终点
+
+    从上一个切分点之后 min_size 处开始，依次检查每个 ">" 之后紧跟空白的候选点，
+    其前 WINDOW 个字符的 CRC32 满足掩码条件即切分；块超过 max_size 时
+    在下一个候选点强制切分（没有候选点的长文本不切分）。处于 img 标签
+    src 引号值内的候选点跳过。
+
+    Args:
+        raw_content: 原始页面
+        min_size: 块的最小长度
+        max_size: 块的最大长度（达到后在下一个候选点切分）
+
+    Returns:
+        list: 各块终点（最后一个为页面长度）
+    """
+    min_size = max(min_size, WINDOW)
+    end = len(raw_content)
+    cuts: List[int] = []
+    last = 0
+    while True:
+        match = _CUT_RE.search(raw_content, last + min_size - 1)
+        while match is not None:
+            cut = match.end()
+            window = raw_content[cut - WINDOW:cut].encode('utf-8', 'surrogatepass')
+            if ((cut - last >= max_size or not zlib.crc32(window) & _CUT_MASK)
+                    and _is_safe_cut(raw_content, last, cut)):
+                break
+            match = _CUT_RE.search(raw_content, cut)
+        if match is None:
+            break
+        cuts.append(match.end())
+        last = match.end()
+    if end > last or not cuts:
+        cuts.append(end)
+    return cuts
+
+
+def _chunk_key(text: str) -> ChunkKey:
+    return len(text), hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def _normalize_chunk(text: str, linear_time: bool) -> NormalizedChunk:
+    """
+    独立规范化一块，并记录首尾是否有空白，拼接时据此补回块之间的空格
+    （首尾各加一个占位字符，使首尾空白在结果中保留为一个空格）
+    """
+    wrapped = load_clean_data().normalize_page(f"x{text}x", linear_time=linear_time).text
+    return wrapped[1:-1].strip(' ') if len(wrapped) > 2 else '', wrapped[1] == ' ', wrapped[-2] == ' '
+
+
+def join_normalized(chunks: List[NormalizedChunk]) -> str:
+    """
+    按 normalize_page 的空白规则拼接各块的规范化结果：
+    开头的空白丢弃，块之间的空白合并为一个空格
+
+    Args:
+        chunks: 各块的 (文本, 开头是否有空白, 结尾是否有空白)
+
+    Returns:
+        str: 整页文本
+    """
+    parts: List[str] = []
+    pending_space = False
+    for text, leading, trailing in chunks:
+        if text:
+            if parts and (pending_space or leading):
+                parts.append(' ')
+            parts.append(text)
+            pending_space = trailing
+        elif leading or trailing:
+            pending_space = True
+    return ''.join(parts)
+
+
+class IncrementalStats:
+    """增量清洗统计"""
+
+    def __init__(self) -> None:
+        self.pages = 0
+        self.chunks = 0
+        self.reused_chunks = 0
+        self.payload_reuses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "reused_chunks": self.reused_chunks,
+            "payload_reuses": self.payload_reuses,
+            "evictions": self.evictions,
+        }
+
+
+class _PageState:
+    """一个URL上一次清洗留下的各块结果"""
+    __slots__ = ('linear_time', 'texts', 'images', 'payload_key', 'payload', 'content_key', 'content_text',
+                 'body_key', 'body')
+
+    def __init__(self, linear_time: bool) -> None:
+        self.linear_time = linear_time
+        self.texts: Dict[ChunkKey, NormalizedChunk] = {}
+        self.images: Dict[ChunkKey, List[List[str]]] = {}
+        # NUXT 载荷所在脚本的键，以及相对载荷起点的解析结果
+        self.payload_key: Optional[ChunkKey] = None
+        self.payload: Any = None
+        # contentHtml 的键与规范化文本
+        self.content_key: Optional[ChunkKey] = None
+        self.content_text = ''
+        # 正文区间的键（含所用规则）与去噪后的正文
+        self.body_key: Optional[Tuple[Any, ChunkKey]] = None
+        self.body = ''
+
+
+class IncrementalCleaner:
+    """
+    按URL保存分块结果的增量清洗器
+
+    clean 的结果与 clean_web_content 相同；不支持时间预算、近重复索引与字段选择。
+    """
+
+    def __init__(self, max_urls: int = DEFAULT_MAX_URLS, min_chunk: int = DEFAULT_MIN_CHUNK,
+                 max_chunk: int = DEFAULT_MAX_CHUNK) -> None:
+        """
+        Args:
+            max_urls: 保存状态的URL数，超出时淘汰最久未访问的URL
+            min_chunk: 块的最小长度
+            max_chunk: 块的最大长度
+        """
+        self.max_urls = max_urls
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.stats = IncrementalStats()
+        self._states: 'OrderedDict[str, _PageState]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _state(self, url: str, linear_time: bool) -> _PageState:
+        with self._lock:
+            state = self._states.get(url)
+            if state is None or state.linear_time != linear_time:
+                state = self._states[url] = _PageState(linear_time)
+            self._states.move_to_end(url)
+            while len(self._states) > self.max_urls:
+                self._states.popitem(last=False)
+                self.stats.evictions += 1
+            return state
+
+    def forget(self, url: str) -> None:
+        """丢弃一个URL的状态"""
+        with self._lock:
+            self._states.pop(url, None)
+
+    def _payload(self, raw_content: str, state: _PageState) -> Any:
+        """
+        解析 NUXT 载荷；载荷所在脚本与上次相同时直接平移上次的结果
+        """
+        clean_data = load_clean_data()
+        marker = raw_content.find(clean_data._NUXT_MARKER)
+        if marker < 0:
+            state.payload_key = state.payload = None
+            return None
+        script_end = raw_content.find('</script>', marker)
+        if script_end < 0:
+            script_end = len(raw_content)
+        key = _chunk_key(raw_content[marker:script_end])
+        if key == state.payload_key:
+            self.stats.payload_reuses += 1
+            cached = state.payload
+            return cached._replace(start=cached.start + marker, end=cached.end + marker)
+
+        payload = clean_data.parse_nuxt_payload(raw_content, state.linear_time)
+        # 载荷超出脚本范围时（不规范的页面）不缓存
+        if payload is not None and payload.end <= script_end:
+            state.payload_key = key
+            state.payload = payload._replace(start=payload.start - marker, end=payload.end - marker)
+        else:
+            state.payload_key = state.payload = None
+        return payload
+
+    @staticmethod
+    def _extract_fields(text: str, rules: Any, state: _PageState) -> Tuple[Optional[str], Optional[str]]:
+        """同 clean_data._extract_fields，正文区间与上次相同时复用上次的去噪结果"""
+        title_span, body_span = rules.locate(text)
+        title = text[title_span[0]:title_span[1]] if title_span else None
+        if not body_span:
+            return title, None
+        body = text[body_span[0]:body_span[1]]
+        key = (rules, _chunk_key(body))
+        if key != state.body_key:
+            state.body = rules.clean_body(body)
+            state.body_key = key
+        return title, state.body
+
+    def clean(self, raw_content: str, url: str, rule_set: Optional[str] = None,
+              linear_time: bool = False) -> Dict[str, Any]:
+        """
+        增量清洗一个页面
+
+        Args:
+            raw_content: 原始爬虫内容
+            url: 页面地址（状态的键，同时用于选择站点规则）
+            rule_set: 显式指定的规则名
+            linear_time: 是否使用保证线性时间的有界正则
+
+        Returns:
+            dict: 与 clean_web_content 相同的 title、content 和 image_urls
+        """
+        clean_data = load_clean_data()
+        state = self._state(url, linear_time)
+        self.stats.pages += 1
+
+        # 1. NUXT 载荷与站点规则
+        payload = self._payload(raw_content, state)
+        title = payload.title if payload is not None else ""
+        rules = clean_data.get_rule_registry().select(url or (payload.url if payload is not None else None), rule_set)
+
+        # 2. 快速路径：contentHtml 未变化时复用上次的规范化文本
+        article_content = None
+        if payload is not None and payload.content_html:
+            key = _chunk_key(payload.content_html)
+            if key != state.content_key:
+                state.content_text = clean_data.normalize_page(payload.content_html, linear_time=linear_time).text
+                state.content_key = key
+            _, article_content = self._extract_fields(state.content_text, rules, state)
+        need_page_text = article_content is None or not title
+
+        # 3. 逐块复用或重新计算规范化文本与图片URL
+        spans = [(0, len(raw_content))]
+        if payload is not None:
+            spans = [(0, payload.start), (payload.end, len(raw_content))]
+        texts: Dict[ChunkKey, NormalizedChunk] = {}
+        images: Dict[ChunkKey, List[List[str]]] = {}
+        normalized: List[NormalizedChunk] = []
+        image_scans: List[List[List[str]]] = []
+        chunk_start = 0
+        for chunk_end in chunk_boundaries(raw_content, self.min_chunk, self.max_chunk):
+            chunk = raw_content[chunk_start:chunk_end]
+            key = _chunk_key(chunk)
+            self.stats.chunks += 1
+            scan = state.images.get(key)
+            if scan is None:
+                scan = clean_data.scan_image_patterns(chunk, linear_time)
+            else:
+                self.stats.reused_chunks += 1
+            images[key] = scan
+            image_scans.append(scan)
+
+            if need_page_text:
+                # 块与载荷区间相交时，只取载荷之外的部分
+                for span_start, span_end in spans:
+                    start, end = max(span_start, chunk_start), min(span_end, chunk_end)
+                    if start >= end:
+                        continue
+                    piece_key = key if (start, end) == (chunk_start, chunk_end) else _chunk_key(raw_content[start:end])
+                    result = texts.get(piece_key) or state.texts.get(piece_key)
+                    if result is None:
+                        result = _normalize_chunk(raw_content[start:end], linear_time)
+                    texts[piece_key] = result
+                    normalized.append(result)
+            chunk_start = chunk_end
+
+        state.images = images
+        if need_page_text:
+            state.texts = texts
+            page_title, page_article = self._extract_fields(join_normalized(normalized), rules, state)
+            if not title:
+                title = page_title or "无标题"
+            if article_content is None:
+                article_content = page_article
+
+        return {
+            "title": title,
+            "content": article_content if article_content is not None else "无法提取文章内容",
+            "image_urls": clean_data.merge_image_urls(image_scans),
+        }
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+清洗流程的阶段埋点
+clean-data.py 与 clean_ocr.py 各自提供 set_stage_hook 回调接口（关闭时几乎零开销），
+这里提供把回调汇总为耗时直方图、大小与计数统计，并导出为 JSON 的聚合器
+"""
+
+import json
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+import clean_ocr
+from clean_data_loader import load_clean_data
+
+# 耗时直方图的桶上界（毫秒），最后一个桶收纳更慢的调用
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """固定分桶的耗时直方图"""
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKET_BOUNDS_MS) -> None:
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """
+        按桶估算分位数
+
+        Args:
+            q: 分位（0~1）
+
+        Returns:
+            所在桶的上界；落在最后一个桶时返回观测到的最大值
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total": round(self.total, 4),
+            "min": round(self.min, 4) if self.count else 0.0,
+            "max": round(self.max, 4),
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "buckets": self._labelled_buckets(),
+        }
+
+    def _labelled_buckets(self) -> Dict[str, int]:
+        """非空桶，以上界为标签"""
+        labelled: Dict[str, int] = {}
+        for i, n in enumerate(self.buckets):
+            if n:
+                label = f"<={self.bounds[i]}" if i < len(self.bounds) else f">{self.bounds[-1]}"
+                labelled[label] = n
+        return labelled
+
+
+class StageStats:
+    """单个阶段的累计统计"""
+
+    def __init__(self) -> None:
+        self.time_ms = Histogram()
+        self.input_size = 0
+        self.output_size = 0
+        self.counts: Dict[str, int] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "time_ms": self.time_ms.as_dict(),
+            "input_size": self.input_size,
+            "output_size": self.output_size,
+            "counts": dict(sorted(self.counts.items())),
+        }
+
+
+class StageAggregator:
+    """把各流程的阶段回调汇总为直方图与计数"""
+
+    def __init__(self) -> None:
+        self._stages: Dict[Tuple[str, str], StageStats] = {}
+        self._lock = threading.Lock()
+
+    def hook(self, pipeline: str) -> Callable[..., None]:
+        """
+        生成某个流程使用的回调
+
+        Args:
+            pipeline: 流程名，如 "web"、"ocr"
+
+        Returns:
+            可传给 set_stage_hook 的回调
+        """
+        def record(stage: str, seconds: float, input_size: int, output_size: int,
+                   counts: Optional[Dict[str, int]]) -> None:
+            self.record(pipeline, stage, seconds, input_size, output_size, counts)
+        return record
+
+    def record(self, pipeline: str, stage: str, seconds: float, input_size: int,
+               output_size: int, counts: Optional[Dict[str, int]] = None) -> None:
+        """记录一次阶段执行"""
+        with self._lock:
+            stats = self._stages.get((pipeline, stage))
+            if stats is None:
+                stats = self._stages[(pipeline, stage)] = StageStats()
+            stats.time_ms.add(seconds * 1000)
+            stats.input_size += input_size
+            stats.output_size += output_size
+            if counts:
+                for key, n in counts.items():
+                    stats.counts[key] = stats.counts.get(key, 0) + n
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """按 流程 -> 阶段 组织的统计结果"""
+        with self._lock:
+            result: Dict[str, Dict[str, Any]] = {}
+            for (pipeline, stage), stats in self._stages.items():
+                result.setdefault(pipeline, {})[stage] = stats.as_dict()
+            return result
+
+    def dump(self, stream: TextIO) -> None:
+        """以 JSON 格式写出统计结果"""
+        json.dump(self.as_dict(), stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
+
+
+def install(aggregator: StageAggregator, sample_rate: float = 1.0,
+            pipelines: Optional[List[str]] = None) -> StageAggregator:
+    """
+    将聚合器挂到网页与OCR清洗流程上
+
+    Args:
+        aggregator: 聚合器
+        sample_rate: 采样率（0~1），生产环境可设为较小的值常开
+        pipelines: 需要埋点的流程，默认为 ["web", "ocr"]
+
+    Returns:
+        传入的聚合器
+    """
+    pipelines = pipelines or ["web", "ocr"]
+    if "web" in pipelines:
+        load_clean_data().set_stage_hook(aggregator.hook("web"), sample_rate)
+    if "ocr" in pipelines:
+        clean_ocr.set_stage_hook(aggregator.hook("ocr"), sample_rate)
+    return aggregator
+
+
+def uninstall() -> None:
+    """关闭所有流程的埋点"""
+    load_clean_data().set_stage_hook(None)
+    clean_ocr.set_stage_hook(None)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+面向大模型输入的分块工具
+把清洗后的网页正文或 OCR 报告按 token 预算切分为若干块：优先在句末标点
+（。！？；等，含其后的引号括号）与换行处断开，相邻块之间保留若干句重叠，
+超长的单句在 token 边界处硬切。输入可以是字符串，也可以是逐段产出的文本流，
+分块以生成器方式逐个产出，不会一次性生成全部分块。
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# 每个中日韩字符的平均 token 数（按主流 BPE 词表对中文语料的统计取整估计）
+CJK_TOKENS_PER_CHAR = 1.4
+
+# 拉丁字母单词每多少个字符约计1个 token
+LATIN_CHARS_PER_TOKEN = 4
+
+# 数字每多少位计1个 token（主流词表按3位一组切分数字）
+DIGITS_PER_TOKEN = 3
+
+# 默认分块预算与重叠（token）
+DEFAULT_MAX_TOKENS = 1000
+DEFAULT_OVERLAP_TOKENS = 100
+
+# 浮点累加误差的容差：估算值只超出整数这么多时不再向上取整
+_TOLERANCE = 1e-9
+
+# 找不到句子边界时，单句最多缓存的字符数（超出即强制断开，保证内存有界）
+MAX_SENTENCE_CHARS = 4000
+
+# 估算用的记号：中日韩字符串 | 拉丁单词 | 数字串 | 空白 | 其他单个字符（标点、符号）
+_TOKEN_RE = re.compile(
+    r'([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+)'
+    r'|([A-Za-z]+)|(\d+)|(\s+)|(.)',
+    re.DOTALL,
+)
+
+# 句子边界：句末标点（及其后的引号、括号与空白），或换行
+_BOUNDARY_RE = re.compile(r'[。！？!?；;…]+[”’」』）)\]"\']*[ \t]*\n*|\n+')
+
+
+class Chunk(NamedTuple):
+    """一个分块"""
+    index: int      # 分块序号（从0开始）
+    text: str       # 分块文本（含与上一块重叠的部分）
+    tokens: int     # 估算的 token 数
+    start: int      # 在输入中的起始字符位置
+    end: int        # 在输入中的结束字符位置
+
+
+def _token_weights(text: str) -> Iterator[Tuple[int, int, float]]:
+    """
+    逐个记号产出 (起点, 终点, token 数)；中日韩字符串按字符拆开，
+    拉丁单词与数字串按每个 token 对应的字符数拆开，便于在任意位置硬切
+    """
+    for match in _TOKEN_RE.finditer(text):
+        cjk, latin, digits, space, _ = match.groups()
+        start, end = match.span()
+        if cjk is not None:
+            for i in range(start, end):
+                yield i, i + 1, CJK_TOKENS_PER_CHAR
+        elif latin is not None or digits is not None:
+            step = LATIN_CHARS_PER_TOKEN if latin is not None else DIGITS_PER_TOKEN
+            for i in range(start, end, step):
+                yield i, min(i + step, end), 1.0
+        elif space is None:
+            yield start, end, 1.0
+
+
+def _estimate(text: str) -> float:
+    """token 数的浮点估计（中日韩字符串整体计算，不逐字展开）"""
+    total = 0.0
+    for match in _TOKEN_RE.finditer(text):
+        cjk, latin, digits, space, _ = match.groups()
+        if cjk is not None:
+            total += len(cjk) * CJK_TOKENS_PER_CHAR
+        elif latin is not None:
+            total += math.ceil(len(latin) / LATIN_CHARS_PER_TOKEN)
+        elif digits is not None:
+            total += math.ceil(len(digits) / DIGITS_PER_TOKEN)
+        elif space is None:
+            total += 1
+    return total
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数
+
+    中日韩字符按每字 CJK_TOKENS_PER_CHAR 计，拉丁单词按每 LATIN_CHARS_PER_TOKEN 个字母
+    计1个，数字按每 DIGITS_PER_TOKEN 位计1个，标点符号各计1个，空白不计。
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: 估算的 token 数（向上取整，忽略浮点累加误差）
+    """
+    return math.ceil(_estimate(text) - _TOLERANCE)
+
+
+def count_words(text: str) -> int:
+    """
+    按中文习惯统计字数：每个中日韩字符计1字，每个拉丁单词或数字串计1字，标点与空白不计
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: 字数
+    """
+    count = 0
+    for match in _TOKEN_RE.finditer(text):
+        cjk, latin, digits, _, _ = match.groups()
+        if cjk is not None:
+            count += len(cjk)
+        elif latin is not None or digits is not None:
+            count += 1
+    return count
+
+
+def iter_sentences(pieces: Union[str, Iterable[str]], max_chars: int = MAX_SENTENCE_CHARS) -> Iterator[str]:
+    """
+    从文本或文本流中逐句产出（保留原文，句子拼接后与输入完全一致）
+
+    Args:
+        pieces: 字符串，或逐段产出文本的可迭代对象
+        max_chars: 找不到句子边界时单句的最大长度
+
+    Yields:
+        str: 句子（含句末标点与其后的空白）
+    """
+    if isinstance(pieces, str):
+        pieces = (pieces,)
+    pending = ''
+    # 缓冲区末尾尚未确定的边界的起点
+    tail: Optional[int] = None
+    for piece in pieces:
+        if not piece:
+            continue
+        # 只需从上一段末尾（或末尾尚未确定的边界）开始查找新边界
+        scan_from = tail if tail is not None else len(pending)
+        pending += piece
+        pos = 0
+        tail = None
+        for match in _BOUNDARY_RE.finditer(pending, scan_from):
+            # 边界恰在缓冲区末尾时可能还会延续（如后续的引号），留到下一段再判断
+            if match.end() == len(pending):
+                tail = match.start()
+                break
+            yield pending[pos:match.end()]
+            pos = match.end()
+        while len(pending) - pos > max_chars:
+            yield pending[pos:pos + max_chars]
+            pos += max_chars
+            tail = None
+        if tail is not None:
+            tail -= pos
+        pending = pending[pos:]
+    if pending:
+        yield pending
+
+
+def _split_oversize(sentence: str, max_tokens: float) -> Iterator[Tuple[str, float]]:
+    """把超出预算的单句在记号边界处切开"""
+    start = 0
+    total = 0.0
+    for token_start, token_end, weight in _token_weights(sentence):
+        if total + weight > max_tokens and token_start > start:
+            yield sentence[start:token_start], total
+            start, total = token_start, 0.0
+        total += weight
+    if start < len(sentence):
+        yield sentence[start:], total
+
+
+def iter_chunks(pieces: Union[str, Iterable[str]], max_tokens: int = DEFAULT_MAX_TOKENS,
+                overlap_tokens: int = DEFAULT_OVERLAP_TOKENS) -> Iterator[Chunk]:
+    """
+    按 token 预算流式分块
+
+    句子依次装入当前块，放不下时产出当前块，并把其末尾不超过 overlap_tokens 的
+    若干句作为下一块的开头。每块的 token 数按拼接后的文本重新估算，不超过 max_tokens
+    （拼接不会增加估算值：记号只会合并，向上取整的部分不会变多）。
+
+    Args:
+        pieces: 字符串，或逐段产出文本的可迭代对象（如逐行读取的报告）
+        max_tokens: 每块的 token 上限
+        overlap_tokens: 相邻块之间重叠的 token 上限
+
+    Yields:
+        Chunk: 分块
+    """
+    if max_tokens <= 0 or not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("需满足 max_tokens > 0 且 0 <= overlap_tokens < max_tokens")
+    # 当前块中的句子：(文本, token 数, 起始位置)
+    current: Deque[Tuple[str, float, int]] = deque()
+    current_tokens = 0.0
+    index = 0
+    offset = 0
+    # 当前块中只有重叠句、尚未加入新内容
+    only_overlap = True
+
+    def emit() -> Chunk:
+        text = ''.join(sentence for sentence, _, _ in current)
+        start = current[0][2]
+        return Chunk(index, text, estimate_tokens(text), start, start + len(text))
+
+    for sentence in iter_sentences(pieces, max_chars=max(MAX_SENTENCE_CHARS, max_tokens * 4)):
+        weight = _estimate(sentence)
+        parts = [(sentence, weight)] if weight <= max_tokens else list(_split_oversize(sentence, max_tokens))
+        for part, part_tokens in parts:
+            if current and current_tokens + part_tokens > max_tokens:
+                if not only_overlap:
+                    yield emit()
+                    index += 1
+                    # 保留末尾若干句作为重叠
+                    kept = 0.0
+                    keep = 0
+                    for _, tokens, _ in reversed(current):
+                        if kept + tokens > overlap_tokens:
+                            break
+                        kept += tokens
+                        keep += 1
+                    while len(current) > keep:
+                        current_tokens -= current.popleft()[1]
+                    only_overlap = True
+                # 重叠部分与新句合计超出预算时，从最早的重叠句开始丢弃
+                while current and current_tokens + part_tokens > max_tokens:
+                    current_tokens -= current.popleft()[1]
+                if not current:
+                    current_tokens = 0.0
+            current.append((part, part_tokens, offset))
+            current_tokens += part_tokens
+            offset += len(part)
+            if part.strip():
+                only_overlap = False
+
+    if current and not only_overlap:
+        yield emit()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口：把文本文件（或标准输入）分块，逐行输出 JSONL
+    """
+    parser = argparse.ArgumentParser(description="按 token 预算把清洗结果分块")
+    parser.add_argument("input", nargs="?", default="-", help="输入文本文件，- 表示标准输入")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="每块的 token 上限")
+    parser.add_argument("--overlap", type=int, default=DEFAULT_OVERLAP_TOKENS, help="相邻块重叠的 token 上限")
+    args = parser.parse_args(argv)
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        count = 0
+        for chunk in iter_chunks(input_stream, args.max_tokens, args.overlap):
+            print(json.dumps(chunk._asdict(), ensure_ascii=False))
+            count += 1
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+    print(f"✅ 共 {count} 块", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近重复文章检测
+同一篇文章常被多个镜像站点转载，只是页面外壳不同。这里对抽取出的正文计算
+64位 SimHash 指纹（字符 n-gram 特征，适合中文），并用分段 LSH 索引查找
+汉明距离在阈值内的已处理文章：命中时直接复用其清洗结果，跳过后续处理。
+索引常驻内存、按最久未使用淘汰，可保存为快照并在启动时载入。
+"""
+
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# 指纹位数
+FINGERPRINT_BITS = 64
+
+# 默认相似度阈值（1 - 汉明距离 / 64）
+DEFAULT_THRESHOLD = 0.95
+
+# 默认的字符 n-gram 长度
+DEFAULT_SHINGLE_SIZE = 3
+
+# 默认的最短正文长度，更短的正文信息量不足，不参与去重
+DEFAULT_MIN_LENGTH = 50
+
+# 默认索引容量（条）
+DEFAULT_MAX_ENTRIES = 100000
+
+# 快照格式版本
+SNAPSHOT_VERSION = 1
+
+# 第二个 CRC 的初始值，与第一个 CRC 拼成64位特征哈希
+_CRC_SEED = 0x9E3779B9
+
+
+def simhash(text: str, shingle_size: int = DEFAULT_SHINGLE_SIZE) -> int:
+    """
+    计算文本的64位 SimHash 指纹
+
+    特征为去重后的字符 n-gram；每个特征的64位哈希由两个 CRC32 拼成（跨进程稳定，
+    可用于快照）。各位的计数通过对二进制串按步长切片在 C 层完成。
+
+    Args:
+        text: 正文文本
+        shingle_size: n-gram 长度
+
+    Returns:
+        int: 64位指纹
+    """
+    # UTF-32 下每个字符定长4字节，n-gram 即固定长度的字节切片
+    data = text.encode('utf-32-le')
+    width = 4 * shingle_size
+    if len(data) <= width:
+        shingles = {data}
+    else:
+        shingles = {data[i:i + width] for i in range(0, len(data) - width + 4, 4)}
+    bits = ''.join(
+        format(zlib.crc32(shingle) << 32 | zlib.crc32(shingle, _CRC_SEED), '064b') for shingle in shingles
+    )
+    half = len(shingles) / 2
+    fingerprint = 0
+    for position in range(FINGERPRINT_BITS):
+        # 第 position 个字符对应第 63 - position 位
+        if bits[position::FINGERPRINT_BITS].count('1') > half:
+            fingerprint |= 1 << (FINGERPRINT_BITS - 1 - position)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹之间的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+def _band_masks(max_distance: int) -> List[Tuple[int, int]]:
+    """
+    把64位划分为 max_distance + 1 段（鸽巢原理：距离不超过阈值的两个指纹至少有一段完全相同）
+
+    Returns:
+        每段的 (右移位数, 掩码)
+    """
+    bands = min(max_distance + 1, FINGERPRINT_BITS)
+    masks = []
+    shift = 0
+    for i in range(bands):
+        width = FINGERPRINT_BITS // bands + (1 if i < FINGERPRINT_BITS % bands else 0)
+        masks.append((shift, (1 << width) - 1))
+        shift += width
+    return masks
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """复制清洗结果（连同 image_urls 等列表），调用方修改副本不会影响索引中的条目"""
+    return {key: list(value) if isinstance(value, list) else value for key, value in result.items()}
+
+
+class DedupStats:
+    """去重统计"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0       # 正文过短，不参与去重
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+        }
+
+
+class NearDupIndex:
+    """
+    SimHash 指纹的分段 LSH 索引
+
+    可作为 clean_web_content 的 dedup_index 参数：先以 fingerprint 计算正文指纹，
+    lookup 命中则直接返回规范结果，否则清洗完成后以 add 登记。
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 shingle_size: int = DEFAULT_SHINGLE_SIZE, min_length: int = DEFAULT_MIN_LENGTH) -> None:
+        """
+        Args:
+            threshold: 相似度阈值（0~1），不低于该值视为近重复
+            max_entries: 索引容量，超出时淘汰最久未使用的条目
+            shingle_size: 字符 n-gram 长度
+            min_length: 参与去重的最短正文长度
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"相似度阈值应在 (0, 1] 之间: {threshold}")
+        self.threshold = threshold
+        self.max_distance = int((1.0 - threshold) * FINGERPRINT_BITS + 1e-9)
+        self.max_entries = max_entries
+        self.shingle_size = shingle_size
+        self.min_length = min_length
+        self.stats = DedupStats()
+        self._masks = _band_masks(self.max_distance)
+        # 指纹 -> 规范结果，按使用顺序排列
+        self._entries: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        # 每段一张表：段值 -> 指纹集合
+        self._bands: List[Dict[int, Set[int]]] = [{} for _ in self._masks]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fingerprint(self, text: str) -> Optional[int]:
+        """
+        计算正文指纹
+
+        Returns:
+            指纹；正文过短时返回 None（不参与去重）
+        """
+        if len(text) < self.min_length:
+            self.stats.skipped += 1
+            return None
+        return simhash(text, self.shingle_size)
+
+    def _candidates(self, fingerprint: int) -> Set[int]:
+        candidates: Set[int] = set()
+        for (shift, mask), table in zip(self._masks, self._bands):
+            bucket = table.get(fingerprint >> shift & mask)
+            if bucket:
+                candidates |= bucket
+        return candidates
+
+    def nearest(self, fingerprint: int) -> Optional[Tuple[int, int]]:
+        """
+        查找距离最近的近重复指纹（不改变统计与使用顺序）
+
+        Returns:
+            (指纹, 汉明距离)；没有阈值内的条目时返回 None
+        """
+        with self._lock:
+            return self._nearest(fingerprint)
+
+    def _nearest(self, fingerprint: int) -> Optional[Tuple[int, int]]:
+        """在候选指纹中取阈值内距离最近的一个（调用方持有锁）"""
+        best: Optional[Tuple[int, int]] = None
+        for candidate in self._candidates(fingerprint):
+            distance = hamming_distance(fingerprint, candidate)
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (candidate, distance)
+        return best
+
+    def lookup(self, fingerprint: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        查询近重复文章的规范结果
+
+        Args:
+            fingerprint: 正文指纹（为 None 时直接视为未命中）
+
+        Returns:
+            规范清洗结果的副本；未命中时返回 None
+        """
+        if fingerprint is None:
+            return None
+        with self._lock:
+            found = self._nearest(fingerprint)
+            if found is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(found[0])
+            self.stats.hits += 1
+            return _copy_result(self._entries[found[0]])
+
+    def add(self, fingerprint: Optional[int], result: Dict[str, Any]) -> None:
+        """
+        登记一篇文章的规范结果
+
+        Args:
+            fingerprint: 正文指纹（为 None 时忽略）
+            result: 清洗结果（登记的是副本）
+        """
+        if fingerprint is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+                return
+            self._entries[fingerprint] = _copy_result(result)
+            for (shift, mask), table in zip(self._masks, self._bands):
+                table.setdefault(fingerprint >> shift & mask, set()).add(fingerprint)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(evicted)
+                self.stats.evictions += 1
+
+    def _unindex(self, fingerprint: int) -> None:
+        """从各段表中移除指纹（调用方持有锁）"""
+        for (shift, mask), table in zip(self._masks, self._bands):
+            key = fingerprint >> shift & mask
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del table[key]
+
+    def save(self, path: str) -> None:
+        """
+        保存快照（先写临时文件再替换，写入中断不会损坏已有快照）
+
+        Args:
+            path: 快照文件路径
+        """
+        with self._lock:
+            snapshot = {
+                "version": SNAPSHOT_VERSION,
+                "shingle_size": self.shingle_size,
+                "entries": [[f"{fingerprint:016x}", result] for fingerprint, result in self._entries.items()],
+            }
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> int:
+        """
+        载入快照中的条目（按原有使用顺序登记，超出容量时淘汰最旧的条目）
+
+        Args:
+            path: 快照文件路径
+
+        Returns:
+            载入的条目数；快照不存在或与当前 n-gram 长度不一致时返回0
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("shingle_size") != self.shingle_size:
+            return 0
+        for fingerprint, result in snapshot["entries"]:
+            self.add(int(fingerprint, 16), result)
+        return len(snapshot["entries"])
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+超大单页的文档内并行清洗
+内联了数十 MB NUXT 状态与转义 HTML 的单个页面，串行清洗只能用到一个核心，
+批量并行也无法降低这一个请求的延迟。这里把页面以 UTF-8 写入共享内存（工作进程
+按名称挂接，页面不会随任务序列化），切成若干段交给进程池并行处理，再按段的顺序
+确定性地合并，结果与 clean_web_content 一致：
+
+- 去标签/转义解码与图片URL扫描：段只在 ">" 之后、紧跟空白且不在 img 标签 src
+  引号值内的位置切开，规范化记号与图片扫描的各个模式都不会跨段（与 incremental
+  模块的分块规则相同），各段独立处理后拼接；
+- 锚点扫描：对规范化后的文本分段，每段向后多扫描"最长锚点 - 1"个字节，
+  合并时按串行扫描的不重叠语义重新对齐，再交给规则的状态机；
+- 正文去噪与空白合并：正文只在两个相邻汉字之间、且附近没有噪声片段的位置切开。
+
+NUXT 载荷的解析仍为串行。
+"""
+
+import argparse
+import json
+import multiprocessing
+import re
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+from clean_data_loader import load_clean_data
+from incremental import NormalizedChunk, _is_safe_cut, _normalize_chunk, join_normalized
+
+# 每段的目标大小（字节）
+DEFAULT_SEGMENT_SIZE = 1 << 20
+
+# 小于该大小（字符）的页面或文本直接串行处理
+DEFAULT_MIN_PARALLEL_SIZE = 4 << 20
+
+# 原始页面的候选切分点：> 之后且紧跟 ASCII 空白的位置（切分点为匹配的终点）
+_CUT_RE = re.compile(rb'>(?=[ \t\n\r\f\v])')
+
+# 正文的切分点：两个相邻的 CJK 统一表意文字（UTF-8 首字节 E4~E9）之间
+_BODY_CUT_RE = re.compile(rb'[\xe4-\xe9][\x80-\xbf]{2}(?=[\xe4-\xe9])')
+
+# 锚点匹配：(起点, 终点, 锚点)
+AnchorMatch = Tuple[int, int, str]
+
+
+def _encode(text: str) -> bytes:
+    return text.encode('utf-8', 'surrogatepass')
+
+
+def _decode(data: bytes) -> str:
+    return data.decode('utf-8', 'surrogatepass')
+
+
+def _share(data: bytes) -> SharedMemory:
+    """把数据复制到新建的共享内存"""
+    shm = SharedMemory(create=True, size=max(len(data), 1))
+    shm.buf[:len(data)] = data
+    return shm
+
+
+def _release(shm: SharedMemory) -> None:
+    shm.close()
+    shm.unlink()
+
+
+def _read(name: str, start: int, end: int) -> bytes:
+    """
+    在工作进程中挂接共享内存并复制出一段
+
+    挂接时不向 resource_tracker 登记：共享内存由创建它的进程负责释放，
+    否则工作进程退出时会把仍在使用的共享内存当作泄漏而删除。
+    """
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        shm = SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+    try:
+        return bytes(shm.buf[start:end])
+    finally:
+        shm.close()
+
+
+def _scan_segment(name: str, start: int, end: int, pieces: List[Tuple[int, int]],
+                  linear_time: bool, want_images: bool) -> Tuple[List[NormalizedChunk], List[List[str]]]:
+    """
+    处理原始页面的一段（在工作进程中执行）
+
+    Args:
+        name: 共享内存名
+        start: 段起点（字节）
+        end: 段终点（字节）
+        pieces: 段内需要规范化的区间（字节，相对段起点），用于跳过 NUXT 载荷
+        linear_time: 是否使用保证线性时间的有界正则
+        want_images: 是否扫描图片URL
+
+    Returns:
+        (各区间的规范化结果, 段内各模式的图片URL)
+    """
+    clean_data = load_clean_data()
+    data = _read(name, start, end)
+    text = _decode(data)
+    normalized = []
+    for piece_start, piece_end in pieces:
+        if (piece_start, piece_end) == (0, len(data)):
+            piece = text
+        else:
+            # 只有含 NUXT 载荷边界的段需要换算字符位置
+            offset = len(_decode(data[:piece_start]))
+            piece = text[offset:offset + len(_decode(data[piece_start:piece_end]))]
+        normalized.append(_normalize_chunk(piece, linear_time))
+    scan = clean_data.scan_image_patterns(text, linear_time) if want_images else []
+    return normalized, scan
+
+
+def _scan_anchors(name: str, start: int, end: int, endpos: int, rules: Any) -> List[AnchorMatch]:
+    """
+    扫描规范化文本一段中起点位于 [start, end) 的锚点（在工作进程中执行）
+
+    多字节锚点的交替正则在 str 上比在字节上快得多，这里解码后扫描，
+    再把字符位置逐段累加换算为字节位置。
+    """
+    text = _decode(_read(name, start, endpos))
+    matches: List[AnchorMatch] = []
+    byte_pos = start
+    char_pos = 0
+    for match in rules._anchor_re.finditer(text):
+        byte_pos += len(_encode(text[char_pos:match.start()]))
+        char_pos = match.start()
+        if byte_pos >= end:
+            break
+        anchor = match.group()
+        matches.append((byte_pos, byte_pos + len(_encode(anchor)), anchor))
+    return matches
+
+
+def _collapse_body(name: str, start: int, end: int, rules: Any) -> str:
+    """正文一段的去噪与空白合并（在工作进程中执行）"""
+    return rules.collapse_body(_decode(_read(name, start, end)))
+
+
+def _char_boundary(data: bytes, pos: int) -> int:
+    """pos 处或其后第一个 UTF-8 字符的起点（不超过末尾）"""
+    while pos < len(data) and data[pos] & 0xC0 == 0x80:
+        pos += 1
+    return min(pos, len(data))
+
+
+def _raw_cuts(data: bytes, segment_size: int) -> List[int]:
+    """原始页面的段终点：每隔约 segment_size 字节，在其后第一个可以安全切开的候选点切开"""
+    cuts: List[int] = []
+    last = 0
+    match = _CUT_RE.search(data, segment_size - 1)
+    while match is not None:
+        cut = match.end()
+        if _is_safe_cut(data, last, cut):
+            cuts.append(cut)
+            last = cut
+            match = _CUT_RE.search(data, last + segment_size - 1)
+        else:
+            match = _CUT_RE.search(data, cut)
+    cuts.append(len(data))
+    return cuts
+
+
+def merge_anchor_matches(rules: Any, data: bytes, segments: List[Tuple[int, int, int]],
+                         results: List[List[AnchorMatch]]) -> List[AnchorMatch]:
+    """
+    按串行扫描的语义合并各段的锚点匹配
+
+    串行扫描在一次匹配之后从其终点继续，若上一段最后的匹配伸入了本段，本段从段首
+    开始的匹配可能与串行结果不同：此时从该终点起串行重扫，直到某个匹配与本段结果
+    重合，其后的匹配必然一致。
+
+    Args:
+        rules: 规则
+        data: 规范化文本的 UTF-8 字节
+        segments: 各段的 (起点, 终点, 扫描终点)
+        results: 各段起点位于 [起点, 终点) 的匹配
+
+    Returns:
+        与串行扫描相同的匹配序列
+    """
+    names = rules._anchor_names
+    merged: List[AnchorMatch] = []
+    last_end = 0
+    for (start, end, endpos), matches in zip(segments, results):
+        if last_end > start:
+            index = {(match_start, match_end): k for k, (match_start, match_end, _) in enumerate(matches)}
+            synced: List[AnchorMatch] = []
+            for match in rules._anchor_bytes_re.finditer(data, last_end, endpos):
+                if match.start() >= end:
+                    matches = []
+                    break
+                k = index.get(match.span())
+                if k is not None:
+                    matches = matches[k:]
+                    break
+                synced.append((match.start(), match.end(), names[match.group()]))
+            else:
+                matches = []
+            merged.extend(synced)
+        merged.extend(matches)
+        if merged:
+            last_end = merged[-1][1]
+    return merged
+
+
+def _body_cuts(rules: Any, data: bytes, start: int, end: int, segment_size: int) -> List[int]:
+    """正文的段终点：相邻汉字之间，且前后一个噪声长度内没有噪声片段"""
+    noise_re = None
+    reach = 0
+    if rules.noise:
+        noise_re = re.compile(rules._noise_re.pattern.encode('utf-8'))
+        reach = max(len(_encode(noise)) for noise in rules.noise)
+    cuts: List[int] = []
+    pos = start + segment_size
+    while pos < end:
+        match = _BODY_CUT_RE.search(data, pos, end)
+        if match is None:
+            break
+        cut = match.end()
+        if noise_re is not None and noise_re.search(data, max(start, cut - reach), min(end, cut + reach)):
+            pos = cut
+            continue
+        cuts.append(cut)
+        pos = cut + segment_size
+    cuts.append(end)
+    return cuts
+
+
+class ParallelCleaner:
+    """
+    超大单页的并行清洗器
+
+    clean 的结果与 clean_web_content 相同；不支持时间预算、近重复索引与字段选择。
+    """
+
+    def __init__(self, workers: Optional[int] = None, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 min_parallel_size: int = DEFAULT_MIN_PARALLEL_SIZE,
+                 executor: Optional[Executor] = None) -> None:
+        """
+        Args:
+            workers: 工作进程数（默认为 CPU 核数）
+            segment_size: 每段的目标大小（字节）
+            min_parallel_size: 小于该大小的页面直接串行清洗
+            executor: 外部提供的进程池（不会随 close 关闭）
+        """
+        self.segment_size = segment_size
+        self.min_parallel_size = min_parallel_size
+        self._owns_executor = executor is None
+        if executor is None:
+            context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self._executor = executor
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    def __enter__(self) -> 'ParallelCleaner':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def normalize(self, text: str, spans: Optional[List[Tuple[int, int]]] = None,
+                  linear_time: bool = False) -> str:
+        """
+        并行规范化（结果同 normalize_page(...).text）
+
+        Args:
+            text: 原始内容
+            spans: 需要处理的区间（字符），默认全文
+            linear_time: 是否使用保证线性时间的有界正则
+
+        Returns:
+            str: 规范化文本
+        """
+        if len(text) < self.min_parallel_size:
+            return load_clean_data().normalize_page(text, spans, linear_time=linear_time).text
+        data = _encode(text)
+        shm = _share(data)
+        try:
+            futures = self._submit_segments(shm.name, data, text, spans, linear_time, want_text=True,
+                                            want_images=False)
+            return join_normalized([chunk for future in futures for chunk in future.result()[0]])
+        finally:
+            _release(shm)
+
+    def _submit_segments(self, name: str, data: bytes, text: str, spans: Optional[List[Tuple[int, int]]],
+                         linear_time: bool, want_text: bool, want_images: bool) -> List[Any]:
+        """按段提交规范化与图片扫描任务，返回按段排列的 Future"""
+        byte_spans = [(0, len(data))]
+        if spans is not None:
+            # 区间端点换算为字节位置
+            byte_spans = []
+            offset = 0
+            position = 0
+            for span_start, span_end in spans:
+                offset += len(_encode(text[position:span_start]))
+                start = offset
+                offset += len(_encode(text[span_start:span_end]))
+                byte_spans.append((start, offset))
+                position = span_end
+        futures = []
+        start = 0
+        for end in _raw_cuts(data, self.segment_size):
+            pieces: List[Tuple[int, int]] = []
+            if want_text:
+                for span_start, span_end in byte_spans:
+                    piece_start, piece_end = max(span_start, start), min(span_end, end)
+                    if piece_start < piece_end:
+                        pieces.append((piece_start - start, piece_end - start))
+            futures.append(self._executor.submit(_scan_segment, name, start, end, pieces, linear_time,
+                                                 want_images))
+            start = end
+        return futures
+
+    def extract_fields(self, text: str, rules: Any) -> Tuple[Optional[str], Optional[str]]:
+        """
+        并行抽取标题与正文（结果同 clean_data._extract_fields）
+
+        Args:
+            text: 规范化后的页面文本
+            rules: 站点规则
+
+        Returns:
+            (标题, 去噪后的正文)，未找到的字段为 None
+        """
+        clean_data = load_clean_data()
+        if len(text) < self.min_parallel_size or rules._anchor_re is None:
+            return clean_data._extract_fields(text, rules)
+        data = _encode(text)
+        shm = _share(data)
+        try:
+            overlap = max(len(name) for name in rules._anchor_names) - 1
+            segments = []
+            start = 0
+            while start < len(data):
+                end = _char_boundary(data, start + self.segment_size)
+                segments.append((start, end, _char_boundary(data, end + overlap)))
+                start = end
+            futures = [self._executor.submit(_scan_anchors, shm.name, start, end, endpos, rules)
+                       for start, end, endpos in segments]
+            matches = merge_anchor_matches(rules, data, segments, [future.result() for future in futures])
+            title_span, body_span = rules.fold_anchors(matches)
+            title = _decode(data[title_span[0]:title_span[1]]) if title_span else None
+            if not body_span:
+                return title, None
+            futures = []
+            start = body_span[0]
+            for end in _body_cuts(rules, data, body_span[0], body_span[1], self.segment_size):
+                futures.append(self._executor.submit(_collapse_body, shm.name, start, end, rules))
+                start = end
+            return title, ''.join(future.result() for future in futures).strip()
+        finally:
+            _release(shm)
+
+    def clean(self, raw_content: str, url: Optional[str] = None, rule_set: Optional[str] = None,
+              linear_time: bool = False) -> Dict[str, Any]:
+        """
+        清洗一个页面，较大的页面在进程池中分段并行处理
+
+        Args:
+            raw_content: 原始爬虫内容
+            url: 页面地址，用于选择站点规则
+            rule_set: 显式指定的规则名
+            linear_time: 是否使用保证线性时间的有界正则
+
+        Returns:
+            dict: 与 clean_web_content 相同的 title、content 和 image_urls
+        """
+        clean_data = load_clean_data()
+        if len(raw_content) < self.min_parallel_size:
+            return clean_data.clean_web_content(raw_content, url, rule_set, linear_time=linear_time)
+
+        # 1. NUXT 载荷与站点规则（串行）
+        payload = clean_data.parse_nuxt_payload(raw_content, linear_time)
+        title = payload.title if payload is not None else ""
+        rules = clean_data.get_rule_registry().select(url or (payload.url if payload is not None else None), rule_set)
+        spans = [(0, payload.start), (payload.end, len(raw_content))] if payload is not None else None
+        fast_path = payload is not None and bool(payload.content_html)
+
+        data = _encode(raw_content)
+        shm = _share(data)
+        try:
+            # 2. 各段的图片扫描（没有快速路径时同时规范化）先行提交
+            futures = self._submit_segments(shm.name, data, raw_content, spans, linear_time,
+                                            want_text=not fast_path, want_images=True)
+
+            # 3. 快速路径：正文取自载荷中的 contentHtml
+            article_content = None
+            if fast_path:
+                _, article_content = self.extract_fields(
+                    self.normalize(payload.content_html, linear_time=linear_time), rules)
+
+            # 4. 完整路径：合并各段的规范化结果后抽取
+            if article_content is None or not title:
+                text_futures = futures
+                if fast_path:
+                    text_futures = self._submit_segments(shm.name, data, raw_content, spans, linear_time,
+                                                         want_text=True, want_images=False)
+                text = join_normalized([chunk for future in text_futures for chunk in future.result()[0]])
+                page_title, page_article = self.extract_fields(text, rules)
+                if not title:
+                    title = page_title or "无标题"
+                if article_content is None:
+                    article_content = page_article
+
+            # 5. 按模式与段的顺序合并图片URL
+            image_urls = clean_data.merge_image_urls(future.result()[1] for future in futures)
+        finally:
+            _release(shm)
+
+        return {
+            "title": title,
+            "content": article_content if article_content is not None else "无法提取文章内容",
+            "image_urls": image_urls,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口：并行清洗单个页面文件，输出 Output JSON
+    """
+    parser = argparse.ArgumentParser(description="文档内并行清洗超大页面")
+    parser.add_argument("page", help="页面文件路径")
+    parser.add_argument("--url", default=None, help="页面地址，用于选择站点规则")
+    parser.add_argument("--rule-set", default=None, help="显式指定的规则名")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="工作进程数，默认为 CPU 核数")
+    parser.add_argument("--segment-size", type=int, default=DEFAULT_SEGMENT_SIZE, help="每段的目标字节数")
+    parser.add_argument("--linear-time", action="store_true", help="使用保证线性时间的有界正则")
+    args = parser.parse_args(argv)
+
+    with open(args.page, "r", encoding="utf-8") as f:
+        raw_content = f.read()
+    started = time.perf_counter()
+    with ParallelCleaner(args.workers, args.segment_size) as cleaner:
+        cleaned_result = cleaner.clean(raw_content, args.url, args.rule_set, args.linear_time)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps(load_clean_data()._make_output(cleaned_result), ensure_ascii=False, indent=2))
+    print(f"✅ {len(raw_content) / 1e6:.1f}M 字符，耗时 {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+清洗结果缓存
+以原始输入的内容哈希加清洗规则版本为键：内存中为按字节数淘汰的 LRU 层，
+可选的 SQLite 磁盘层可在多个工作进程之间共享。规则文件改动（或重新加载
+清洗模块）后版本随之变化，旧条目自然不再命中。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import clean_ocr
+from clean_data_loader import load_clean_data
+
+# 默认内存层容量（按序列化后的 UTF-8 字节数计）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 缓存键：(命名空间, 规则版本, 内容哈希)
+CacheKey = Tuple[str, str, str]
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """
+    计算原始输入的内容哈希
+
+    Args:
+        data: 原始输入（字符串按 UTF-8 编码）
+
+    Returns:
+        32位十六进制摘要
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def rules_version(*paths: str) -> str:
+    """
+    根据规则相关文件的内容计算版本号，任何改动都会得到新的版本
+
+    Args:
+        paths: 参与计算的文件路径，不存在的文件会被忽略
+
+    Returns:
+        16位十六进制版本号
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class CacheStats:
+    """缓存命中统计"""
+
+    def __init__(self) -> None:
+        self.hits = 0          # 内存层命中
+        self.disk_hits = 0     # 磁盘层命中
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class ResultCache:
+    """内存 LRU + 可选 SQLite 磁盘层的两级结果缓存"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, db_path: Optional[str] = None) -> None:
+        """
+        Args:
+            max_bytes: 内存层容量上限（字节），超出时淘汰最久未使用的条目
+            db_path: SQLite 数据库路径；为 None 时只使用内存层
+        """
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.stats = CacheStats()
+        # 内存层保存序列化结果的 UTF-8 编码，容量按实际字节数计
+        self._entries: 'OrderedDict[CacheKey, bytes]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """按进程打开磁盘层连接（fork 出的子进程会重新连接）"""
+        if self.db_path is None:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "namespace TEXT NOT NULL, version TEXT NOT NULL, digest TEXT NOT NULL, "
+                "value TEXT NOT NULL, PRIMARY KEY (namespace, version, digest))"
+            )
+            db.commit()
+            self._db = db
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _remember(self, key: CacheKey, value: bytes) -> None:
+        """写入内存层并按容量淘汰（调用方持有锁）"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.stats.evictions += 1
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """
+        查询缓存
+
+        Args:
+            key: (命名空间, 规则版本, 内容哈希)
+
+        Returns:
+            缓存的值；未命中时返回 None
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return json.loads(value)
+
+            db = self._connection()
+            if db is not None:
+                row = db.execute(
+                    "SELECT value FROM results WHERE namespace = ? AND version = ? AND digest = ?", key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0].encode('utf-8', 'surrogatepass'))
+                    self.stats.disk_hits += 1
+                    return json.loads(row[0])
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        """
+        写入缓存（值需可序列化为 JSON）
+
+        Args:
+            key: (命名空间, 规则版本, 内容哈希)
+            value: 清洗结果
+        """
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, serialized.encode('utf-8', 'surrogatepass'))
+            db = self._connection()
+            if db is not None:
+                db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", key + (serialized,))
+                db.commit()
+
+    def get_or_compute(self, namespace: str, version: str, raw: Union[str, bytes],
+                       compute: Callable[[], Any]) -> Any:
+        """
+        命中时直接返回缓存结果，否则计算并写入缓存
+
+        Args:
+            namespace: 命名空间，区分不同的清洗流程
+            version: 规则版本
+            raw: 原始输入，用于计算内容哈希
+            compute: 未命中时调用的计算函数
+
+        Returns:
+            清洗结果
+        """
+        key = (namespace, version, content_hash(raw))
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def purge_stale(self, versions: Dict[str, str]) -> int:
+        """
+        删除磁盘层中规则版本已过期的条目
+
+        Args:
+            versions: 命名空间到当前规则版本的映射
+
+        Returns:
+            删除的条目数
+        """
+        db = self._connection()
+        if db is None:
+            return 0
+        with self._lock:
+            removed = 0
+            for namespace, version in versions.items():
+                cursor = db.execute(
+                    "DELETE FROM results WHERE namespace = ? AND version != ?", (namespace, version)
+                )
+                removed += cursor.rowcount
+            db.commit()
+            return removed
+
+    def close(self) -> None:
+        if self._db is not None and self._db_pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+
+# 各清洗流程的规则版本：命名空间 -> (计算版本时的清洗函数与规则注册表, 版本)；
+# 重新加载模块或规则后它们是新的对象，版本随之重新计算
+_versions: Dict[str, Tuple[Tuple[Any, ...], str]] = {}
+_versions_lock = threading.Lock()
+
+
+def _version(namespace: str, token: Tuple[Any, ...], *paths: str, config: Any = None) -> str:
+    with _versions_lock:
+        cached = _versions.get(namespace)
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        version = rules_version(*paths)
+        if config is not None:
+            digest = hashlib.blake2b(version.encode('ascii'), digest_size=8)
+            digest.update(json.dumps(config, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+            version = digest.hexdigest()
+        _versions[namespace] = (token, version)
+        return version
+
+
+def web_rules_version() -> str:
+    """网页清洗规则版本（代码与当前生效的站点抽取规则，规则文件改动后随之变化）"""
+    module = load_clean_data()
+    registry = module.get_rule_registry()
+    return _version("web", (module.clean_web_content, registry), module.__file__, config=registry.config)
+
+
+def ocr_rules_version() -> str:
+    """OCR清洗规则版本"""
+    return _version("ocr", (clean_ocr.extract_and_clean_ocr_data,), clean_ocr.__file__)
+
+
+def cached_clean_web_content(raw_content: str, cache: ResultCache) -> Dict[str, Any]:
+    """带缓存的 clean_web_content"""
+    return cache.get_or_compute(
+        "web", web_rules_version(), raw_content,
+        lambda: load_clean_data().clean_web_content(raw_content),
+    )
+
+
+def cached_build_output(raw_content: str, cache: ResultCache) -> Dict[str, Any]:
+    """带缓存的 build_output（与 clean_web_content 共用规则版本）"""
+    return cache.get_or_compute(
+        "web-output", web_rules_version(), raw_content,
+        lambda: load_clean_data().build_output(raw_content),
+    )
+
+
+def cached_extract_and_clean_ocr_data(json_data: Dict[str, Any], cache: ResultCache) -> str:
+    """带缓存的 extract_and_clean_ocr_data，以规范化后的 JSON 计算内容哈希"""
+    raw = json.dumps(json_data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return cache.get_or_compute(
+        "ocr", ocr_rules_version(), raw,
+        lambda: clean_ocr.extract_and_clean_ocr_data(json_data),
+    )
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import base64
+import json
+
+from article_pipeline import ArticlePipeline, HttpPool, http_image_fetcher, http_ocr_client
+from image_index import ImageSeenIndex
+
+
+def _ocr_json(image: str) -> dict:
+    """替身 OCR：图片名中的数字作为涨幅"""
+    change = 100 + int("".join(filter(str.isdigit, image)) or 0)
+    return {"data": {"results": [{"words": [{"text": "月度涨幅王"}, {"text": f"金盾股份 {change}% 2万元"}]}]}}
+
+
+def _page(n: int, images: list) -> dict:
+    tags = "".join(f'<img src="{url}">' for url in images)
+    return {"input": f"如何看第{n}篇？ 内容仅供娱乐 正文{n}{tags}（文章来源：测试）", "url": f"https://a.com/{n}"}
+
+
+def test_pipeline_with_fake_endpoints_bounds_concurrency():
+    """测试替身端点下的合并结果、图片去重、错误记录与各阶段并发上限"""
+    active = {"fetch": 0, "ocr": 0}
+    peak = {"fetch": 0, "ocr": 0}
+
+    async def track(stage: str) -> None:
+        active[stage] += 1
+        peak[stage] = max(peak[stage], active[stage])
+        await asyncio.sleep(0.01)
+        active[stage] -= 1
+
+    async def fetch(url: str) -> bytes:
+        await track("fetch")
+        if url.endswith("broken.png"):
+            raise IOError("404")
+        return url.rsplit("/", 1)[1].encode()
+
+    async def recognize(image: bytes, url: str) -> dict:
+        await track("ocr")
+        return _ocr_json(image.decode())
+
+    pages = [_page(n, [f"http://img.com/s{n}.png", "http://img.com/shared.png"]) for n in range(12)]
+    pages.append(_page(99, ["http://img.com/broken.png"]))
+    pipeline = ArticlePipeline(fetch, recognize, image_index=ImageSeenIndex(capacity=1000),
+                               fetch_workers=3, ocr_workers=2, queue_size=2)
+
+    async def collect() -> list:
+        return [record async for record in pipeline.run(pages)]
+
+    records = {record["id"]: record for record in asyncio.run(collect())}
+    assert sorted(records) == list(range(13))
+    assert peak["fetch"] <= 3 and peak["ocr"] <= 2 and peak["fetch"] > 1
+
+    first = records[0]
+    assert first["title"] == "如何看第0篇？" and first["url"] == "https://a.com/0"
+    assert [image["url"] for image in first["images"]] == ["http://img.com/s0.png", "http://img.com/shared.png"]
+    assert "金盾股份: 涨幅100%" in first["images"][0]["report"]
+    statuses = [image["status"] for record in records.values() for image in record["images"]
+                if image["url"].endswith("shared.png")]
+    assert sorted(statuses) == ["ocr"] + ["seen"] * 11
+    assert records[12]["images"][0]["status"] == "error"
+
+
+def test_pipeline_retries_images_that_failed_in_earlier_run():
+    """测试图片在 OCR 成功后才登记：上次下载失败的图片下次运行时重试，成功的图片不再处理"""
+    index = ImageSeenIndex(capacity=1000)
+    failing = {"http://img.com/flaky.png"}
+    fetched = []
+
+    async def fetch(url: str) -> bytes:
+        fetched.append(url)
+        if url in failing:
+            raise IOError("503")
+        return url.rsplit("/", 1)[1].encode()
+
+    async def recognize(image: bytes, url: str) -> dict:
+        return _ocr_json(image.decode())
+
+    def run_once() -> dict:
+        pipeline = ArticlePipeline(fetch, recognize, image_index=index)
+        pages = [_page(1, ["http://img.com/ok.png", "http://img.com/flaky.png"])]
+
+        async def collect() -> list:
+            return [record async for record in pipeline.run(pages)]
+
+        record = asyncio.run(collect())[0]
+        return {image["url"]: image["status"] for image in record["images"]}
+
+    assert run_once() == {"http://img.com/ok.png": "ocr", "http://img.com/flaky.png": "error"}
+    assert "http://img.com/flaky.png" not in index
+
+    failing.clear()
+    fetched.clear()
+    assert run_once() == {"http://img.com/ok.png": "seen", "http://img.com/flaky.png": "ocr"}
+    assert fetched == ["http://img.com/flaky.png"]
+    assert "http://img.com/flaky.png" in index
+
+
+def test_pipeline_over_local_http_servers_reuses_connections():
+    """测试通过本地替身 HTTP 服务下载图片与调用 OCR，并复用连接"""
+    connections = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connections.append(writer)
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode().split(" ")
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            body = await reader.readexactly(length)
+            if method == "GET":
+                payload = path.encode()
+            else:
+                image = base64.b64decode(json.loads(body)["image"]).decode()
+                payload = json.dumps(_ocr_json(image)).encode()
+            # 交替使用 Content-Length 与 chunked 响应
+            if len(connections) % 2:
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(payload), payload))
+            else:
+                writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n%x\r\n%s\r\n0\r\n\r\n"
+                             % (len(payload), payload))
+            await writer.drain()
+        writer.close()
+
+    async def scenario() -> list:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        pool = HttpPool(max_per_host=2)
+        pipeline = ArticlePipeline(http_image_fetcher(pool), http_ocr_client(f"http://127.0.0.1:{port}/ocr", pool),
+                                   fetch_workers=4, ocr_workers=4)
+        pages = [_page(n, [f"http://127.0.0.1:{port}/p{n}.png"]) for n in range(10)]
+        try:
+            records = [record async for record in pipeline.run(pages)]
+        finally:
+            await pool.close()
+            server.close()
+            await server.wait_closed()
+        assert pool.requests == 20 and pool.connections_opened <= 2
+        return records
+
+    records = asyncio.run(scenario())
+    assert len(records) == 10
+    assert all(f"涨幅{100 + record['id']}%" in record["images"][0]["report"] for record in records)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+from batch_clean import run_batch
+from clean_data_loader import load_clean_data
+from image_index import ImageSeenIndex
+
+
+def _make_input() -> io.BytesIO:
+    """构造包含正常记录、空行和错误记录的输入"""
+    lines = [
+        json.dumps({"params": {"input": "如何测试？ 内容仅供娱乐 正文（文章来源：测试）"}}, ensure_ascii=False),
+        "",
+        "not json",
+        json.dumps({"params": {"input": '<img src="http://a.com/x.png">'}}),
+    ]
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+def test_run_batch_ordered_with_errors():
+    """测试批处理：有序输出、空行跳过与单条错误捕获"""
+    for workers in (0, 2):
+        output = io.StringIO()
+        stats = run_batch(_make_input(), output, workers=workers, max_in_flight=1)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        assert [record["line"] for record in records] == [1, 3, 4]
+        assert records[0]["output"]["title"] == "如何测试？"
+        assert records[0]["output"]["extract_status"] == "success"
+        assert "error" in records[1]
+        assert records[2]["output"]["image_urls"] == ["http://a.com/x.png"]
+        assert (stats.records, stats.errors) == (3, 1)
+
+
+def test_run_batch_unordered():
+    """测试无序输出仍然覆盖全部记录"""
+    output = io.StringIO()
+    stats = run_batch(_make_input(), output, workers=2, ordered=False, chunk_size=2)
+    lines = sorted(json.loads(line)["line"] for line in output.getvalue().splitlines())
+
+    assert lines == [1, 3, 4]
+    assert stats.records == 3
+
+
+def test_run_batch_with_process_indexes(tmp_path):
+    """测试 --dedup 与 --image-index：重复文章标记为 duplicate，图片登记到快照，下次运行为 seen"""
+    body = "这是一段足够长的正文，用来测试近重复检测是否能在批处理中生效。" * 3
+    page = f'如何测试？ 内容仅供娱乐 {body}<img src="http://a.com/x.png">（文章来源：测试）'
+    lines = [json.dumps({"params": {"input": page}}, ensure_ascii=False)] * 2
+    snapshot = str(tmp_path / "images.bloom")
+
+    output = io.StringIO()
+    run_batch(io.BytesIO("\n".join(lines).encode("utf-8")), output, workers=0,
+              dedup_threshold=0.9, image_snapshot=snapshot)
+    first, second = [json.loads(line)["output"] for line in output.getvalue().splitlines()]
+    assert first["extract_status"] == "success" and first["image_status"] == ["new"]
+    assert second["extract_status"] == "duplicate"
+    # 运行结束后撤销进程级索引
+    assert "image_status" not in load_clean_data().build_output(page)
+
+    # 工作进程退出时把已见集合合并回快照
+    output = io.StringIO()
+    run_batch(io.BytesIO(lines[0].encode("utf-8")), output, workers=2, image_snapshot=snapshot)
+    assert json.loads(output.getvalue())["output"]["image_status"] == ["seen"]
+    other = '<img src="http://a.com/y.png">'
+    run_batch(io.BytesIO(json.dumps({"params": {"input": other}}).encode("utf-8")), io.StringIO(),
+              workers=1, image_snapshot=snapshot)
+    assert "http://a.com/y.png" in ImageSeenIndex(snapshot_path=snapshot)
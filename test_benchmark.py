@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from benchmark import compare_to_baseline, generate_ocr_payload, generate_page
+from clean_data_loader import load_clean_data
+
+clean_data = load_clean_data()
+
+
+def test_generators_are_reproducible_and_parameterized():
+    """测试合成数据可复现，且转义深度、载荷与锚点缺失参数生效"""
+    page = generate_page(20_000, nuxt_size=500, image_density=8.0, escape_depth=2, seed=1)
+    assert page == generate_page(20_000, nuxt_size=500, image_density=8.0, escape_depth=2, seed=1)
+    assert len(page) >= 20_000
+    assert "\\\\u003Cimg src=\\\\\"https:\\\\u002F\\\\u002Fimg.example.com" in page
+
+    result = clean_data.clean_web_content(page)
+    assert result["title"] == "如何看待合成页面？"
+    assert result["content"].endswith("（文章来源：合成）")
+    assert len(result["image_urls"]) > 10
+
+    # 每种转义深度下生成的图片都能被扫描出来，且地址已解码
+    for escape_depth in range(4):
+        page = generate_page(20_000, image_density=8.0, escape_depth=escape_depth, seed=2)
+        for linear_time in (False, True):
+            urls = clean_data.extract_image_urls(page, linear_time)
+            assert len(urls) == page.count("img.example.com")
+            assert all(url.startswith("https://img.example.com/") for url in urls)
+
+    missing = clean_data.build_output(generate_page(5_000, missing_anchor=True))
+    assert missing["extract_status"] == "failed"
+
+    words = generate_ocr_payload(500)["data"]["results"][0]["words"]
+    assert len(words) == 500
+
+
+def test_compare_to_baseline():
+    """测试基线比较只报告超出容差的退化"""
+    baseline = {"web": {"mb_per_second": 10.0, "p99_ms": 5.0, "peak_memory": 1000}}
+    assert compare_to_baseline({"web": {"mb_per_second": 9.0, "p99_ms": 5.5, "peak_memory": 1100}}, baseline) == []
+    regressions = compare_to_baseline({"web": {"mb_per_second": 5.0, "p99_ms": 5.0, "peak_memory": 1000},
+                                       "new": {"mb_per_second": 1.0, "p99_ms": 1.0, "peak_memory": 1}}, baseline)
+    assert len(regressions) == 1 and regressions[0].startswith("web: 吞吐")
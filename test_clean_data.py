@@ -5,8 +5,10 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import asyncio
 import importlib.util
 import sys
+from types import SimpleNamespace
 
 # 动态导入 clean-data.py 模块
 spec = importlib.util.spec_from_file_location("clean_data", "clean-data.py")
@@ -63,6 +65,8 @@ def test_clean_web_content():
     else:
         print(f"❌ 图片URL提取失败: 期望包含 '{expected_image_url}'")
         print(f"   实际提取到的URL: {result['image_urls']}")
+    # 与原实现一致：作者头像、focusPhoto 等多段路径的转义地址不提取
+    assert result['image_urls'] == [expected_image_url]
     
     # 验证内容
     if "内容仅供娱乐" in result['content'] and "（文章来源：东方财富研究中心）" in result['content']:
@@ -73,5 +77,155 @@ def test_clean_web_content():
     print("\n" + "=" * 60)
     print("🎉 测试完成!")
 
+def test_extract_image_urls_escaped_img_tags():
+    """测试单遍图片URL扫描：img 标签、直接URL与任意转义层数的 img 标签依次合并、去重"""
+    raw = (
+        '<IMG alt="x" src="http://a.com/x.png?w=1"> '
+        'https:\\u002F\\u002Fe.com\\u002Fdir\\u002Fa.jpg '
+        '\\u003Cimg src=\\"https:\\u002F\\u002Ff.com\\u002Fdir\\u002Fb.PNG\\"\\u003E '
+        '\\\\\\u003CIMG alt=\\\\\\"图\\\\\\" src=\\\\\\"https:\\\\u002F\\\\u002Fg.com\\\\u002Fc.bmp?a=1\\\\u0026b=2\\\\\\"\\\\\\u003E '
+        '\\\\u003Cimg src=\\\\u0022https:\\\\u002F\\\\u002Fe.com\\\\u002Fdir\\\\u002Fa.jpg\\\\u0022\\\\u003E '
+        '<img src="https://i.com/no-extension">'
+    )
+    expected = [
+        "http://a.com/x.png?w=1",
+        "http://a.com/x.png",
+        "https://e.com/dir/a.jpg",
+        "https://f.com/dir/b.PNG",
+        "https://g.com/c.bmp?a=1&b=2",
+    ]
+    
+    assert clean_data.extract_image_urls(raw) == expected
+    assert clean_data.extract_image_urls(raw, linear_time=True) == expected
+    # 不在 img 标签中的转义地址（如 NUXT 中的 focusPhoto）不提取
+    assert clean_data.extract_image_urls('"https:\\\\u002F\\\\u002Fcdn.com\\\\u002Fa\\\\u002Fb.jpg"') == []
+
+
+def test_parse_nuxt_payload_string_literals():
+    """测试 NUXT 载荷解析：字符串中的 ); 不会提前结束载荷，并能直接取出字段"""
+    raw = (
+        '<p>head</p><script>window.__NUXT__=(function(a,b){a.title=b;a.author="SYSTEM";'
+        'a.contentHtml="<p>内容仅供娱乐 \\"q\\" );</p><img src=\\"http://x.com/y.png\\">（文章来源：z）";'
+        'return {}}({},"标题);"));</script><p>tail</p>'
+    )
+    
+    payload = clean_data.parse_nuxt_payload(raw)
+    assert raw[payload.end:] == '</script><p>tail</p>'
+    assert payload.title == "标题);"
+    assert payload.author == "SYSTEM"
+    assert payload.image_urls == ["http://x.com/y.png"]
+    
+    result = clean_data.clean_web_content(raw)
+    assert result['title'] == "标题);"
+    assert result['content'] == '内容仅供娱乐 "q" );（文章来源：z）'
+
+def test_normalize_page_views():
+    """测试单遍规范化：去标签、任意深度转义解码、空白合并与区间跳过"""
+    raw = '  <a href=x>hi</a>  \\u003Cb\\\\u003E \n x <br> SKIP  y '
+    skip = raw.index('SKIP')
+    
+    page = clean_data.normalize_page(raw, keep_decoded=True)
+    assert page.text == 'hi <b> x SKIP y'
+    assert page.decoded == '  <a href=x>hi</a>  <b> \n x <br> SKIP  y '
+    
+    page = clean_data.normalize_page(raw, [(0, skip), (skip + 4, len(raw))])
+    assert page.text == 'hi <b> x y'
+    assert page.decoded is None
+
+def test_main_batch_concurrency_limit():
+    """测试异步批量接口：接受异步迭代器、限制并发并产出全部结果"""
+    inputs = ["如何%d？ 内容仅供娱乐 正文%d（文章来源：测试）" % (i, i) for i in range(6)]
+    consumed = []
+    
+    async def args_stream():
+        for raw in inputs:
+            consumed.append(raw)
+            yield SimpleNamespace(params={"input": raw})
+    
+    async def run():
+        results = {}
+        async for index, output in clean_data.main_batch(args_stream(), concurrency=2):
+            # 背压：读取的输入不会超过已产出结果数加并发上限
+            assert len(consumed) <= len(results) + 1 + 2
+            results[index] = output
+        single = await clean_data.main(SimpleNamespace(params={"input": inputs[0]}))
+        return results, single
+    
+    results, single = asyncio.run(run())
+    assert sorted(results) == list(range(6))
+    assert results[3]["title"] == "如何3？"
+    assert results[0] == single
+
+def test_rule_registry_selection_and_anchors():
+    """测试站点规则注册表：按域名选择规则，一次扫描抽取标题与正文并去除噪声"""
+    registry = clean_data.RuleRegistry({
+        "default": "eastmoney",
+        "rule_sets": [
+            {"name": "eastmoney", "title": {"start": ["如何"], "end": ["？"]},
+             "body": {"start": ["内容仅供娱乐"], "end": ["（文章来源", "）"]}},
+            {"name": "news", "domains": ["example.com"],
+             "title": {"start": ["【"], "end": ["】"]},
+             "body": {"start": ["正文："], "end": ["（完）"]},
+             "noise": ["广告位"]},
+        ],
+    })
+    
+    assert registry.select("https://www.example.com/a").name == "news"
+    assert registry.select("https://other.cn/a").name == "eastmoney"
+    assert registry.select("https://www.example.com/a", name="eastmoney").name == "eastmoney"
+    
+    news = registry.select("https://example.com/")
+    text = "头部 （完） 【标题一】 正文：第一段 广告位第二段（完） 【标题二】"
+    title_span, body_span = news.locate(text)
+    assert text[title_span[0]:title_span[1]] == "【标题一】"
+    assert news.clean_body(text[body_span[0]:body_span[1]]) == "正文：第一段 第二段（完）"
+    
+    eastmoney = registry.default
+    title_span, body_span = eastmoney.locate("如何 内容仅供娱乐 abc（文章来源 x")
+    assert title_span is None and body_span is None
+
+def test_linear_time_and_stage_budgets():
+    """测试线性时间模式与分阶段时间预算"""
+    # 大量未闭合的 <img 与 < 在默认模式下会反复扫描到文末
+    evil = "<img a" * 5000 + "<" * 5000 + "如何做？"
+    result = clean_data.clean_web_content(evil, linear_time=True)
+    assert result["title"] == "如何做？"
+    
+    page = '如何做？ 内容仅供娱乐 abc（文章来源：x） <img src="http://a.com/1.png">'
+    assert clean_data.clean_web_content(page, linear_time=True) == clean_data.clean_web_content(page)
+    
+    # 图片阶段预算为0：前面阶段的标题与正文作为部分结果返回
+    output = clean_data.build_output(page, stage_budgets={"images": 0})
+    assert output["extract_status"] == "timeout"
+    assert output["title"] == "如何做？"
+    assert output["content"] == "内容仅供娱乐 abc（文章来源：x）"
+    assert clean_data.build_output(page, time_budget=0)["extract_status"] == "timeout"
+    assert clean_data.build_output(page, time_budget=10)["extract_status"] == "success"
+
+def test_field_selection_skips_stages():
+    """测试按字段选择只执行所需阶段"""
+    page = '如何做？ 内容仅供娱乐 abc（文章来源：x） <img src="http://a.com/1.png">'
+    stages = []
+    clean_data.set_stage_hook(lambda stage, *args: stages.append(stage))
+    try:
+        assert clean_data.build_output(page, fields=["image_urls", "image_count"]) == {
+            "image_urls": ["http://a.com/1.png"], "image_count": 1}
+        assert stages == ["images"]
+        
+        stages.clear()
+        assert clean_data.build_output(page, fields="content,word_count") == {
+            "content": "内容仅供娱乐 abc（文章来源：x）", "word_count": 18}
+        assert "images" not in stages
+    finally:
+        clean_data.set_stage_hook(None)
+    
+    result = asyncio.run(clean_data.main({"params": {"input": page, "fields": ["title"]}}))
+    assert result == {"title": "如何做？"}
+    try:
+        clean_data.build_output(page, fields=["summary"])
+        assert False, "未知字段应报错"
+    except ValueError:
+        pass
+
 if __name__ == "__main__":
     test_clean_web_content() 
\ No newline at end of file
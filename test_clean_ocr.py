@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import random
+import tempfile
+
+from clean_ocr import (SECTION_RULES, SectionTable, StockRow, clean_stock_data, clean_text_segment, extract_and_clean_ocr_data,
+                       extract_and_clean_ocr_stream, format_amount, format_stock_row, iter_ocr_inputs,
+                       iter_ocr_pages, organize_content_improved, parse_stock_row, parse_stock_tables,
+                       reconstruct_rows, write_content_improved)
+
+
+def test_parse_and_format_stock_rows():
+    """测试股票行一次解析为记录，格式化与原有输出一致"""
+    assert parse_stock_row("金盾股份 200%25") == StockRow("金盾股份", "200%", 25.0, "万元")
+    assert parse_stock_row("*ST 名家 -66.34% 859.92") == StockRow("名家", "-66.34%", 859.92, "元")
+    assert parse_stock_row("涨幅 5%") == StockRow("涨幅", "5%", None, "万元")
+    assert parse_stock_row("数据来源:东方财富Choice数据") is None
+
+    assert format_stock_row(parse_stock_row("深中华A169%2.7")) == "深中华A: 涨幅169%, 月末资产3万元"
+    assert clean_stock_data("康隆达-36.77% 35.50") == "康隆达: 跌幅36.77%, 月末资产35.5元"
+    assert clean_stock_data("涨幅 5%") == "涨幅 5%"
+    # 首个 "名称+涨跌幅" 缺少资产时，继续使用后面带资产的行
+    assert clean_stock_data("甲5% 乙6%7") == "乙: 涨幅6%, 月末资产7万元"
+    assert clean_text_segment("  银之杰   285%  23709 ") == "银之杰: 涨幅285%, 月末资产23709万元"
+    assert clean_text_segment("1%2") == "1% 2"
+
+
+def test_stock_tables_validate_and_resolve():
+    """测试列式股票表按复利关系校验，并修正粘连数字的切分"""
+    gainers = ["深中华A169%2.7", "克来机电207%8.3", "金盾股份 200%25"]
+    losers = ["ST天喻-49.91% 5009.21", "百通能源-30.25% 3494.03"]
+    table = parse_stock_tables([gainers, losers], resolve=False)
+    assert table.table_count == 2 and len(table) == 5
+    assert table.validate() == [True] * 5
+    assert table.final_assets() == [250000.0, 3494.03]
+
+    # "%" 丢失后数字粘连：按上一期资产选出满足复利关系的切分
+    table = parse_stock_tables([["深中华A169%2.7", "克来机电2078.3", "金盾股份 200%25"]])
+    assert table.format_rows(0)[1] == "克来机电: 涨幅207%, 月末资产8万元"
+    assert table.validate() == [True] * 3
+
+    # 大部分行不满足复利关系的表不做修正
+    table = parse_stock_tables([["甲10%5", "乙2078.3"]])
+    assert table.format_rows(0) == ["甲: 涨幅10%, 月末资产5万元", "乙2078.3"]
+
+
+def test_summary_computed_from_data():
+    """测试总结中的金额由数据计算"""
+    assert format_amount(11420010000.0) == "114亿元"
+    assert format_amount(3.61) == "3.61元"
+    assert format_amount(26900.0) == "2.69万元"
+    content = organize_content_improved([], ["甲: 涨幅100%, 月末资产2万元"], ["乙: 跌幅50%, 月末资产5000.0元"])
+    assert "1万元本金最终可达到2万元" in content
+    assert "1万元本金最终仅剩5000元" in content
+
+
+def test_streaming_multi_page_ingestion():
+    """测试流式读取多页OCR结果，与一次性加载的结果一致，并支持目录与 JSONL 输入"""
+    pages = [
+        [{"text": "东方财富 权威"}, {"text": "金盾股份 200%25"}, {"text": "words \"words\": ["}],
+        [],
+        [{"text": "瑞松科技-42.85% 3.61"}, {"text": "数据来源:东方财富Choice数据"}],
+    ]
+    data = {"log_id": "x", "data": {"results": [{"words": words} for words in pages]}}
+    raw = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    assert list(iter_ocr_pages(io.BytesIO(raw), chunk_size=7)) == [pages[0], pages[2]]
+    content = extract_and_clean_ocr_stream(io.BytesIO(raw))
+    assert content == extract_and_clean_ocr_data(data)
+    assert "- 金盾股份: 涨幅200%, 月末资产25万元" in content
+    assert "- 瑞松科技: 跌幅42.85%, 月末资产3.61元" in content
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "a.json"), "wb") as f:
+            f.write(raw)
+        with open(os.path.join(tmp, "b.jsonl"), "wb") as f:
+            f.write(raw + b"\n\n" + raw + b"\n")
+        sources = [source for source, cleaned in iter_ocr_inputs([tmp]) if cleaned == content]
+        assert [os.path.basename(source) for source in sources] == ["a.json", "b.jsonl:1", "b.jsonl:3"]
+
+
+def test_layout_row_reconstruction():
+    """测试按文字框重建表格行：乱序、轻微倾斜的文字框按行列还原，单元格不会粘连"""
+    table = [["连续买入月度涨幅王"], ["深中华A", "169%", "2.7"], ["友阿股份", "122%", "1142001"],
+             ["*ST", "卓朗", "-65.93%", "6.32"]]
+    words = []
+    for y, row in enumerate(table):
+        x = 0
+        for text in row:
+            top = y * 40 + random.Random(x).uniform(-3, 3)
+            words.append({"text": text, "location": {"left": x, "top": top, "width": 20 * len(text), "height": 24}})
+            # "*ST" 与 "卓朗" 紧挨着，属于同一单元格
+            x += 20 * len(text) + (4 if text == "*ST" else 60)
+    random.Random(0).shuffle(words)
+
+    rows = reconstruct_rows(words)
+    assert rows == [["连续买入月度涨幅王"], ["深中华A", "169%", "2.7"], ["友阿股份", "122%", "1142001"],
+                    ["*ST 卓朗", "-65.93%", "6.32"]]
+    assert reconstruct_rows(words + [{"text": "无位置"}]) is None
+
+    content = extract_and_clean_ocr_data({"data": {"results": [{"words": words}]}}, layout=True)
+    assert "- 友阿股份: 涨幅122%, 月末资产1142001万元" in content
+    assert "- *ST 卓朗: 跌幅65.93%, 月末资产6.32元" in content
+
+
+def test_section_table_and_streaming_writer():
+    """测试章节关键词表一次扫描归类片段，流式写出与拼接结果一致"""
+    sections = SectionTable(SECTION_RULES + [
+        {"name": "risk", "keywords": ["风险提示"], "heading": "## 风险提示", "group": "footer"},
+        {"name": "source", "keywords": ["数据"], "heading": "## 来源"},
+    ])
+    assert [rule.name for rule in sections.matches("东方财富 权威")] == ["title"]
+    assert sections.matches("东方财富") == []
+    assert [rule.name for rule in sections.matches("数据来源:截至收盘")] == ["notes", "source"]
+
+    segments = ["东方财富 权威·专业", "年初1万元入市", "风险提示：投资有风险", "数据来源:Choice"]
+    out = io.StringIO()
+    written = write_content_improved(out, segments, ["甲: 涨幅100%, 月末资产2万元"], [], sections=sections)
+    content = out.getvalue()
+    assert written == len(content)
+    assert content == organize_content_improved(segments, ["甲: 涨幅100%, 月末资产2万元"], [], sections=sections)
+    assert content.startswith("# 东方财富 权威·专业\n\n## 主题\n\n\n## 投资假设\n年初1万元入市\n## 来源\n数据来源:Choice")
+    assert "## 风险提示\n风险提示：投资有风险\n## 数据说明\n数据来源:Choice" in content
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from columnar import ColumnarFile, OutputBatch, pack_jsonl, split_url
+
+OUTPUTS = [
+    {"title": "如何看待行情？", "content": "内容仅供娱乐 正文一", "word_count": 10, "extract_status": "ok",
+     "image_urls": ["https://img.example.com/a/1.jpg", "https://img.example.com/a/2.png"], "image_count": 2},
+    {"title": "如何看待行情？", "content": "", "word_count": 0, "extract_status": "failed",
+     "image_urls": [], "image_count": 0},
+    {"title": "无标题", "content": "正文三", "word_count": 3, "extract_status": "ok",
+     "image_urls": ["https://img.example.com/a/1.jpg"], "image_count": 1, "image_status": ["seen"]},
+]
+
+
+def test_batch_interns_repeated_strings():
+    """测试内存中的列式容器：重复取值只登记一次，记录视图可还原为原字典"""
+    batch = OutputBatch()
+    batch.extend(OUTPUTS * 100)
+    assert len(batch) == 300
+    # 标题2个、状态2个、主机1个、路径2个、图片状态1个
+    assert len(batch.pool) == 8
+    assert [batch[i].to_dict() for i in range(3)] == OUTPUTS
+    assert batch[-1]["image_status"] == ["seen"]
+    with pytest.raises(KeyError):
+        batch[0]["image_status"]
+    assert batch.column("word_count")[:3] == [10, 0, 3]
+    assert split_url("https://img.example.com") == ("https://img.example.com", "")
+
+
+def test_columnar_file_round_trip_and_column_scan(tmp_path):
+    """测试列式文件的写出与 mmap 读取：可只扫描单列，记录与原结果一致"""
+    lines = [json.dumps({"line": i, "output": output}, ensure_ascii=False) for i, output in enumerate(OUTPUTS)]
+    lines.insert(1, json.dumps({"line": 9, "error": "ValueError: 坏记录"}, ensure_ascii=False))
+    path = str(tmp_path / "web.col")
+    pack_jsonl(lines).write(path)
+    with ColumnarFile(path) as columnar:
+        assert len(columnar) == 3
+        assert sum(columnar.column("word_count").values) == 13
+        assert list(columnar.column("image_urls")) == [output["image_urls"] for output in OUTPUTS]
+        assert [record.to_dict() for record in columnar] == OUTPUTS
+        # 同一编号的字符串只解码一次
+        assert columnar[0]["title"] is columnar[1]["title"]
+
+    report = "📊 本期涨幅王\n\n深中华A 169% 2.7万元\n\n📊 本期涨幅王"
+    ocr_path = str(tmp_path / "ocr.col")
+    batch = OutputBatch("ocr")
+    batch.extend({"source": f"{i}.json", "content": report} for i in range(10))
+    batch.write(ocr_path)
+    with ColumnarFile(ocr_path) as columnar:
+        assert columnar[9].to_dict() == {"source": "9.json", "content": report}
+
+    with pytest.raises(ValueError):
+        ColumnarFile(__file__)
+
+
+def test_partial_outputs_round_trip_without_defaults(tmp_path):
+    """测试只含部分字段的 Output（fields 选择）往返后不会补出默认值"""
+    partial = [
+        {"image_urls": ["https://img.example.com/a/1.jpg"]},
+        {"title": "如何看待行情？", "word_count": 0},
+        {},
+        OUTPUTS[0],
+    ]
+    batch = OutputBatch()
+    batch.extend(partial)
+    assert [record.to_dict() for record in batch] == partial
+    with pytest.raises(KeyError):
+        batch[0]["word_count"]
+
+    path = str(tmp_path / "partial.col")
+    batch.write(path)
+    with ColumnarFile(path) as columnar:
+        assert [record.to_dict() for record in columnar] == partial
+        assert list(columnar.column("word_count")) == [None, 0, None, 10]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import gc
+import io
+import json
+
+import dump_scanner
+from clean_data_loader import load_clean_data
+
+PAGES = [
+    '<div>导航</div>如何理财？<p>内容仅供娱乐 正文<img src="http://a.com/x.png"></p>（文章来源：测试）',
+    'https:\\\\u002F\\\\u002Fb.com\\\\u002Fy.jpg 没有锚点的页面',
+    '<script>window.__NUXT__=(function(a){return {data:[{article:{title:"如何？",contentHtml:"\\u003Cp\\u003E内容仅供娱乐 载荷正文（文章来源：x）\\u003C\\u002Fp\\u003E"}}]}}(1));</script>',
+    '<meta content="如何？">如何投资？ 内容仅供娱乐 再一篇（文章来源：y）',
+]
+
+
+def test_scan_dump_matches_build_output(tmp_path):
+    """测试字节级清洗与 build_output 结果一致，NUXT 页面与锚点位于标签内的页面回退为整页解码"""
+    path = tmp_path / "dump.txt"
+    path.write_bytes(b"\n".join(page.encode("utf-8") for page in PAGES) + b"\n\n")
+    clean_data = load_clean_data()
+
+    for workers in (0, 2):
+        output = io.StringIO()
+        stats = dump_scanner.scan_dump(str(path), output, workers=workers, chunk_pages=1)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        assert [record["page"] for record in records] == [0, 1, 2, 3]
+        for record, page in zip(records, PAGES):
+            assert record["output"] == clean_data.build_output(page)
+        assert records[0]["output"]["image_urls"] == ["http://a.com/x.png"]
+        assert (stats.pages, stats.fallbacks, stats.errors) == (4, 2, 0)
+
+
+def test_scan_page_reads_spans_from_buffer():
+    """测试在大缓冲区中只按区间扫描单个页面"""
+    buffer = ("无关内容" * 1000 + PAGES[0] + "如何无关？" * 1000).encode("utf-8")
+    start = len(("无关内容" * 1000).encode("utf-8"))
+    end = start + len(PAGES[0].encode("utf-8"))
+    output, fallback = dump_scanner.scan_page(buffer, start, end)
+    assert not fallback
+    assert output["title"] == "如何理财？"
+    assert output["content"] == "内容仅供娱乐 正文（文章来源：测试）"
+
+
+def test_scan_page_falls_back_on_hidden_anchors():
+    """测试被标签隔开或转义书写的锚点会回退为整页解码，结果与 build_output 一致"""
+    clean_data = load_clean_data()
+    hidden = [
+        '如何看？ 内容仅供<b>娱乐</b> 正文…（文章来源：x）',
+        '如何看？ 内容仅供娱乐 正文…（文章<i>来源</i>：x）',
+        '如<b>何</b>看？ 内容仅供娱乐 正文（文章来源：x）',
+        '如何看？ \\u5185容仅供娱乐 正文（文章来源：x）',
+    ]
+    for page in hidden:
+        data = page.encode("utf-8")
+        output, fallback = dump_scanner.scan_page(data, 0, len(data))
+        assert fallback
+        assert output == clean_data.build_output(page)
+        assert output["extract_status"] == "success"
+
+    # 没有任何锚点的页面仍在字节层面处理
+    page = '<div>导航</div><p>没有锚点的正文</p>'
+    output, fallback = dump_scanner.scan_page(page.encode("utf-8"), 0, len(page.encode("utf-8")))
+    assert not fallback
+    assert output == clean_data.build_output(page)
+
+
+def test_anchor_guards_released_with_rules():
+    """测试隐藏锚点正则随规则对象一起回收，反复重新加载规则不会累积"""
+    clean_data = load_clean_data()
+    spec = clean_data._DEFAULT_RULES["rule_sets"][0]
+    before = len(dump_scanner._anchor_guards)
+    for _ in range(20):
+        rules = clean_data.RuleSet(spec)
+        for linear_time in (False, True):
+            assert dump_scanner._anchor_guard(rules, linear_time) is not None
+    assert dump_scanner._anchor_guard(rules, False) is dump_scanner._anchor_guard(rules, False)
+    del rules
+    gc.collect()
+    assert len(dump_scanner._anchor_guards) == before
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from clean_data_loader import load_clean_data
+from image_index import BloomFilter, ImageSeenIndex, canonicalize_image_url
+
+DFCFW = "https://np-newspic.dfcfw.com/download/D25730774900815789399.jpg"
+
+
+def test_canonicalize_image_url():
+    """测试转义、协议、端口、查询串与尺寸变体的规范化"""
+    variants = [
+        "https:\\\\u002F\\\\u002Fnp-newspic.dfcfw.com\\\\u002Fdownload\\\\u002FD25730774900815789399_w1563h5643_o.jpg",
+        "http://NP-newspic.dfcfw.com:80/download//D25730774900815789399.JPEG?size=small#top",
+        "https://np-newspic.dfcfw.com/download/D25730774900815789399_w800h600.jpg",
+    ]
+    assert {canonicalize_image_url(url) for url in variants} == {DFCFW}
+    assert canonicalize_image_url("https://a.com/%E5%9B%BE.png") == canonicalize_image_url("https://a.com/图.png")
+    assert canonicalize_image_url("https://a.com/x.png?id=1", keep_query=True) == "https://a.com/x.png?id=1"
+
+
+def test_seen_index_marks_and_syncs_between_workers(tmp_path):
+    """测试 new / seen 标记、快照合并共享与 build_output 中的 image_status"""
+    bloom = BloomFilter(capacity=1000, error_rate=1e-6)
+    assert not bloom.add("a") and bloom.add("a") and "b" not in bloom
+
+    path = str(tmp_path / "images.bloom")
+    first = ImageSeenIndex(capacity=1000, snapshot_path=path)
+    second = ImageSeenIndex(capacity=1000, snapshot_path=path)
+    assert first.mark([DFCFW, "https://a.com/1.png", DFCFW.replace(".jpg", "_w10h10_o.jpg")]) == ["new", "new", "seen"]
+    first.sync()
+    assert second.mark(["https://a.com/2.png"]) == ["new"]
+    second.sync()
+    assert "https://a.com/1.png" in second
+    first.sync()
+    assert first.mark(["http://a.com/2.png"]) == ["seen"]
+    assert ImageSeenIndex(capacity=1000, snapshot_path=path).mark([DFCFW]) == ["seen"]
+
+    clean_data = load_clean_data()
+    page = '如何？ 内容仅供娱乐 <img src="http://a.com/1.png"><img src="http://a.com/3.png">（文章来源：x）'
+    output = clean_data.build_output(page, image_index=first)
+    assert output["image_status"] == ["seen", "new"]
+    assert "image_status" not in clean_data.build_output(page)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+import benchmark
+from clean_data_loader import load_clean_data
+from incremental import IncrementalCleaner, _normalize_chunk, chunk_boundaries, join_normalized
+
+
+def test_chunk_boundaries_resync_and_join():
+    """测试局部修改只影响所在的块，且逐块规范化后拼接与整页规范化一致"""
+    page = benchmark.generate_page(120000, seed=3)
+    edited = page.replace('如何看待', '阅读 7556 如何看待', 1)
+    cuts = chunk_boundaries(page, min_size=256)
+    edited_cuts = chunk_boundaries(edited, min_size=256)
+    shift = len(edited) - len(page)
+    assert len(cuts) > 20
+    assert [cut + shift for cut in cuts[2:]] == edited_cuts[2:]
+
+    clean_data = load_clean_data()
+    raw = 'a <b>  \\u0020 c</b>\n\n<i></i>d\\u4e2d<p> </p>'
+    # 在每个 > 之后切开
+    starts = [0] + [i + 1 for i, char in enumerate(raw) if char == '>'] + [len(raw)]
+    pieces = [_normalize_chunk(raw[s:e], False) for s, e in zip(starts, starts[1:])]
+    assert len(pieces) > 3
+    assert join_normalized(pieces) == clean_data.normalize_page(raw).text == 'a c d中'
+
+
+def test_recrawl_matches_full_clean_and_reuses_chunks():
+    """测试重爬时只重算变化的块，结果与 clean_web_content 一致"""
+    clean_data = load_clean_data()
+    cleaner = IncrementalCleaner(min_chunk=512)
+    for nuxt_size in (0, 3000):
+        url = f"https://example.com/{nuxt_size}"
+        page = benchmark.generate_page(40000, nuxt_size=nuxt_size, seed=nuxt_size)
+        assert cleaner.clean(page, url) == clean_data.clean_web_content(page, url)
+        before = cleaner.stats.as_dict()
+
+        recrawl = page.replace('如何看待', '阅读 7556 如何看待', 1)
+        assert cleaner.clean(recrawl, url) == clean_data.clean_web_content(recrawl, url)
+        after = cleaner.stats.as_dict()
+        chunks = after["chunks"] - before["chunks"]
+        assert after["reused_chunks"] - before["reused_chunks"] >= chunks - 2
+        assert after["payload_reuses"] - before["payload_reuses"] == (1 if nuxt_size else 0)
+
+    linear = cleaner.clean(page, url, linear_time=True)
+    assert linear == clean_data.clean_web_content(page, url, linear_time=True)
+    assert len(cleaner) == 2
+
+
+def test_small_chunks_match_full_clean():
+    """测试极小的块也不会切开图片URL、src 引号值与规范化记号"""
+    clean_data = load_clean_data()
+    tokens = ['<p>', '</p>', '>', ' ', '\n', '见', '如何', '？', '内容仅供娱乐', '）', 'http://q.com', '.jpg',
+              'https:\\\\u002F\\\\u002Fa.jpg', '<img src="', '"', "'", '\\u0022', '\\\\u003cimg src=\\\\"',
+              '\\u003e', 'https://e.com/a', '\\', 'x']
+    cleaner = IncrementalCleaner(min_chunk=1, max_chunk=64)
+    rng = random.Random(11)
+    for index in range(500):
+        page = ''.join(rng.choice(tokens) for _ in range(rng.randint(0, 60)))
+        url = f"https://example.com/{index % 5}"
+        assert cleaner.clean(page, url) == clean_data.clean_web_content(page, url)
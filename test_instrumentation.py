@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import clean_ocr
+from clean_data_loader import load_clean_data
+from instrumentation import Histogram, StageAggregator, install, uninstall
+
+clean_data = load_clean_data()
+
+
+def test_histogram_buckets_and_percentiles():
+    """测试耗时直方图的分桶与分位数估算"""
+    histogram = Histogram(bounds=(1, 10, 100))
+    for value in (0.5, 2, 3, 50, 500):
+        histogram.add(value)
+    summary = histogram.as_dict()
+    assert summary["count"] == 5
+    assert summary["buckets"] == {"<=1": 1, "<=10": 2, "<=100": 1, ">100": 1}
+    assert summary["p50"] == 10
+    assert summary["p99"] == 500
+
+
+def test_stage_hooks_record_sizes_and_counts():
+    """测试网页与OCR流程的阶段埋点，以及关闭后不再记录"""
+    page = ('如何做？ 内容仅供娱乐 abc（文章来源：x） <img src="http://a.com/1.png"> '
+            'https:\\u002F\\u002Fb.com\\u002F2.jpg')
+    ocr_data = {"data": {"results": [{"words": [
+        {"text": "东方财富"}, {"text": "金盾股份 200%25"}, {"text": "瑞松科技-42.85% 3.61"},
+    ]}]}}
+    aggregator = install(StageAggregator())
+    try:
+        clean_data.clean_web_content(page)
+        clean_ocr.extract_and_clean_ocr_data(ocr_data)
+    finally:
+        uninstall()
+    clean_data.clean_web_content(page)
+
+    stats = aggregator.as_dict()
+    assert set(stats["web"]) == {"nuxt", "normalize", "extract", "images"}
+    assert stats["web"]["images"]["counts"] == {"img_tag": 1, "url": 2}
+    assert stats["web"]["images"]["time_ms"]["count"] == 1
+    assert stats["web"]["normalize"]["input_size"] == len(page)
+    assert stats["ocr"]["classify"]["counts"] == {"gainers": 1, "losers": 1, "other": 1}
+
+    stream = io.StringIO()
+    aggregator.dump(stream)
+    assert json.loads(stream.getvalue()) == stats
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+import clean_ocr
+from llm_chunker import count_words, estimate_tokens, iter_chunks, iter_sentences
+
+
+def test_estimator_and_sentences():
+    """测试中英混排的 token 估算、字数统计与中文断句"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("沪指上涨") == 6            # 4 × 1.4 向上取整
+    assert estimate_tokens("hello world") == 4        # 每4个字母1个 token
+    assert estimate_tokens("123456，") == 3           # 数字3位一组 + 标点
+    assert count_words("沪指上涨 0.52%，A股 market") == 9
+
+    text = "第一句。“第二句！”\n第三句？没有结尾"
+    assert list(iter_sentences(text)) == ["第一句。", "“第二句！”\n", "第三句？", "没有结尾"]
+    assert list(iter_sentences(iter(text))) == list(iter_sentences(text))
+
+
+def test_chunks_respect_budget_overlap_and_stream():
+    """测试分块不超预算、相邻块重叠、覆盖全文，且流式输入结果一致"""
+    text = "".join(f"第{i}条消息说明市场表现平稳，成交量 {i * 37} 亿元。" for i in range(200)) + "x" * 500
+    chunks = list(iter_chunks(text, max_tokens=120, overlap_tokens=30))
+
+    assert all(chunk.tokens <= 120 for chunk in chunks)
+    assert all(text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # 硬切的超长句占满预算时没有重叠
+        assert previous.start < chunk.start <= previous.end <= chunk.end
+    pieces = (text[i:i + 13] for i in range(0, len(text), 13))
+    assert list(iter_chunks(pieces, max_tokens=120, overlap_tokens=30)) == chunks
+
+    report = clean_ocr.organize_content_improved(["2024年A股月度涨跌幅最大个股"], ["金盾股份: 涨幅200%, 月末资产25万元"] * 50, [])
+    report_chunks = list(iter_chunks(report.splitlines(keepends=True), max_tokens=80, overlap_tokens=0))
+    assert "".join(chunk.text for chunk in report_chunks) == report
+
+
+def test_chunk_text_estimate_within_budget():
+    """测试按拼接后的分块文本重新估算，token 数也不超过预算"""
+    assert estimate_tokens('。字； Z字"测测3b文YcZ。') == 15
+    assert [chunk.tokens for chunk in iter_chunks('。字； Z字"测测3b文YcZ。', max_tokens=15, overlap_tokens=0)] == [15]
+
+    rng = random.Random(3)
+    alphabet = ['字', '测', '文', 'Z', 'b', 'Yc', '3', '42', '。', '；', '"', ' ', '\n', '！']
+    for _ in range(300):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 200)))
+        max_tokens = rng.randint(2, 40)
+        for chunk in iter_chunks(text, max_tokens=max_tokens, overlap_tokens=rng.randint(0, max_tokens - 1)):
+            assert chunk.tokens == estimate_tokens(chunk.text) <= max_tokens
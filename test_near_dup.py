@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+from clean_data_loader import load_clean_data
+from near_dup import NearDupIndex, hamming_distance, simhash
+
+PHRASES = ["沪指小幅上涨", "成交量有所放大", "北向资金持续流入", "券商板块领涨", "医药股午后回落",
+           "人工智能概念活跃", "新能源车销量创新高", "央行公开市场操作", "债券收益率下行", "科技行业发展趋势"]
+
+
+def _article(seed: int) -> str:
+    rng = random.Random(seed)
+    return "，".join(f"{rng.choice(PHRASES)}{rng.randint(1, 999)}" for _ in range(120)) + "。"
+
+
+ARTICLE = _article(1)
+OTHER = _article(2)
+
+
+def _page(chrome: str, body: str) -> str:
+    return f'<div class="{chrome}">{chrome}导航</div>如何看待行情？ 内容仅供娱乐 {body}<img src="http://{chrome}.com/a.png">（文章来源：{chrome}）'
+
+
+def test_simhash_and_index_eviction_and_snapshot(tmp_path):
+    """测试指纹距离、容量淘汰与快照往返"""
+    mirrored = ARTICLE.replace("沪指", "上证指数", 2) + "转载自镜像站"
+    assert hamming_distance(simhash(ARTICLE), simhash(mirrored)) <= 3
+    assert hamming_distance(simhash(ARTICLE), simhash(OTHER)) > 10
+
+    index = NearDupIndex(threshold=0.95, max_entries=1)
+    index.add(index.fingerprint(ARTICLE), {"content": "a"})
+    assert index.lookup(index.fingerprint(mirrored)) == {"content": "a"}
+    index.add(index.fingerprint(OTHER), {"content": "b"})
+    assert len(index) == 1 and index.stats.evictions == 1
+    assert index.lookup(index.fingerprint(ARTICLE)) is None
+    assert index.fingerprint("太短") is None
+
+    path = str(tmp_path / "dedup.json")
+    index.save(path)
+    restored = NearDupIndex(threshold=0.95)
+    assert restored.load(path) == 1
+    assert restored.lookup(restored.fingerprint(OTHER)) == {"content": "b"}
+
+
+def test_clean_web_content_reuses_canonical_result():
+    """测试清洗流程中近重复页面直接复用规范结果"""
+    clean_data = load_clean_data()
+    index = NearDupIndex(threshold=0.9)
+    first = clean_data.build_output(_page("origin", ARTICLE), dedup_index=index)
+    assert first["extract_status"] == "success"
+
+    mirror = clean_data.build_output(_page("mirror", ARTICLE.replace("沪指", "上证指数", 1)), dedup_index=index)
+    assert mirror["extract_status"] == "duplicate"
+    assert mirror["image_urls"] == ["http://origin.com/a.png"]
+    assert mirror["content"] == first["content"]
+
+    other = clean_data.build_output(_page("other", OTHER), dedup_index=index)
+    assert other["extract_status"] == "success"
+    assert (index.stats.hits, index.stats.misses, len(index)) == (1, 2, 2)
+
+
+def test_canonical_result_is_copied_in_and_out():
+    """测试登记与命中时都复制结果，修改返回值中的 image_urls 不会影响之后的命中"""
+    index = NearDupIndex(threshold=0.9)
+    result = {"title": "t", "content": ARTICLE, "image_urls": ["http://a.com/1.png"]}
+    fingerprint = index.fingerprint(ARTICLE)
+    index.add(fingerprint, result)
+    result["image_urls"].append("http://a.com/2.png")
+    index.lookup(fingerprint)["image_urls"].clear()
+    assert index.lookup(fingerprint)["image_urls"] == ["http://a.com/1.png"]
+
+    clean_data = load_clean_data()
+    index = NearDupIndex(threshold=0.9)
+    first = clean_data.clean_web_content(_page("origin", ARTICLE), dedup_index=index)
+    first["image_urls"].append("http://changed.com/x.png")
+    mirror = _page("mirror", ARTICLE.replace("沪指", "上证指数", 1))
+    duplicate = clean_data.clean_web_content(mirror, dedup_index=index)
+    assert duplicate["status"] == "duplicate"
+    duplicate["image_urls"].append("http://changed.com/y.png")
+    assert clean_data.clean_web_content(mirror, dedup_index=index)["image_urls"] == ["http://origin.com/a.png"]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+
+import benchmark
+from clean_data_loader import load_clean_data
+from parallel_scan import ParallelCleaner, _raw_cuts, merge_anchor_matches
+
+
+def test_merge_anchor_matches_matches_serial_scan():
+    """测试相互重叠的锚点被切在段边界上时，合并结果与串行扫描一致"""
+    clean_data = load_clean_data()
+    rules = clean_data.RuleSet({"name": "overlap", "title": {"start": ["aab", "b"], "end": ["bab"]},
+                                "body": {"start": ["ab"], "end": ["abba"]}})
+    overlap = max(len(name) for name in rules._anchor_names) - 1
+    rng = random.Random(7)
+    for _ in range(500):
+        data = ''.join(rng.choice('ab') for _ in range(rng.randint(1, 60))).encode()
+        size = rng.randint(1, 8)
+        segments = [(start, min(start + size, len(data)), min(start + size + overlap, len(data)))
+                    for start in range(0, len(data), size)]
+        results = [[(start + m.start(), start + m.end(), m.group().decode())
+                    for m in rules._anchor_bytes_re.finditer(data[start:endpos]) if m.start() < end - start]
+                   for start, end, endpos in segments]
+        expected = [(m.start(), m.end(), m.group().decode()) for m in rules._anchor_bytes_re.finditer(data)]
+        assert merge_anchor_matches(rules, data, segments, results) == expected
+        assert rules.fold_anchors(expected) == rules.locate(data)
+
+
+def test_parallel_clean_matches_serial_output():
+    """测试分段并行清洗的结果与 clean_web_content 一致，且共享内存全部释放"""
+    clean_data = load_clean_data()
+    shm_before = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+    with ParallelCleaner(workers=2, segment_size=512, min_parallel_size=0) as cleaner:
+        for nuxt_size in (0, 3000):
+            page = benchmark.generate_page(30000, nuxt_size=nuxt_size, escape_depth=1, seed=nuxt_size)
+            page = page.replace('如何看待', '如\\u4f55　　<b>看待</b>', 1)
+            for linear_time in (False, True):
+                expected = clean_data.clean_web_content(page, linear_time=linear_time)
+                assert cleaner.clean(page, linear_time=linear_time) == expected
+
+        rules = clean_data.RuleSet({"name": "noisy", "title": {"start": ["如何"], "end": ["？"]},
+                                    "body": {"start": ["内容仅供娱乐"], "end": ["（文章来源", "）"]},
+                                    "noise": ["的一", "是在不了"]})
+        text = clean_data.normalize_page(benchmark.generate_page(30000, seed=3)).text
+        assert cleaner.extract_fields(text, rules) == clean_data._extract_fields(text, rules)
+    if os.path.isdir('/dev/shm'):
+        assert set(os.listdir('/dev/shm')) <= shm_before
+
+
+def test_segment_cuts_never_split_an_image_match():
+    """测试直接出现的URL与 src 引号值中含有 > 时，分段结果仍与串行扫描一致"""
+    clean_data = load_clean_data()
+    pages = [
+        '<p>见http://q.com</p>…https:\\\\u002F\\\\u002Fa.jpg',
+        '<p>见http://q.com</p> 图 https://b.com/c.png',
+        '<p>图</p> <img src="https://a.com/p> <b> q.jpg"> <p>文</p> <i>x</i> 尾',
+    ]
+    with ParallelCleaner(workers=2, segment_size=16, min_parallel_size=0) as cleaner:
+        for page in pages:
+            for linear_time in (False, True):
+                expected = clean_data.clean_web_content(page, linear_time=linear_time)
+                assert cleaner.clean(page, linear_time=linear_time) == expected
+    assert _raw_cuts(pages[0].encode('utf-8'), 16) == [len(pages[0].encode('utf-8'))]
+    data = pages[2].encode('utf-8')
+    assert data.index(b'q.jpg') < _raw_cuts(data, 16)[0]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+
+from clean_data_loader import load_clean_data
+from result_cache import ResultCache, cached_build_output, content_hash, rules_version, web_rules_version
+
+
+def test_memory_tier_lru_eviction():
+    """测试内存层按字节数淘汰最久未使用的条目"""
+    cache = ResultCache(max_bytes=30)
+    cache.put(("web", "v1", "a"), "x" * 10)
+    cache.put(("web", "v1", "b"), "y" * 10)
+    assert cache.get(("web", "v1", "a")) == "x" * 10
+
+    cache.put(("web", "v1", "c"), "z" * 10)
+    assert cache.get(("web", "v1", "b")) is None
+    assert cache.get(("web", "v1", "a")) == "x" * 10
+    assert cache.stats.as_dict() == {"hits": 2, "disk_hits": 0, "misses": 1, "evictions": 1}
+
+    # 容量按 UTF-8 字节数计：4 个汉字的 JSON 为 6 个字符、14 字节，只能容纳两条
+    cache = ResultCache(max_bytes=30)
+    cache.put(("web", "v1", "a"), "汉字" * 2)
+    assert cache.size_bytes == len(json.dumps("汉字" * 2, ensure_ascii=False).encode('utf-8')) == 14
+    cache.put(("web", "v1", "b"), "汉字" * 2)
+    cache.put(("web", "v1", "c"), "汉字" * 2)
+    assert len(cache) == 2 and cache.size_bytes == 28
+
+
+def test_disk_tier_and_version_invalidation():
+    """测试磁盘层跨实例共享，规则版本变化后旧条目不再命中"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cache.db")
+        rules_path = os.path.join(tmp, "rules.txt")
+        with open(rules_path, "w") as f:
+            f.write("v1")
+        version = rules_version(rules_path)
+
+        writer = ResultCache(db_path=db_path)
+        calls = []
+        assert writer.get_or_compute("ocr", version, "raw", lambda: calls.append(1) or "done") == "done"
+        writer.close()
+
+        reader = ResultCache(db_path=db_path)
+        assert reader.get_or_compute("ocr", version, "raw", lambda: calls.append(1) or "again") == "done"
+        assert calls == [1]
+        assert reader.stats.disk_hits == 1
+
+        with open(rules_path, "w") as f:
+            f.write("v2")
+        new_version = rules_version(rules_path)
+        assert new_version != version
+        assert reader.get(("ocr", new_version, content_hash("raw"))) is None
+        assert reader.purge_stale({"ocr": new_version}) == 1
+        reader.close()
+
+
+def test_cached_build_output():
+    """测试网页清洗输出缓存命中后结果一致"""
+    cache = ResultCache()
+    raw = "如何缓存？ 内容仅供娱乐 正文（文章来源：测试）"
+    first = cached_build_output(raw, cache)
+    second = cached_build_output(raw, cache)
+
+    assert first == second
+    assert first["title"] == "如何缓存？"
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_rules_file_edit_invalidates_web_cache():
+    """测试改动站点抽取规则文件后，网页清洗缓存不再返回旧规则的结果"""
+    clean_data = load_clean_data()
+    raw = "如何缓存？ 内容仅供娱乐 正文（文章来源：测试） 免责声明：仅供参考"
+    rules = {"default": "site", "rule_sets": [{
+        "name": "site", "title": {"start": ["如何"], "end": ["？"]},
+        "body": {"start": ["内容仅供娱乐"], "end": ["（文章来源", "）"]},
+    }]}
+    cache = ResultCache()
+    with tempfile.TemporaryDirectory() as tmp:
+        rules_path = os.path.join(tmp, "rules.json")
+        with open(rules_path, "w", encoding="utf-8") as f:
+            json.dump(rules, f, ensure_ascii=False)
+        try:
+            clean_data.load_rule_registry(rules_path)
+            version = web_rules_version()
+            assert cached_build_output(raw, cache)["content"] == "内容仅供娱乐 正文（文章来源：测试）"
+
+            rules["rule_sets"][0]["body"] = {"start": ["免责声明"], "end": ["参考"]}
+            with open(rules_path, "w", encoding="utf-8") as f:
+                json.dump(rules, f, ensure_ascii=False)
+            assert web_rules_version() != version
+            assert cached_build_output(raw, cache)["content"] == "免责声明：仅供参考"
+            assert (cache.stats.hits, cache.stats.misses) == (0, 2)
+        finally:
+            clean_data.load_rule_registry()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+
+from clean_data_loader import load_clean_data
+from worker_server import WorkerClient, WorkerServer
+
+OCR_PAYLOAD = {"data": {"results": [{"words": [{"text": "金盾股份 200%25"}]}]}}
+
+
+def test_stdio_requests_and_errors():
+    """测试标准输入输出模式：网页、OCR 请求与错误响应"""
+    server = WorkerServer(workers=0)
+    server.start()
+    lines = [
+        {"id": 1, "op": "web", "params": {"input": "如何做？ 内容仅供娱乐 abc（文章来源：x）"}},
+        {"id": 2, "op": "ocr", "params": {"data": OCR_PAYLOAD}},
+        {"id": 3, "op": "nope"},
+        {"id": 4, "op": "stats"},
+    ]
+    input_stream = io.BytesIO(b"".join(json.dumps(x).encode() + b"\n" for x in lines) + b"not json\n")
+    output_stream = io.BytesIO()
+    asyncio.run(server.serve_stdio(input_stream, output_stream))
+
+    responses = {r["id"]: r for r in map(json.loads, output_stream.getvalue().splitlines())}
+    assert responses[1]["result"]["title"] == "如何做？"
+    assert "金盾股份: 涨幅200%" in responses[2]["result"]["content"]
+    assert not responses[3]["ok"] and "未知的操作" in responses[3]["error"]
+    assert responses[None]["error"].startswith("JSONDecodeError")
+    assert server.stats.errors == 1
+    assert server.stats.requests["web"] == 1
+
+
+def test_stdio_stops_while_input_is_open():
+    """测试输入未结束时 stop 置位即停止读取，已读到的请求照常响应"""
+    server = WorkerServer(workers=0)
+    server.start()
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, json.dumps({"id": 1, "op": "ocr", "params": {"data": OCR_PAYLOAD}}).encode() + b"\n")
+    output_stream = io.BytesIO()
+
+    async def serve() -> None:
+        stop = asyncio.Event()
+        serving = asyncio.ensure_future(server.serve_stdio(os.fdopen(read_fd, 'rb'), output_stream, stop))
+        while not output_stream.getvalue():
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.wait_for(serving, 5)
+
+    try:
+        asyncio.run(serve())
+    finally:
+        os.close(write_fd)
+        server.close()
+    assert json.loads(output_stream.getvalue())["id"] == 1
+
+
+def test_in_process_indexes_are_used_and_released(tmp_path):
+    """测试服务进程内的图片已见索引：第二次出现的图片为 seen，关闭时写入快照并撤销索引"""
+    snapshot = str(tmp_path / "images.bloom")
+    server = WorkerServer(workers=0, image_snapshot=snapshot)
+    server.start()
+    page = {"input": '如何做？ 内容仅供娱乐 abc<img src="http://a.com/1.png">（文章来源：x）'}
+
+    async def ask() -> list:
+        return [await server.handle({"id": i, "op": "web", "params": page}) for i in range(2)]
+
+    first, second = asyncio.run(ask())
+    server.close()
+    assert first["result"]["image_status"] == ["new"]
+    assert second["result"]["image_status"] == ["seen"]
+    assert os.path.exists(snapshot)
+    assert "image_status" not in load_clean_data().build_output(page["input"])
+
+
+def test_unix_socket_with_worker_pool_and_reload():
+    """测试 Unix 套接字模式：工作进程池、健康检查、统计与平滑重载"""
+    server = WorkerServer(workers=2)
+    server.start()
+    path = os.path.join(tempfile.mkdtemp(), "clean.sock")
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.serve_unix(path, ready, stop),))
+    thread.start()
+    try:
+        assert ready.wait(10)
+        client = WorkerClient(path)
+        assert client.request("health")["result"]["workers"] == 2
+        web = client.request("web", {"input": "如何做？ 内容仅供娱乐 abc（文章来源：x）"})
+        assert web["ok"] and web["result"]["title"] == "如何做？"
+        assert client.request("reload")["result"]["reloads"] == 1
+        ocr = client.request("ocr", {"data": OCR_PAYLOAD})
+        assert ocr["ok"] and "月末资产25万元" in ocr["result"]["content"]
+        assert client.request("stats")["result"]["requests"]["web"] == 1
+        client.close()
+    finally:
+        loop.call_soon_threadsafe(stop.set)
+        thread.join(10)
+        loop.close()
+        server.close()
+    assert not os.path.exists(path)
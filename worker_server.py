@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻清洗服务
+启动时一次性加载 clean-data.py 与 clean_ocr.py（规则、正则均预先编译），
+再 fork 出工作进程池；请求以 JSONL 帧通过标准输入输出或 Unix 套接字传入，
+避免每次调用都付出解释器启动、模块导入与正则编译的开销。
+
+请求：{"id": ..., "op": "web" | "ocr" | "health" | "stats" | "reload", "params": {...}}
+响应：{"id": ..., "ok": true, "result": ...} 或 {"id": ..., "ok": false, "error": "..."}
+
+--dedup 与 --image-index 在每个工作进程中各建一个近重复索引与图片已见索引（同
+batch_clean），web 请求经由 build_output 使用它们；图片已见索引在工作进程退出
+（关闭或重载）时与快照合并。
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Optional
+
+import clean_ocr
+from batch_clean import init_indexes, sync_indexes
+from clean_data_loader import MODULE_NAME, load_clean_data
+
+# 默认的同时处理请求数上限（超出时暂停读取，形成背压）
+DEFAULT_MAX_IN_FLIGHT = 64
+
+
+def run_web(params: Dict[str, Any]) -> Dict[str, Any]:
+    """清洗网页内容（在工作进程中执行），参数与 clean-data.py 的 main 相同"""
+    clean_data = load_clean_data()
+    raw_content, options = clean_data._build_args({"params": params})
+    return clean_data.build_output(raw_content, **options)
+
+
+def run_ocr(params: Dict[str, Any]) -> Dict[str, Any]:
+    """清洗OCR结果（在工作进程中执行）：params 为 {"data": OCR JSON, "layout": bool}"""
+    content = clean_ocr.extract_and_clean_ocr_data(params['data'], bool(params.get('layout')))
+    return {"content": content}
+
+
+def warm_up() -> None:
+    """预热：加载规则并把各条清洗路径跑一遍，使正则缓存与惰性初始化都在服务前完成"""
+    clean_data = load_clean_data()
+    clean_data.get_rule_registry()
+    clean_data.build_output('如何预热？ 内容仅供娱乐 <img src="http://a.com/1.png">（文章来源：预热）')
+    clean_ocr.extract_and_clean_ocr_data({"data": {"results": [{"words": [{"text": "金盾股份 200%25"}]}]}})
+
+
+def init_worker(dedup_threshold: Optional[float] = None, image_snapshot: Optional[str] = None) -> None:
+    """
+    工作进程初始化：预热后配置进程级索引（预热页面不进入索引）
+
+    Args:
+        dedup_threshold: 近重复相似度阈值；为 None 时不判重
+        image_snapshot: 图片已见索引的快照路径；为 None 时不标记图片
+    """
+    warm_up()
+    if dedup_threshold is not None or image_snapshot is not None:
+        init_indexes(dedup_threshold, image_snapshot)
+
+
+def reload_modules() -> None:
+    """重新加载清洗模块与规则（用于平滑重载）"""
+    importlib.reload(clean_ocr)
+    sys.modules.pop(MODULE_NAME, None)
+    load_clean_data()
+
+
+# 各操作在工作进程中执行的函数
+_JOBS: Dict[str, Callable[[Dict[str, Any]], Any]] = {"web": run_web, "ocr": run_ocr}
+
+
+class ServerStats:
+    """服务统计"""
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.in_flight = 0
+        self.reloads = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = sum(self.requests.values())
+        return {
+            "uptime": round(time.time() - self.started, 3),
+            "requests": dict(self.requests),
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "reloads": self.reloads,
+            "mean_ms": round(self.busy_seconds * 1000 / total, 3) if total else 0.0,
+        }
+
+
+class WorkerServer:
+    """预先 fork 的工作进程池 + JSONL 请求分发"""
+
+    def __init__(self, workers: int = 4, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 dedup_threshold: Optional[float] = None, image_snapshot: Optional[str] = None) -> None:
+        """
+        Args:
+            workers: 工作进程数；为0时在服务进程内的单个线程中依次处理（没有进程间通信开销）
+            max_in_flight: 同时处理的请求数上限
+            dedup_threshold: 近重复相似度阈值，提供时每个工作进程各自判重
+            image_snapshot: 图片已见索引的快照路径，提供时 web 结果附带 image_status
+        """
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.dedup_threshold = dedup_threshold
+        self.image_snapshot = image_snapshot
+        self.stats = ServerStats()
+        self._pool: Optional[Executor] = None
+        # 服务进程内处理时的执行线程：任务依次执行，不阻塞事件循环
+        self._inline: Optional[Executor] = None
+        self._reload_lock = threading.Lock()
+
+    def start(self) -> None:
+        """预加载模块并启动工作进程池"""
+        self._pool = self._new_pool()
+        if self._pool is None:
+            self._inline = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inline-job")
+
+    def _new_pool(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            init_worker(self.dedup_threshold, self.image_snapshot)
+            return None
+        warm_up()
+        # fork 出的子进程直接继承已加载、已编译的模块
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=init_worker,
+                                   initargs=(self.dedup_threshold, self.image_snapshot))
+        # 提前拉起全部工作进程，第一个请求不必等待 fork
+        for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def reload(self) -> None:
+        """
+        平滑重载：重新加载模块与规则，启动新的进程池后再关闭旧池
+        旧池中正在处理的请求会正常完成
+        """
+        with self._reload_lock:
+            if self._pool is None:
+                sync_indexes()
+            reload_modules()
+            previous, self._pool = self._pool, self._new_pool()
+            self.stats.reloads += 1
+        if previous is not None:
+            threading.Thread(target=previous.shutdown, name="pool-shutdown", daemon=True).start()
+
+    def close(self) -> None:
+        if self._inline is not None:
+            self._inline.shutdown()
+            self._inline = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        elif self.dedup_threshold is not None or self.image_snapshot is not None:
+            # 服务进程内的索引：合并回快照后撤销
+            sync_indexes()
+            load_clean_data().configure_indexes()
+
+    async def _run_job(self, op: str, params: Dict[str, Any]) -> Any:
+        job = _JOBS[op]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool or self._inline, job, params)
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理一条请求
+
+        Args:
+            request: 已解析的请求对象
+
+        Returns:
+            响应对象
+        """
+        request_id = request.get("id")
+        op = request.get("op", "web")
+        started = time.perf_counter()
+        self.stats.requests[op] = self.stats.requests.get(op, 0) + 1
+        self.stats.in_flight += 1
+        try:
+            if op == "health":
+                result: Any = {"status": "ok", "pid": os.getpid(), "workers": self.workers}
+            elif op == "stats":
+                result = self.stats.as_dict()
+            elif op == "reload":
+                await asyncio.get_running_loop().run_in_executor(None, self.reload)
+                result = {"reloads": self.stats.reloads}
+            elif op in _JOBS:
+                result = await self._run_job(op, request.get("params") or {})
+            else:
+                raise ValueError(f"未知的操作: {op}")
+            return {"id": request_id, "ok": True, "result": result}
+        except Exception as e:
+            self.stats.errors += 1
+            return {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.stats.in_flight -= 1
+            self.stats.busy_seconds += time.perf_counter() - started
+
+    async def _serve_lines(self, readline: Callable[[], Awaitable[bytes]],
+                           write: Callable[[bytes], None]) -> None:
+        """从一条连接读取 JSONL 请求并发处理，响应按完成顺序写回（以 id 对应）"""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+
+        async def respond(line: bytes) -> None:
+            try:
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {"id": None, "ok": False, "error": f"JSONDecodeError: {e}"}
+                else:
+                    response = await self.handle(request)
+                write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            finally:
+                semaphore.release()
+
+        while True:
+            line = await readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            await semaphore.acquire()
+            task = asyncio.ensure_future(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def serve_stdio(self, input_stream: Optional[BinaryIO] = None,
+                          output_stream: Optional[BinaryIO] = None,
+                          stop: Optional[asyncio.Event] = None) -> None:
+        """
+        通过标准输入输出提供服务，输入结束或 stop 置位后处理完在途请求再返回
+
+        Args:
+            input_stream: 输入流，默认标准输入
+            output_stream: 输出流，默认标准输出
+            stop: 置位后不再读取新请求；为 None 时读到输入结束为止
+        """
+        loop = asyncio.get_running_loop()
+        # 标准输入另开一个读取对象：解释器退出时会锁住并关闭 sys.stdin，
+        # 不能让仍阻塞在读取上的线程持有它的锁
+        input_stream = input_stream or open(sys.stdin.fileno(), 'rb', closefd=False)
+        output_stream = output_stream or sys.stdout.buffer
+
+        def write(data: bytes) -> None:
+            output_stream.write(data)
+            output_stream.flush()
+
+        # 在守护线程中按需逐行读取：停止时阻塞在 readline 上的线程不会拖住进程退出
+        wanted = threading.Semaphore(0)
+        lines: 'asyncio.Queue[bytes]' = asyncio.Queue()
+
+        def pump() -> None:
+            line = b'\n'
+            while line:
+                wanted.acquire()
+                line = input_stream.readline()
+                try:
+                    loop.call_soon_threadsafe(lines.put_nowait, line)
+                except RuntimeError:
+                    # 事件循环已关闭
+                    return
+
+        async def readline() -> bytes:
+            wanted.release()
+            if stop is None:
+                return await lines.get()
+            line = asyncio.ensure_future(lines.get())
+            stopped = asyncio.ensure_future(stop.wait())
+            await asyncio.wait({line, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            stopped.cancel()
+            if line.done():
+                return line.result()
+            # 视为输入结束
+            line.cancel()
+            return b''
+
+        threading.Thread(target=pump, name="stdin-reader", daemon=True).start()
+        await self._serve_lines(readline, write)
+
+    async def serve_unix(self, path: str, ready: Optional[threading.Event] = None,
+                         stop: Optional[asyncio.Event] = None) -> None:
+        """
+        通过 Unix 套接字提供服务，每个连接上可以并发多个请求
+
+        Args:
+            path: 套接字路径（已存在时会被替换）
+            ready: 开始监听后置位的事件
+            stop: 置位后停止服务；为 None 时一直运行
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        clients: Dict[asyncio.StreamReader, asyncio.Task] = {}
+
+        async def on_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            clients[reader] = asyncio.current_task()
+            try:
+                await self._serve_lines(reader.readline, writer.write)
+                await writer.drain()
+            finally:
+                clients.pop(reader, None)
+                writer.close()
+
+        server = await asyncio.start_unix_server(on_client, path, limit=2 ** 30)
+        if ready is not None:
+            ready.set()
+        try:
+            await (stop.wait() if stop is not None else asyncio.Event().wait())
+        finally:
+            # 停止接收新连接；已有连接不再读取新请求，在途请求处理完后关闭
+            server.close()
+            for reader in list(clients):
+                reader.feed_eof()
+            if clients:
+                await asyncio.wait(list(clients.values()))
+            await server.wait_closed()
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+class WorkerClient:
+    """Unix 套接字服务的同步客户端"""
+
+    def __init__(self, path: str) -> None:
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._file = self._socket.makefile('rwb')
+        self._next_id = 0
+
+    def request(self, op: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        发送一条请求并等待响应
+
+        Args:
+            op: 操作名
+            params: 请求参数
+
+        Returns:
+            响应对象
+        """
+        self._next_id += 1
+        payload = {"id": self._next_id, "op": op, "params": params or {}}
+        self._file.write(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._file.flush()
+        return json.loads(self._file.readline())
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+
+async def _reload(server: WorkerServer) -> None:
+    """在线程中重载，失败时记录错误并继续使用旧的进程池"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, server.reload)
+    except Exception as e:
+        print(f"❌ 重载失败: {type(e).__name__}: {e}", file=sys.stderr)
+    else:
+        print(f"🔄 已重载（第 {server.stats.reloads} 次）", file=sys.stderr)
+
+
+async def _serve(server: WorkerServer, args: argparse.Namespace) -> None:
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    reloads = set()
+
+    def reload() -> None:
+        task = asyncio.ensure_future(_reload(server))
+        reloads.add(task)
+        task.add_done_callback(reloads.discard)
+
+    # SIGHUP 平滑重载；SIGTERM / SIGINT 停止读取新请求，在途请求处理完后退出
+    loop.add_signal_handler(signal.SIGHUP, reload)
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+    if args.socket:
+        print(f"🚀 清洗服务已启动：{args.socket}（{args.workers} 个工作进程）", file=sys.stderr)
+        await server.serve_unix(args.socket, stop=stop)
+    else:
+        await server.serve_stdio(stop=stop)
+    if reloads:
+        await asyncio.wait(reloads)
+
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    命令行入口
+    """
+    parser = argparse.ArgumentParser(description="常驻的网页与OCR清洗服务")
+    parser.add_argument("--socket", default=None, help="Unix 套接字路径；缺省时使用标准输入输出")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="工作进程数，0 表示在服务进程内处理")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="同时处理的请求数上限")
+    parser.add_argument("--dedup", type=float, default=None, metavar="THRESHOLD",
+                        help="近重复相似度阈值（如 0.9），每个工作进程各自判重")
+    parser.add_argument("--image-index", default=None, metavar="SNAPSHOT",
+                        help="图片已见索引的快照路径，web 结果附带 image_status")
+    args = parser.parse_args(argv)
+
+    server = WorkerServer(workers=args.workers, max_in_flight=args.max_in_flight,
+                          dedup_threshold=args.dedup, image_snapshot=args.image_index)
+    server.start()
+    try:
+        asyncio.run(_serve(server, args))
+    finally:
+        server.close()
+    print(f"📊 {json.dumps(server.stats.as_dict(), ensure_ascii=False)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())